@@ -0,0 +1,82 @@
+#
+# bench_ads1115_paths.py
+#
+# Microbenchmark: adafruit_ads1x15 vs RawADS1115 on the same bus/chip
+#
+# 1. adafruit single-shot chan.voltage   (what the plant_midi scripts do)
+# 2. adafruit continuous chan.voltage    (pointer left on conversion reg)
+# 3. RawADS1115.read_code + block convert
+# 4. CPU only: per-sample convert_to_voltage vs one vectorized block
+#
+# Run on the Pi with the ADS1115 at 0x48 and nothing else using it.
+# The continuous/raw loops read faster than the chip converts, so they
+# see repeated codes: they measure the per-read cost, not the ADC.
+
+
+import time
+from array import array
+
+import board
+import busio
+import adafruit_ads1x15.ads1115 as ADS
+from adafruit_ads1x15 import AnalogIn, ads1x15
+
+from plant_ads1115 import ADS_GAIN, RawADS1115, codes_to_volts
+
+
+N_READS = 2000
+DATA_RATE = 860
+
+
+def report(name, n, seconds):
+    print(f"{name:<38} {seconds / n * 1e6:9.1f} us/sample  {n / seconds:8.0f} samples/s")
+
+
+def main():
+    i2c = busio.I2C(board.SCL, board.SDA)
+
+    # 1. adafruit single-shot, as configured in plant_midi_raw_active_*.py
+    ads = ADS.ADS1115(i2c)
+    ads.gain = ADS_GAIN
+    chan = AnalogIn(ads, ads1x15.Pin.A0)
+    t0 = time.perf_counter()
+    for _ in range(N_READS):
+        chan.voltage
+    report(f"adafruit single-shot @{ads.data_rate} SPS", N_READS, time.perf_counter() - t0)
+
+    ads.data_rate = DATA_RATE
+    t0 = time.perf_counter()
+    for _ in range(N_READS):
+        chan.voltage
+    report(f"adafruit single-shot @{DATA_RATE} SPS", N_READS, time.perf_counter() - t0)
+
+    # 2. adafruit continuous
+    ads.mode = ads1x15.Mode.CONTINUOUS
+    chan.voltage  # selects the mux once
+    t0 = time.perf_counter()
+    for _ in range(N_READS):
+        chan.voltage
+    report(f"adafruit continuous @{DATA_RATE} SPS", N_READS, time.perf_counter() - t0)
+    ads.mode = ads1x15.Mode.SINGLE
+
+    # 3. raw codes, converted once per block
+    codes = array("h", bytes(2 * N_READS))
+    with RawADS1115(gain=ADS_GAIN, data_rate=DATA_RATE) as raw:
+        t0 = time.perf_counter()
+        raw.read_codes(codes)
+        volts = codes_to_volts(codes, ADS_GAIN)
+        report(f"raw int16 + block convert @{DATA_RATE} SPS", N_READS, time.perf_counter() - t0)
+    print(f"  (raw mean {volts.mean():.4f} V)")
+
+    # 4. conversion cost alone
+    t0 = time.perf_counter()
+    for c in codes:
+        chan.convert_to_voltage(c)
+    report("convert: per-sample adafruit", N_READS, time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    codes_to_volts(codes, ADS_GAIN)
+    report("convert: one vectorized block", N_READS, time.perf_counter() - t0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#
+# bench_detector.py
+#
+# plant_detector.ChangeDetector vs the v3 per-sample loop
+#
+# No hardware needed. Runs a simulated plant signal through both the
+# scalar chain (copied from plant_midi_raw_active_3.py) and the block
+# detector in chunks, prints the largest difference per output and how
+# many trigger decisions disagree, then the cost per sample of each.
+
+
+import time
+
+import numpy as np
+
+from plant_backends import SimulatedPlant
+from plant_detector import (
+    DERIV_ALPHA, DRIFT_ACCUM_THRESHOLD, INITIAL_NOISE, MIN_NOISE, NOISE_ALPHA,
+    SMOOTH_ALPHA, THRESH_MULTIPLIER, THRESHOLD_K, ChangeDetector,
+)
+
+
+RATES = (40.0, 860.0)
+SECONDS = 3600.0
+BLOCK = 4096                 # detector block size (FAST_BLOCK for replay; live blocks are ragged)
+
+
+def scalar_loop(vs, first_v, dt):
+    n = len(vs)
+    out = {k: np.empty(n) for k in ("ema_v", "raw_d", "ema_d", "noise")}
+    force = np.zeros(n, dtype=bool)
+    sign = np.zeros(n, dtype=bool)
+    strong = np.zeros(n, dtype=bool)
+
+    ema_v = first_v
+    prev_ema_v = ema_v
+    ema_d = 0.0
+    noise = INITIAL_NOISE
+    drift_accum = 0.0
+    prev_raw_d = 0.0
+    for i, v in enumerate(vs):
+        ema_v = (1 - SMOOTH_ALPHA) * ema_v + SMOOTH_ALPHA * v
+        raw_d = (ema_v - prev_ema_v) / dt
+        prev_ema_v = ema_v
+        ema_d = (1 - DERIV_ALPHA) * ema_d + DERIV_ALPHA * raw_d
+        mag = abs(ema_d)
+        noise = (1 - NOISE_ALPHA) * noise + NOISE_ALPHA * mag
+        noise = max(noise, MIN_NOISE)
+        threshold = THRESHOLD_K * noise
+        drift_accum += mag * dt
+        if drift_accum > DRIFT_ACCUM_THRESHOLD:
+            drift_accum = 0.0
+            force[i] = True
+        sign[i] = (raw_d * prev_raw_d) < 0
+        prev_raw_d = raw_d
+        strong[i] = mag > (threshold * THRESH_MULTIPLIER)
+        out["ema_v"][i] = ema_v
+        out["raw_d"][i] = raw_d
+        out["ema_d"][i] = ema_d
+        out["noise"][i] = noise
+    return out, force, sign, strong
+
+
+def main():
+    for fs in RATES:
+        sim = SimulatedPlant(fs, speed=0, seed=1)
+        sim.start()
+        n = int(fs * SECONDS)
+        vs = np.concatenate([sim.read_volts()[1] for _ in range(n // 4096 + 1)])[:n]
+        dt = 1.0 / fs
+        first_v = float(vs[0])
+
+        t0 = time.perf_counter()
+        ref, ref_force, ref_sign, ref_strong = scalar_loop(vs.tolist(), first_v, dt)
+        t_scalar = time.perf_counter() - t0
+
+        det = ChangeDetector(first_v, dt)
+        frames = []
+        t0 = time.perf_counter()
+        for i in range(0, n, BLOCK):
+            frames.append(det.process(vs[i:i + BLOCK]))
+        t_block = time.perf_counter() - t0
+
+        print(f"{fs:g} Hz, {SECONDS / 3600:g} h ({n} samples), blocks of {BLOCK}")
+        for key in ("ema_v", "raw_d", "ema_d", "noise"):
+            got = np.concatenate([getattr(f, key) for f in frames])
+            err = np.max(np.abs(got - ref[key])) / np.max(np.abs(ref[key]))
+            print(f"  {key:<7} max rel diff {err:.2e}")
+        for key, want in (("force", ref_force), ("sign_change", ref_sign), ("strong", ref_strong)):
+            got = np.concatenate([getattr(f, key) for f in frames])
+            print(f"  {key:<11} {int(want.sum()):7d} set, {int((got != want).sum())} differ")
+        print(
+            f"  scalar {t_scalar / n * 1e6:6.2f} us/sample   "
+            f"block {t_block / n * 1e6:6.3f} us/sample   ({t_scalar / t_block:.0f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#
+# bench_mains_notch.py
+#
+# Per-block cost of the mains notch (plant_dsp.MainsNotch) at 860 SPS
+#
+# No hardware needed - run it on the Pi to get Pi numbers. Prints the
+# cost per block, per sample and as a share of one CPU core at the given
+# rate, next to a plain per-sample Python biquad loop for reference.
+
+
+import time
+
+import numpy as np
+
+from plant_dsp import MainsNotch, mains_sos
+
+
+FS = 860
+MAINS = 50
+BLOCK_SIZES = (16, 86, 128, 860)     # ALERT/RDY bursts .. 1 s blocks
+SECONDS = 20.0
+
+
+def python_loop(sos, x):
+    y = x
+    for b0, b1, b2, _, a1, a2 in sos:
+        z1 = z2 = 0.0
+        out = []
+        for xn in y:
+            o = b0 * xn + z1
+            z1 = b1 * xn - a1 * o + z2
+            z2 = b2 * xn - a2 * o
+            out.append(o)
+        y = out
+    return y
+
+
+def main():
+    n = int(FS * SECONDS)
+    t = np.arange(n) / FS
+    rng = np.random.default_rng(0)
+    x = 1.2 + 0.01 * np.sin(2 * np.pi * 0.3 * t) + 0.05 * np.sin(2 * np.pi * MAINS * t)
+    x += 0.001 * rng.standard_normal(n)
+    t_ns = (t * 1e9).astype(np.int64)
+
+    notch = MainsNotch(FS, mains_hz=MAINS)
+    print(f"mains {MAINS} Hz, {len(notch.filter.sos)} notch sections, fs {FS} Hz")
+
+    for block in BLOCK_SIZES:
+        notch.filter.reset()
+        nblocks = n // block
+        t0 = time.perf_counter()
+        for i in range(nblocks):
+            notch.process(t_ns[i * block:(i + 1) * block], x[i * block:(i + 1) * block])
+        elapsed = time.perf_counter() - t0
+        per_block = elapsed / nblocks
+        load = elapsed / (nblocks * block / FS) * 100
+        print(
+            f"block {block:4d}: {per_block * 1e6:8.1f} us/block "
+            f"{per_block / block * 1e6:6.2f} us/sample  {load:5.2f}% of one core"
+        )
+
+    sos = mains_sos(MAINS, FS)
+    t0 = time.perf_counter()
+    python_loop(sos, x.tolist())
+    elapsed = time.perf_counter() - t0
+    print(
+        f"python loop:  {elapsed / n * 1e6:6.2f} us/sample  "
+        f"{elapsed / SECONDS * 100:5.2f}% of one core"
+    )
+
+
+if __name__ == "__main__":
+    main()
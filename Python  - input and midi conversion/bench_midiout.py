@@ -0,0 +1,92 @@
+#
+# bench_midiout.py
+#
+# MIDI output throughput: mido.Message + mido port vs plant_midiout's preencoded bytes
+#
+# The traffic is what a 16-plant rig sends: a CC per plant at 10 Hz plus
+# the odd note on/off, as one tick's batch at a time. Three paths:
+#
+#   mido      mido.Message per message, port.send() each (copy + bytes())
+#   raw       RawMessages pool, port.send() each
+#   raw batch RawMessages pool, one port.send_batch() per tick
+#
+# With python-rtmidi installed both ports are real virtual ports (mido's
+# rtmidi backend and RtMidiOutput), so the numbers include ALSA. Without
+# it, each port runs its own Python side up to rtmidi.send_message (mido:
+# checks, copy, bytes(); RtMidiOutput: its send/send_batch) and stops
+# there, which isolates the cost this is about.
+
+
+import time
+
+import mido
+import mido.ports
+
+from plant_midiout import RtMidiOutput, messages_for
+
+
+TICKS = 20000                # 10 Hz ticks: ~33 min of a 16-plant rig
+PLANTS = 16
+NOTE_EVERY = 7               # a note on + off every this many ticks
+
+
+class MidoSink(mido.ports.BaseOutput):
+    """A mido output port that stops where rtmidi.send_message would start."""
+
+    def _send(self, msg):
+        msg.bytes()
+
+
+def raw_sink():
+    """RtMidiOutput's own send()/send_batch() with rtmidi.send_message a no-op."""
+    port = RtMidiOutput.__new__(RtMidiOutput)
+    port._send = lambda msg: None
+    return port
+
+
+def ticks(messages):
+    """Build each tick's batch of messages with `messages`, yield it."""
+    for k in range(TICKS):
+        batch = [messages.control_change(ch, 74, (k * 7 + ch * 13) & 127) for ch in range(PLANTS)]
+        if k % NOTE_EVERY == 0:
+            ch = k % PLANTS
+            note = 36 + (k * 5) % 60
+            batch.append(messages.note_on(ch, note, 25 + k % 100))
+            batch.append(messages.note_off(ch, note))
+        yield batch
+
+
+def run(label, port, messages, batch):
+    n = 0
+    t0 = time.perf_counter()
+    for msgs in ticks(messages):
+        if batch:
+            port.send_batch(msgs)
+        else:
+            for msg in msgs:
+                port.send(msg)
+        n += len(msgs)
+    wall = time.perf_counter() - t0
+    print(f"  {label:<10} {n / wall:10.0f} msg/s  {wall / n * 1e6:6.2f} us/msg  "
+          f"({wall / TICKS * 1e6:7.1f} us per {PLANTS}-plant tick)")
+    return wall
+
+
+def main():
+    try:
+        mido_port = mido.open_output("Plant_MIDI_bench_mido", virtual=True)
+        raw_port = RtMidiOutput("Plant_MIDI_bench_raw", virtual=True)
+        print(f"{TICKS} ticks through ALSA virtual ports:")
+    except Exception as e:
+        print(f"no rtmidi ports ({e}); {TICKS} ticks into sinks (Python-side cost only):")
+        mido_port = MidoSink()
+        raw_port = raw_sink()
+
+    t_mido = run("mido", mido_port, messages_for(mido_port), False)
+    t_raw = run("raw", raw_port, messages_for(raw_port), False)
+    t_batch = run("raw batch", raw_port, messages_for(raw_port), True)
+    print(f"  raw {t_mido / t_raw:.1f}x, raw batch {t_mido / t_batch:.1f}x the mido path")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#
+# bench_scheduler.py
+#
+# plant_scheduler.MidiScheduler with 10k pending notes, against a Timer per note
+#
+# No MIDI port needed: messages go to a counting sink. Measures
+#
+#   - schedule / cancel / steal cost with PENDING note-offs queued
+#   - how late the scheduler thread sends due messages (wall clock), with
+#     PENDING notes falling due over SPREAD_S seconds
+#   - close(): flushing everything still pending
+#   - the old way, a threading.Timer per note, for TIMERS notes (10k OS
+#     threads is more than most Pis will start)
+
+
+import random
+import threading
+import time
+
+import mido
+
+from plant_scheduler import MidiScheduler
+
+
+PENDING = 10000
+SPREAD_S = 2.0               # due times spread over this span in the lateness run
+TIMERS = 1000
+
+
+class Sink:
+    def __init__(self, clock=None):
+        self.n = 0
+        self.late = []
+        self.due = {}
+        self.clock = clock
+
+    def send(self, msg):
+        self.n += 1
+        if self.clock is not None:
+            self.late.append(self.clock() - self.due[id(msg)])
+
+
+def note_off(i):
+    return mido.Message("note_off", channel=i % 16, note=i % 128, velocity=0)
+
+
+def pct(xs, q):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q / 100 * len(xs)))]
+
+
+def bench_ops():
+    rng = random.Random(1)
+    sched = MidiScheduler(Sink())
+    msgs = [note_off(i) for i in range(PENDING)]
+    dues = [rng.randrange(10 ** 12) for _ in range(PENDING)]
+
+    t0 = time.perf_counter()
+    handles = [sched.schedule(dues[i], msgs[i], key=i) for i in range(PENDING)]
+    t_ins = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for i in range(0, PENDING, 2):
+        sched.cancel(handles[i])
+    t_cancel = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for i in range(1, PENDING, 4):
+        sched.steal(i)
+    t_steal = time.perf_counter() - t0
+
+    left = len(sched)
+    t0 = time.perf_counter()
+    sched.close()
+    t_flush = time.perf_counter() - t0
+
+    print(f"{PENDING} pending note-offs:")
+    print(f"  schedule {t_ins / PENDING * 1e6:6.2f} us   cancel {t_cancel / (PENDING // 2) * 1e6:6.2f} us   "
+          f"steal {t_steal / len(range(1, PENDING, 4)) * 1e6:6.2f} us (incl. send)")
+    print(f"  close() flushed {left} in {t_flush * 1e3:.1f} ms, {sched.out.n} sent in all")
+
+
+def bench_lateness():
+    sink = Sink(clock=time.monotonic_ns)
+    sched = MidiScheduler(sink)
+    sched.start()
+    base = time.monotonic_ns() + 100_000_000
+    rng = random.Random(2)
+    for i in range(PENDING):
+        msg = note_off(i)
+        due = base + rng.randrange(int(SPREAD_S * 1e9))
+        sink.due[id(msg)] = due
+        sched.schedule(due, msg)
+    threads = threading.active_count()
+    time.sleep(SPREAD_S + 0.3)
+    sched.close(flush=False)
+    late = [x / 1e6 for x in sink.late]
+    print(f"scheduler thread, {PENDING} due over {SPREAD_S:g} s: {len(late)} sent, lateness ms "
+          f"p50 {pct(late, 50):.3f}  p99 {pct(late, 99):.3f}  max {max(late):.3f}  "
+          f"({threads} threads)")
+
+
+def bench_timers():
+    sink = Sink(clock=time.monotonic_ns)
+    lock = threading.Lock()
+    base_s = 0.1
+    rng = random.Random(3)
+    peak = 0
+    t0 = time.perf_counter()
+    for i in range(TIMERS):
+        msg = note_off(i)
+        delay = base_s + rng.random() * SPREAD_S
+        sink.due[id(msg)] = time.monotonic_ns() + int(delay * 1e9)
+
+        def off(msg=msg):
+            with lock:
+                sink.send(msg)
+        t = threading.Timer(delay, off)
+        t.daemon = True
+        t.start()
+        peak = max(peak, threading.active_count())
+    t_start = time.perf_counter() - t0
+    time.sleep(base_s + SPREAD_S + 0.5)
+    late = [x / 1e6 for x in sink.late]
+    print(f"threading.Timer per note, {TIMERS} notes: start {t_start / TIMERS * 1e6:.1f} us each, "
+          f"up to {peak} threads, lateness ms p50 {pct(late, 50):.3f}  p99 {pct(late, 99):.3f}  "
+          f"max {max(late):.3f}")
+
+
+def main():
+    bench_ops()
+    bench_lateness()
+    bench_timers()
+
+
+if __name__ == "__main__":
+    main()
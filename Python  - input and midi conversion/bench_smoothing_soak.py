@@ -0,0 +1,78 @@
+#
+# bench_smoothing_soak.py
+#
+# Soak test: resident memory of the rolling smoothers vs the old history list
+#
+# No hardware needed. Pushes millions of samples through each smoother
+# and prints RSS (from /proc/self/statm) every REPORT_EVERY samples next
+# to the per-sample cost. The plant_smoothing classes should stay flat;
+# the old `history.append` + np.mean(history[-5:]) grows by ~40 bytes a
+# sample (float object + list slot) - about 35 MB a day at the 10 Hz of
+# the smoothed scripts, a gigabyte a month.
+#
+# Run with a smaller SAMPLES on the Pi if the legacy pass gets too big.
+
+
+import os
+import random
+import time
+
+import numpy as np
+
+from plant_smoothing import RollingMean, RollingMedian, RollingTrimmedMean
+
+
+SAMPLES = 5_000_000
+REPORT_EVERY = 1_000_000
+WINDOW = 5
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def legacy_smoother():
+    # the code being replaced, verbatim apart from the closure
+    history = []
+
+    def smooth(data, window_size=WINDOW):
+        if len(data) < window_size:
+            return data[-1]
+        return np.mean(data[-window_size:])
+
+    def update(voltage):
+        history.append(voltage)
+        return smooth(history)
+
+    return update
+
+
+def soak(name, update):
+    rng = random.Random(0)
+    start_rss = rss_mb()
+    t0 = time.perf_counter()
+    lap = t0
+    print(f"{name}: start RSS {start_rss:.1f} MB")
+    for i in range(1, SAMPLES + 1):
+        update(1.65 + rng.gauss(0.0, 0.01))
+        if i % REPORT_EVERY == 0:
+            now = time.perf_counter()
+            print(
+                f"  {i:>10,d} samples  RSS {rss_mb():7.1f} MB "
+                f"({rss_mb() - start_rss:+7.1f})  {(now - lap) / REPORT_EVERY * 1e6:6.2f} us/sample"
+            )
+            lap = now
+
+
+def main():
+    # the bounded ones first, so the legacy list can't inflate their numbers
+    soak(f"RollingMean({WINDOW})", RollingMean(WINDOW).update)
+    soak(f"RollingMedian({WINDOW})", RollingMedian(WINDOW).update)
+    soak(f"RollingTrimmedMean({WINDOW}, 1)", RollingTrimmedMean(WINDOW, 1).update)
+    soak("legacy history list", legacy_smoother())
+
+
+if __name__ == "__main__":
+    main()
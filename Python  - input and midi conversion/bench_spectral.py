@@ -0,0 +1,73 @@
+#
+# bench_spectral.py
+#
+# CPU cost of plant_spectral.SpectralFeatures per frame and per second of signal
+#
+# No hardware needed. Feeds an hour of simulated plant signal through the
+# streaming Welch stage for a few rate / nfft / hop combinations, in
+# ragged blocks like the live loop gets, and prints the cost of one frame
+# and the share of one core it takes to keep up in real time. The cost is
+# fixed per frame, so the real-time load is just frames_per_s x us/frame:
+# halve the hop and it doubles.
+#
+# It first checks that a flat or all-zero input (open electrode, stuck
+# bus) still gives CCs inside 0..127.
+
+
+import time
+
+import numpy as np
+
+from plant_backends import SimulatedPlant
+from plant_spectral import SpectralFeatures
+
+
+SECONDS = 3600.0
+CONFIGS = (                  # (sample Hz, nfft, hop)
+    (40.0, 256, 40),
+    (40.0, 256, 10),
+    (40.0, 1024, 40),
+    (860.0, 4096, 860),
+    (860.0, 4096, 215),
+)
+BLOCK = 16                   # samples per process() call
+
+
+def check_flat():
+    rng = np.random.default_rng(0)
+    x = np.concatenate([rng.normal(1.6, 0.01, 2000), np.full(500, 1.7), np.zeros(500)])
+    t = np.arange(len(x), dtype=np.int64) * 25000000
+    sf = SpectralFeatures(40.0)
+    with np.errstate(all="raise"):
+        for i in range(0, len(x), BLOCK):
+            cc = sf.cc_values(sf.process(t[i:i + BLOCK], x[i:i + BLOCK]))
+            assert ((cc >= 0) & (cc <= 127)).all(), cc
+    print("flat / zero input: CCs stay in 0..127")
+
+
+def main():
+    check_flat()
+    for fs, nfft, hop in CONFIGS:
+        sim = SimulatedPlant(fs, speed=0, seed=1)
+        sim.start()
+        n = int(fs * SECONDS)
+        chunks = [sim.read_volts() for _ in range(n // 4096 + 1)]
+        ts = np.concatenate([c[0] for c in chunks])[:n]
+        vs = np.concatenate([c[1] for c in chunks])[:n]
+
+        sf = SpectralFeatures(fs, nfft=nfft, hop=hop)
+        t0 = time.perf_counter()
+        for i in range(0, n, BLOCK):
+            frame = sf.process(ts[i:i + BLOCK], vs[i:i + BLOCK])
+            sf.cc_values(frame)
+        wall = time.perf_counter() - t0
+
+        print(
+            f"{fs:g} Hz nfft={nfft} hop={hop}: {sf.frames} frames "
+            f"({sf.frames_per_s:.2f}/s), {wall / sf.frames * 1e6:7.1f} us/frame incl. "
+            f"block overhead, {sf.cpu_load() * 100:.4f}% of a core"
+        )
+
+
+if __name__ == "__main__":
+    main()
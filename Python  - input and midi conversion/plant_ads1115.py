@@ -0,0 +1,389 @@
+#
+# plant_ads1115.py
+#
+# ADS1115 continuous-conversion reader driven by the ALERT/RDY pin
+# INA333 + ADS1115 + Raspberry Pi
+#
+# The single-shot path (chan.voltage) starts a conversion, polls the
+# config register until it finishes and then reads the result, so a
+# Python loop tops out around 40 Hz. Here the chip free-runs in
+# continuous mode at up to 860 SPS and pulses ALERT/RDY at the end of
+# every conversion. lgpio delivers that edge with a kernel timestamp
+# and we read the conversion register once per edge — no busy polling.
+#
+# RawADS1115 is the lean polled path: int16 codes straight off
+# /dev/i2c-N, converted to volts once per block.
+#
+# Wiring: ADS1115 ALERT/RDY → GPIO17 (pin 11). The pin is open-drain,
+# the internal pull-up is enabled below.
+
+
+import fcntl
+import os
+import threading
+import time
+
+import numpy as np
+
+
+# =========================
+# USER-TUNABLE PARAMETERS
+# =========================
+
+ADS_ADDRESS = 0x48
+ADS_GAIN = 2
+DATA_RATE = 860              # 8, 16, 32, 64, 128, 250, 475, 860 SPS
+
+ALERT_GPIO = 17              # BCM number of the ALERT/RDY line
+ALERT_GPIOCHIP = 0           # Pi 5 with current kernels (older kernels: 4)
+
+BUFFER_SAMPLES = 8192        # ~9.5 s at 860 SPS between read() calls
+
+I2C_BUS = 1                  # /dev/i2c-1 (GPIO2/3)
+RAW_DATA_RATE = 128          # RawADS1115 free-run rate (adafruit single-shot default)
+
+
+# =========================
+# CONSTANTS
+# =========================
+
+# Full-scale range (volts) per PGA gain, from the ADS1115 datasheet
+PGA_RANGE = {
+    2 / 3: 6.144,
+    1: 4.096,
+    2: 2.048,
+    4: 1.024,
+    8: 0.512,
+    16: 0.256,
+}
+
+# PGA gains in config-field order (bits 11:9 = 0..5) and the matching
+# volts-per-code table, for converting whole blocks at once
+GAINS = (2 / 3, 1, 2, 4, 8, 16)
+LSB_TABLE = np.array([PGA_RANGE[g] / 32768.0 for g in GAINS])
+
+# Single-ended mux settings (AINx vs GND) as used by adafruit_ads1x15
+MUX_SINGLE = {0: 0x04, 1: 0x05, 2: 0x06, 3: 0x07}
+
+# Register pointers and config-register fields (datasheet section 9.6)
+REG_CONVERSION = 0x00
+REG_CONFIG = 0x01
+
+I2C_SLAVE = 0x0703           # linux/i2c-dev.h
+
+CONFIG_OS_SINGLE = 0x8000
+CONFIG_MODE_SINGLE = 0x0100
+CONFIG_COMP_DISABLE = 0x0003
+GAIN_CONFIG = {
+    2 / 3: 0x0000,
+    1: 0x0200,
+    2: 0x0400,
+    4: 0x0600,
+    8: 0x0800,
+    16: 0x0A00,
+}
+RATE_CONFIG = {
+    8: 0x0000,
+    16: 0x0020,
+    32: 0x0040,
+    64: 0x0060,
+    128: 0x0080,
+    250: 0x00A0,
+    475: 0x00C0,
+    860: 0x00E0,
+}
+
+
+# =========================
+# HELPERS
+# =========================
+
+def volts_per_code(gain):
+    return PGA_RANGE[gain] / 32768.0
+
+
+def codes_to_volts(codes, gain):
+    """Convert int16 conversion codes (scalar or array) to volts."""
+    return np.asarray(codes, dtype=np.float64) * volts_per_code(gain)
+
+
+def gain_index(gain):
+    return GAINS.index(gain)
+
+
+def codes_to_volts_indexed(codes, gain_idx):
+    """Block conversion when the gain may differ per sample (gain_idx array)."""
+    return np.asarray(codes, dtype=np.float64) * LSB_TABLE[gain_idx]
+
+
+def continuous_config(pin, gain, data_rate):
+    """Config word for free-running single-ended conversions on `pin`."""
+    return (
+        MUX_SINGLE[pin] << 12
+        | GAIN_CONFIG[gain]
+        | RATE_CONFIG[data_rate]
+        | CONFIG_COMP_DISABLE
+    )
+
+
+def single_shot_config(pin, gain, data_rate):
+    """Config word that starts one single-ended conversion on `pin`."""
+    return (
+        CONFIG_OS_SINGLE
+        | MUX_SINGLE[pin] << 12
+        | GAIN_CONFIG[gain]
+        | CONFIG_MODE_SINGLE
+        | RATE_CONFIG[data_rate]
+        | CONFIG_COMP_DISABLE
+    )
+
+
+# =========================
+# CONTINUOUS READER
+# =========================
+
+class ContinuousADS1115:
+    """Free-running ADS1115 read on every ALERT/RDY edge.
+
+    Samples are stored as (kernel timestamp ns, int16 code) pairs in a
+    preallocated buffer and handed out by read(). lgpio makes no promise
+    about the timestamp origin (epoch vs boot), so only compare
+    timestamps from the same reader.
+    """
+
+    def __init__(self, i2c, pin=0, gain=ADS_GAIN, data_rate=DATA_RATE,
+                 address=ADS_ADDRESS, alert_gpio=ALERT_GPIO,
+                 gpiochip=ALERT_GPIOCHIP, capacity=BUFFER_SAMPLES):
+        import adafruit_ads1x15.ads1115 as ADS
+        from adafruit_ads1x15 import ads1x15
+
+        self.gain = gain
+        self.data_rate = data_rate
+        self.period_ns = int(1e9 / data_rate)
+        self.alert_gpio = alert_gpio
+        self.gpiochip = gpiochip
+
+        # Conversion-ready mode: Hi_thresh MSB = 1, Lo_thresh MSB = 0 and
+        # a non-disabled comparator queue turn ALERT/RDY into a ~8 us
+        # active-low pulse at the end of each conversion.
+        self.ads = ADS.ADS1115(
+            i2c,
+            gain=gain,
+            data_rate=data_rate,
+            mode=ads1x15.Mode.CONTINUOUS,
+            comparator_queue_length=1,
+            comparator_low_threshold=0,
+            comparator_high_threshold=-32768,
+            address=address,
+        )
+        self._mux = MUX_SINGLE[pin]
+
+        self._t = np.zeros(capacity, dtype=np.int64)
+        self._code = np.zeros(capacity, dtype=np.int16)
+        self._capacity = capacity
+        self._head = 0               # total samples written
+        self._tail = 0               # total samples handed out
+        self._last_t = 0
+        self._cond = threading.Condition()
+
+        self.samples = 0
+        self.missed = 0              # conversions lost between edges
+        self.overruns = 0            # samples overwritten before read()
+
+        self._chip = None
+        self._cb = None
+
+    # ---- lifecycle ----
+
+    def start(self):
+        import lgpio
+
+        # Selecting the mux leaves the register pointer on the conversion
+        # register, so every later read can skip the pointer write.
+        self.ads.read(self._mux)
+
+        self._chip = lgpio.gpiochip_open(self.gpiochip)
+        lgpio.gpio_claim_alert(
+            self._chip, self.alert_gpio, lgpio.FALLING_EDGE, lgpio.SET_PULL_UP
+        )
+        self._cb = lgpio.callback(
+            self._chip, self.alert_gpio, lgpio.FALLING_EDGE, self._on_ready
+        )
+
+    def stop(self):
+        import lgpio
+
+        if self._cb is not None:
+            self._cb.cancel()
+            self._cb = None
+        if self._chip is not None:
+            lgpio.gpio_free(self._chip, self.alert_gpio)
+            lgpio.gpiochip_close(self._chip)
+            self._chip = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---- edge callback (lgpio thread) ----
+
+    def _on_ready(self, chip, gpio, level, timestamp):
+        if level != 0:
+            return
+        raw = self.ads.get_last_result(True)
+        code = raw - 0x10000 if raw & 0x8000 else raw
+
+        if self._last_t:
+            gap = timestamp - self._last_t
+            if gap > self.period_ns * 3 // 2:
+                self.missed += int(round(gap / self.period_ns)) - 1
+        self._last_t = timestamp
+
+        with self._cond:
+            i = self._head % self._capacity
+            self._t[i] = timestamp
+            self._code[i] = code
+            self._head += 1
+            if self._head - self._tail > self._capacity:
+                self.overruns += self._head - self._tail - self._capacity
+                self._tail = self._head - self._capacity
+            self.samples += 1
+            self._cond.notify()
+
+    # ---- consumer side ----
+
+    def read(self, timeout=None):
+        """Return (t_ns, codes) for every sample since the last call.
+
+        Blocks up to `timeout` seconds when nothing is pending; returns
+        empty arrays if the timeout expires.
+        """
+        with self._cond:
+            if self._head == self._tail:
+                self._cond.wait(timeout)
+            idx = np.arange(self._tail, self._head) % self._capacity
+            self._tail = self._head
+            return self._t[idx], self._code[idx]
+
+    def read_volts(self, timeout=None):
+        t, codes = self.read(timeout)
+        return t, codes_to_volts(codes, self.gain)
+
+    def rate_hz(self, t_ns):
+        """Effective sample rate over a block of timestamps."""
+        if len(t_ns) < 2:
+            return 0.0
+        return (len(t_ns) - 1) * 1e9 / float(t_ns[-1] - t_ns[0])
+
+
+# =========================
+# RAW-CODE READER
+# =========================
+
+class RawADS1115:
+    """Direct /dev/i2c reads of the conversion register, no adafruit layers.
+
+    The chip free-runs in continuous mode and the register pointer is
+    parked on the conversion register, so each sample is a single 2-byte
+    read() syscall returning an int16 code. Convert to volts per block
+    with codes_to_volts() rather than per sample.
+
+    Don't share the chip with an adafruit ADS1115 object: any register
+    access from elsewhere moves the pointer.
+    """
+
+    def __init__(self, bus=I2C_BUS, address=ADS_ADDRESS, pin=0,
+                 gain=ADS_GAIN, data_rate=RAW_DATA_RATE):
+        self.address = address
+        self.fd = os.open(f"/dev/i2c-{bus}", os.O_RDWR)
+        fcntl.ioctl(self.fd, I2C_SLAVE, address)
+        self.configure(pin, gain, data_rate)
+
+    def configure(self, pin=0, gain=ADS_GAIN, data_rate=RAW_DATA_RATE):
+        cfg = continuous_config(pin, gain, data_rate)
+        os.write(self.fd, bytes([REG_CONFIG, (cfg >> 8) & 0xFF, cfg & 0xFF]))
+        os.write(self.fd, bytes([REG_CONVERSION]))
+        self.pin = pin
+        self.gain = gain
+        self.gain_idx = gain_index(gain)
+        self.data_rate = data_rate
+        self._pending_gain = None
+
+    def set_gain(self, gain):
+        """Request a PGA change; the reading thread applies it before its next read."""
+        self._pending_gain = gain
+
+    def _apply_pending_gain(self):
+        gain, self._pending_gain = self._pending_gain, None
+        self.configure(self.pin, gain, self.data_rate)
+        # The conversion in flight still uses the old gain: let it finish
+        # so no sample is labelled with a gain it wasn't taken at.
+        time.sleep(2.0 / self.data_rate)
+
+    def read_code(self):
+        if self._pending_gain is not None:
+            self._apply_pending_gain()
+        return int.from_bytes(os.read(self.fd, 2), "big", signed=True)
+
+    def read_tagged(self):
+        """(code, gain index) for a tagged RingBuffer."""
+        code = self.read_code()
+        return code, self.gain_idx
+
+    def read_codes(self, out):
+        """Fill `out` (int16 array/array('h')) with back-to-back reads."""
+        fd = self.fd
+        for i in range(len(out)):
+            out[i] = int.from_bytes(os.read(fd, 2), "big", signed=True)
+        return out
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# =========================
+# MAIN (bench check)
+# =========================
+
+def main():
+    import time
+    import board
+    import busio
+
+    # 860 SPS leaves 1.16 ms per read: run the bus in fast mode
+    # (dtparam=i2c_arm_baudrate=400000 in /boot/firmware/config.txt)
+    i2c = busio.I2C(board.SCL, board.SDA)
+    reader = ContinuousADS1115(i2c)
+
+    print(f"🌱 ADS1115 continuous @ {DATA_RATE} SPS, ALERT/RDY on GPIO{ALERT_GPIO}")
+    print("Press Ctrl+C to stop")
+
+    with reader:
+        while True:
+            time.sleep(1.0)
+            t, v = reader.read_volts(timeout=0.5)
+            if len(t) == 0:
+                print("⚠ No ALERT/RDY edges - check wiring")
+                continue
+            print(
+                f"n={len(t)} rate={reader.rate_hz(t):.1f}Hz "
+                f"v={v.mean():.4f}V missed={reader.missed} overruns={reader.overruns}"
+            )
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nStopped 🌿")
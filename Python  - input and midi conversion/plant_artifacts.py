@@ -0,0 +1,151 @@
+#
+# plant_artifacts.py
+#
+# Electrode artifact / contact-fault detector for the acquisition stream
+#
+# Touching the plant or a slipping clip throws a step or a steep ramp
+# into the signal; the derivative spikes, the drift accumulator fills and
+# the noise floor takes minutes to come back down, and only the event
+# spacing stands between that and a burst of notes. ArtifactDetector looks
+# at the stream before any of that and flags, per sample:
+#
+#   saturated   reading at (or beyond) the ADC rails
+#   flatline    readings that stop changing for ARTIFACT_FLATLINE_S (open
+#               electrode, stuck bus) - |dv| <= ARTIFACT_FLATLINE_V
+#   step        a single-sample jump larger than ARTIFACT_STEP_V
+#   slew        change over ARTIFACT_SLEW_WINDOW_S faster than
+#               ARTIFACT_SLEW_V_PER_S - no plant moves that quickly
+#
+# Any flag makes the sample `bad`, and `bad` is held for ARTIFACT_HOLD_S
+# after the last flagged sample so the tail of a disturbance is covered
+# too. Each bad episode is counted and reported once as it starts and
+# ends, so the musical side can mute notes for its duration or leave the
+# samples out and re-anchor its EMAs when it ends.
+#
+# Defaults sit well clear of plant_backends.SimulatedPlant (largest
+# 1-sample step ~0.012 V, slew ~0.25 V/s at 40 Hz); tune per electrode.
+
+
+from collections import namedtuple
+
+import numpy as np
+
+
+# =========================
+# USER-TUNABLE PARAMETERS
+# =========================
+
+ARTIFACT_STEP_V = 0.10       # volts in one sample
+ARTIFACT_SLEW_V_PER_S = 1.0  # sustained rate of change...
+ARTIFACT_SLEW_WINDOW_S = 0.25  # ...measured over this span
+ARTIFACT_FLATLINE_S = 3.0    # this long without change is a dead input
+ARTIFACT_FLATLINE_V = 0.0    # sample-to-sample change that still counts as "no change"
+ARTIFACT_HOLD_S = 2.0        # keep `bad` this long after the last flagged sample
+ARTIFACT_RAIL_MARGIN = 0.995 # fraction of full scale that counts as the rail
+
+KINDS = ("saturated", "flatline", "step", "slew")
+
+
+# Per-sample flags for one block; `events` is [(t_ns, what)], what being
+# "start:<kinds>" or "end"
+ArtifactFrame = namedtuple("ArtifactFrame", "bad saturated flatline step slew events")
+
+
+# =========================
+# DETECTOR
+# =========================
+
+class ArtifactDetector:
+    """Flags saturation, flatline, steps and excessive slew, sample by sample.
+
+    `rails` is (lo, hi) in volts, or None where there are no meaningful
+    rails (simulated, frequency input); a backend that knows better (raw
+    codes at +-32767) can pass its own `saturated` mask to process().
+    """
+
+    def __init__(self, fs, rails=None, step_v=ARTIFACT_STEP_V, slew_v_per_s=ARTIFACT_SLEW_V_PER_S,
+                 slew_window_s=ARTIFACT_SLEW_WINDOW_S, flatline_s=ARTIFACT_FLATLINE_S,
+                 flatline_v=ARTIFACT_FLATLINE_V, hold_s=ARTIFACT_HOLD_S):
+        self.fs = float(fs)
+        self.rails = rails
+        self.step_v = step_v
+        self.flatline_v = flatline_v
+        self.slew_k = max(1, int(round(slew_window_s * fs)))
+        self.slew_v = slew_v_per_s * self.slew_k / self.fs   # allowed change over slew_k samples
+        self.flat_n = max(2, int(round(flatline_s * fs)))
+        self.hold_n = max(1, int(round(hold_s * fs)))
+
+        self._tail = None            # last slew_k inputs
+        self._flat_run = 0           # unchanged samples so far, carried across blocks
+        self._since_flag = self.hold_n   # samples since the last flagged one
+        self._bad = False
+        self.counts = dict.fromkeys(KINDS, 0)   # flagged samples per kind
+        self.episodes = 0
+        self.bad_samples = 0
+
+    def process(self, t_ns, v, saturated=None, steps=None):
+        """Flag one block; `steps` are known non-signal jumps (PGA switches) to ignore."""
+        v = np.asarray(v, dtype=np.float64)
+        n = len(v)
+        if n == 0:
+            nob = np.zeros(0, dtype=bool)
+            return ArtifactFrame(nob, nob, nob, nob, nob, [])
+        if self._tail is None:
+            self._tail = np.full(self.slew_k, v[0])
+
+        if saturated is None:
+            if self.rails is not None:
+                lo, hi = self.rails
+                saturated = (v <= lo) | (v >= hi)
+            else:
+                saturated = np.zeros(n, dtype=bool)
+        else:
+            saturated = np.asarray(saturated, dtype=bool)
+
+        ext = np.concatenate((self._tail, v))
+        dv = np.abs(np.diff(ext[self.slew_k - 1:]))
+        span = np.abs(ext[self.slew_k:] - ext[:n])
+        if steps is not None and len(steps):
+            # a range switch isn't the electrode; nor is the span across it
+            dv[np.asarray(steps, dtype=np.intp)] = 0.0
+            ok = np.ones(n, dtype=bool)
+            for s in steps:
+                ok[s:s + self.slew_k] = False
+            span = np.where(ok, span, 0.0)
+        step = dv > self.step_v
+        slew = span > self.slew_v
+
+        # flatline: length of the current run of unchanged samples
+        idx = np.arange(1, n + 1)
+        changed = dv > self.flatline_v
+        last_change = np.maximum.accumulate(np.where(changed, idx, 0))
+        run = np.where(last_change > 0, idx - last_change, idx + self._flat_run)
+        flatline = run >= self.flat_n
+        self._flat_run = int(run[-1])
+
+        flagged = saturated | flatline | step | slew
+        last_flag = np.maximum.accumulate(np.where(flagged, idx, 0))
+        since = np.where(last_flag > 0, idx - last_flag, idx + self._since_flag)
+        bad = since < self.hold_n
+        self._since_flag = int(since[-1])
+
+        # bookkeeping: per-kind sample counts, episode starts/ends
+        for kind, mask in zip(KINDS, (saturated, flatline, step, slew)):
+            self.counts[kind] += int(np.count_nonzero(mask))
+        self.bad_samples += int(np.count_nonzero(bad))
+        edges = np.flatnonzero(np.diff(bad, prepend=self._bad))
+        events = []
+        for i in edges.tolist():
+            if bad[i]:
+                self.episodes += 1
+                kinds = [k for k, m in zip(KINDS, (saturated, flatline, step, slew)) if m[i]]
+                events.append((int(t_ns[i]), "start:" + "+".join(kinds)))
+            else:
+                events.append((int(t_ns[i]), "end"))
+        self._bad = bool(bad[-1])
+        self._tail = ext[n:]
+        return ArtifactFrame(bad, saturated, flatline, step, slew, events)
+
+    def summary(self):
+        parts = " ".join(f"{k}={self.counts[k]}" for k in KINDS)
+        return f"{self.episodes} artifact episodes, {self.bad_samples} samples held bad ({parts})"
@@ -0,0 +1,105 @@
+#
+# plant_autogain.py
+#
+# Auto-ranging ADS1115 PGA gain with hysteresis
+#
+# Replaces "ADS_GAIN = 2  # Increase to 4 if signal is very small" and the
+# per-plant, per-day hand retuning. Watches the raw int16 codes coming
+# out of the ring and steps the gain:
+#
+#   down  as soon as the peak gets near full scale (clipping is urgent)
+#   up    only after the peak has stayed small for AUTOGAIN_HOLD_S, and
+#         only if the same peak would still sit well below the down
+#         threshold at the new gain - so it can't bounce straight back.
+#
+# Gain changes go through RawADS1115.set_gain() and every sample in a
+# tagged ring carries the gain index it was taken at, so conversion to
+# volts is exact on both sides of a switch.
+
+
+from plant_ads1115 import GAINS, gain_index
+
+
+# =========================
+# USER-TUNABLE PARAMETERS
+# =========================
+
+AUTOGAIN_HIGH = 0.85         # step down when |code| peak > this fraction of full scale
+AUTOGAIN_LOW = 0.30          # consider stepping up when peak stays < this
+AUTOGAIN_UP_MARGIN = 0.75    # ...and the peak at the new gain would be < HIGH * this
+AUTOGAIN_HOLD_S = 20.0       # how long the signal must stay small before gaining up
+AUTOGAIN_COOLDOWN_S = 5.0    # no stepping up for this long after any switch
+AUTOGAIN_MIN = 2 / 3
+AUTOGAIN_MAX = 16
+
+
+# =========================
+# CONTROLLER
+# =========================
+
+class AutoGain:
+    """Hysteretic PGA range controller fed with blocks of codes."""
+
+    def __init__(self, gain, sample_hz, high=AUTOGAIN_HIGH, low=AUTOGAIN_LOW,
+                 up_margin=AUTOGAIN_UP_MARGIN, hold_s=AUTOGAIN_HOLD_S,
+                 cooldown_s=AUTOGAIN_COOLDOWN_S, min_gain=AUTOGAIN_MIN, max_gain=AUTOGAIN_MAX):
+        self.gains = [g for g in GAINS if min_gain <= g <= max_gain]
+        self.idx = self.gains.index(gain)
+        self.high = high
+        self.low = low
+        self.up_margin = up_margin
+        self.hold_n = int(hold_s * sample_hz)
+        self.cooldown_n = int(cooldown_s * sample_hz)
+
+        self._quiet_n = 0            # samples in the current "small signal" stretch
+        self._quiet_peak = 0.0
+        self._cooldown = 0
+        self.switches = 0
+
+    @property
+    def gain(self):
+        return self.gains[self.idx]
+
+    def update(self, codes, tags=None):
+        """Feed one block; returns the new gain if a switch is wanted, else None.
+
+        With `tags` (gain index per sample, as in a tagged RingBuffer)
+        only samples taken at the current gain are looked at, so the tail
+        of the previous range can't trigger another switch.
+        """
+        if tags is not None:
+            codes = codes[tags == gain_index(self.gain)]
+        n = len(codes)
+        if n == 0:
+            return None
+        peak = max(int(codes.max()), -int(codes.min())) / 32768.0
+
+        # Clipping wins over everything, including the cooldown: with tags
+        # the next block already shows whether one step down was enough
+        if peak > self.high and self.idx > 0:
+            return self._switch(self.idx - 1)
+
+        if self._cooldown > 0:
+            self._cooldown -= n
+            return None
+
+        if peak < self.low:
+            self._quiet_n += n
+            self._quiet_peak = max(self._quiet_peak, peak)
+        else:
+            self._quiet_n = 0
+            self._quiet_peak = 0.0
+
+        if self._quiet_n >= self.hold_n and self.idx < len(self.gains) - 1:
+            ratio = self.gains[self.idx + 1] / self.gains[self.idx]
+            if self._quiet_peak * ratio < self.high * self.up_margin:
+                return self._switch(self.idx + 1)
+        return None
+
+    def _switch(self, idx):
+        self.idx = idx
+        self._quiet_n = 0
+        self._quiet_peak = 0.0
+        self._cooldown = self.cooldown_n
+        self.switches += 1
+        return self.gains[idx]
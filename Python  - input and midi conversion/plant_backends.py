@@ -0,0 +1,292 @@
+#
+# plant_backends.py
+#
+# Hardware-free signal sources: synthetic plant + recorded-session replay
+#
+# A sensor backend is anything with
+#
+#   start() / stop()
+#   read_volts(timeout) -> (t_ns int64 array, volts float64 array)
+#   sample_hz
+#
+# ContinuousADS1115 (plant_ads1115.py) is the hardware one. SimulatedPlant
+# and ReplaySource below are the other two, so the detector can run on a
+# dev box or in CI with no I2C, no GPIO and no Blinka.
+#
+# Both take a `speed`: 1.0 paces samples in real time (they then go
+# through AcquisitionThread like the ADS1115), 0 hands out blocks as fast
+# as the CPU can take them - a day of recorded signal in seconds. Sample
+# timestamps are always signal time, so everything downstream that runs
+# on t_ns (refractory, event spacing, CC rate) behaves the same at any
+# speed.
+#
+# SessionRecorder writes the files ReplaySource reads.
+
+
+import time
+
+import numpy as np
+
+
+# =========================
+# USER-TUNABLE PARAMETERS
+# =========================
+
+SIM_LEVEL_V = 1.65           # resting level (INA333 reference at mid-supply)
+SIM_DRIFT_V = 0.03           # size of the slow wander around the level
+SIM_DRIFT_TAU_S = 600.0      # how slowly it wanders
+SIM_BURSTS_PER_MIN = 2.0     # action-potential-like events, Poisson arrivals
+SIM_BURST_V = 0.015          # mean burst height (exponentially distributed, either sign)
+SIM_BURST_RISE_S = 0.3
+SIM_BURST_DECAY_S = 3.0
+SIM_NOISE_V = 0.0005         # white ADC/amplifier noise (rms)
+SIM_HUM_V = 0.002            # mains pickup amplitude (aliases at low sample rates, as it would)
+SIM_MAINS_HZ = 50.0
+SIM_SEED = None              # int for a repeatable signal
+
+FAST_BLOCK = 4096            # samples per read_volts() when speed = 0
+
+# Session file: little-endian (int64 t_ns, float64 volts) records, appendable
+RECORD_DTYPE = np.dtype([("t_ns", "<i8"), ("v", "<f8")])
+
+
+# =========================
+# PACING
+# =========================
+
+class _Pacer:
+    """Shared speed handling: how many samples are due at this moment."""
+
+    def __init__(self, speed, sample_hz):
+        self.speed = float(speed)
+        self.sample_hz = float(sample_hz)
+        self.realtime = self.speed > 0
+        self._t0 = None
+
+    def start(self):
+        self._t0 = time.monotonic_ns()
+
+    def due(self, sent, signal_ns_of, timeout):
+        """Number of samples (beyond `sent`) due now, sleeping up to `timeout` for one."""
+        if not self.realtime:
+            return None
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            elapsed = (time.monotonic_ns() - self._t0) * self.speed
+            n = 0
+            while signal_ns_of(sent + n) <= elapsed:
+                n += 1
+                if n >= FAST_BLOCK:
+                    break
+            if n:
+                return n
+            wait = (signal_ns_of(sent) - elapsed) / self.speed / 1e9
+            if deadline is not None:
+                wait = min(wait, deadline - time.monotonic())
+                if wait <= 0:
+                    return 0
+            time.sleep(wait)
+
+
+# =========================
+# SYNTHETIC PLANT
+# =========================
+
+class SimulatedPlant:
+    """Synthetic plant electrode signal.
+
+    level + slow wander (Ornstein-Uhlenbeck) + bursts (double-exponential
+    pulses at Poisson times) + white noise + mains hum. Generated a block
+    at a time with all state carried over, so the signal doesn't depend
+    on how it is chunked.
+    """
+
+    def __init__(self, sample_hz, speed=1.0, level_v=SIM_LEVEL_V, drift_v=SIM_DRIFT_V,
+                 drift_tau_s=SIM_DRIFT_TAU_S, bursts_per_min=SIM_BURSTS_PER_MIN,
+                 burst_v=SIM_BURST_V, burst_rise_s=SIM_BURST_RISE_S,
+                 burst_decay_s=SIM_BURST_DECAY_S, noise_v=SIM_NOISE_V, hum_v=SIM_HUM_V,
+                 mains_hz=SIM_MAINS_HZ, seed=SIM_SEED):
+        self.sample_hz = float(sample_hz)
+        self.level_v = level_v
+        self.drift_v = drift_v
+        self.drift_a = np.exp(-1.0 / (drift_tau_s * self.sample_hz))
+        self.burst_p = bursts_per_min / 60.0 / self.sample_hz
+        self.burst_v = burst_v
+        self.rise_n = burst_rise_s * self.sample_hz
+        self.decay_n = burst_decay_s * self.sample_hz
+        self.noise_v = noise_v
+        self.hum_v = hum_v
+        self.hum_w = 2.0 * np.pi * mains_hz / self.sample_hz
+        self.rng = np.random.default_rng(seed)
+        self.pacer = _Pacer(speed, sample_hz)
+        self.realtime = self.pacer.realtime
+
+        self.sent = 0                # samples generated so far
+        self._drift = 0.0
+        self._bursts = []            # [(start sample, signed height)] still ringing
+        self._t0_ns = 0
+
+    @property
+    def first_volts(self):
+        return self.level_v
+
+    def start(self):
+        self._t0_ns = time.monotonic_ns()
+        self.pacer.start()
+
+    def stop(self):
+        pass
+
+    def _signal_ns(self, i):
+        return int(i * 1e9 / self.sample_hz)
+
+    def _drift_block(self, n):
+        # OU drift: x[k] = a x[k-1] + s w[k], solved in chunks short enough
+        # for a^-k to stay well conditioned
+        a = self.drift_a
+        s = self.drift_v * np.sqrt(1.0 - a * a)
+        out = np.empty(n)
+        chunk = max(1, int(1.0 / (1.0 - a)))
+        for i in range(0, n, chunk):
+            w = s * self.rng.standard_normal(min(chunk, n - i))
+            k = np.arange(1, len(w) + 1)
+            out[i:i + len(w)] = a ** k * (self._drift + np.cumsum(w * a ** -k))
+            self._drift = out[i + len(w) - 1]
+        return out
+
+    def _burst_block(self, start, n):
+        starts = start + np.flatnonzero(self.rng.random(n) < self.burst_p)
+        for s in starts.tolist():
+            height = self.burst_v * self.rng.exponential() * self.rng.choice((-1.0, 1.0))
+            self._bursts.append((s, height))
+        idx = np.arange(start, start + n)
+        out = np.zeros(n)
+        norm = 1.0 - self.rise_n / self.decay_n
+        for s, height in self._bursts:
+            age = idx - s
+            live = age >= 0
+            a = age[live]
+            out[live] += height * (np.exp(-a / self.decay_n) - np.exp(-a / self.rise_n)) / norm
+        # bursts that have decayed below 0.1% are done
+        end = start + n
+        self._bursts = [(s, h) for s, h in self._bursts if end - s < 7 * self.decay_n]
+        return out
+
+    def read_volts(self, timeout=None):
+        n = self.pacer.due(self.sent, self._signal_ns, timeout)
+        if n is None:
+            n = FAST_BLOCK
+        if n == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        start = self.sent
+        idx = np.arange(start, start + n)
+        v = self.level_v + self._drift_block(n) + self._burst_block(start, n)
+        v += self.noise_v * self.rng.standard_normal(n)
+        v += self.hum_v * np.sin(self.hum_w * idx)
+        self.sent += n
+        t_ns = self._t0_ns + (idx * (1e9 / self.sample_hz)).astype(np.int64)
+        return t_ns, v
+
+
+# =========================
+# RECORDED SESSIONS
+# =========================
+
+def load_session(path):
+    """(t_ns, volts) from a SessionRecorder file, or a .csv of t_s,volts rows."""
+    if str(path).endswith(".csv"):
+        data = np.loadtxt(path, delimiter=",", ndmin=2, comments="#")
+        return (data[:, 0] * 1e9).astype(np.int64), data[:, 1].copy()
+    rec = np.memmap(path, dtype=RECORD_DTYPE, mode="r")
+    return rec["t_ns"], rec["v"]
+
+
+class SessionRecorder:
+    """Append (t_ns, volts) blocks to a session file as they go by."""
+
+    def __init__(self, path):
+        self.path = path
+        self._f = open(path, "ab")
+        self.samples = 0
+
+    def write(self, t_ns, volts):
+        rec = np.empty(len(t_ns), dtype=RECORD_DTYPE)
+        rec["t_ns"] = t_ns
+        rec["v"] = volts
+        rec.tofile(self._f)
+        self._f.flush()
+        self.samples += len(rec)
+
+    def close(self):
+        self._f.close()
+
+
+class ReplaySource:
+    """Play a recorded session back through the detector.
+
+    speed=1.0 releases each sample when its original time comes round
+    (2.0 twice as fast, ...); speed=0 as fast as read_volts() is called.
+    `finished` goes True once the last sample has been handed out.
+    """
+
+    def __init__(self, path, speed=1.0):
+        self.path = path
+        self.t, self.v = load_session(path)
+        if len(self.t) < 2:
+            raise ValueError(f"{path}: need at least two samples to replay")
+        self.sample_hz = 1e9 / float(np.median(np.diff(self.t[:10000])))
+        self.pacer = _Pacer(speed, self.sample_hz)
+        self.realtime = self.pacer.realtime
+        self.sent = 0
+        self.finished = False
+
+    @property
+    def first_volts(self):
+        return float(self.v[0])
+
+    @property
+    def duration_s(self):
+        return (int(self.t[-1]) - int(self.t[0])) / 1e9
+
+    def start(self):
+        self.pacer.start()
+
+    def stop(self):
+        pass
+
+    def _signal_ns(self, i):
+        if i >= len(self.t):
+            return float("inf")
+        return int(self.t[i]) - int(self.t[0])
+
+    def read_volts(self, timeout=None):
+        if self.finished:
+            if timeout:
+                time.sleep(timeout)
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        n = self.pacer.due(self.sent, self._signal_ns, timeout)
+        if n is None:
+            n = FAST_BLOCK
+        start = self.sent
+        stop = min(start + n, len(self.t))
+        self.sent = stop
+        if stop == len(self.t):
+            self.finished = True
+        return np.array(self.t[start:stop]), np.array(self.v[start:stop])
+
+
+class DirectReader:
+    """RingReader stand-in that pulls straight from a source.
+
+    For speed=0 runs: there is no acquisition thread and no ring to
+    overrun, the detector loop simply asks the source for the next block.
+    """
+
+    overruns = 0
+    pending = 0
+
+    def __init__(self, read_block):
+        self.read_block = read_block
+
+    def read(self, max_n=None, timeout=None):
+        return self.read_block(timeout)
@@ -0,0 +1,139 @@
+#
+# plant_baseline.py
+#
+# Streaming percentile baseline for removing slow electrode drift
+#
+# Electrode polarization walks the plant level across the whole 0-3.3 V
+# range over hours, and pitch follows the level, so a drifting plant ends
+# up playing at one end of the keyboard. Subtracting a running median
+# (or other percentile) over a long window - half an hour, say - keeps
+# the minutes-scale behaviour and takes out the drift, and unlike a mean
+# it isn't dragged around by bursts.
+#
+# Re-sorting a 30-minute window every update is what this avoids:
+#
+#   OrderStatWindow   sliding window over quantized levels, counted in a
+#                     Fenwick tree: insert, remove and "k-th smallest" are
+#                     all O(log bins), independent of the window length
+#   Baseline          samples the signal every `every` samples into an
+#                     OrderStatWindow and holds its percentile in between
+#                     (a half-hour baseline doesn't need a new value at
+#                     40 Hz); process() gives one baseline per sample
+
+
+import numpy as np
+
+
+# =========================
+# USER-TUNABLE PARAMETERS
+# =========================
+
+BASELINE_WINDOW_S = 1800.0   # how much history the baseline is taken over
+BASELINE_PERCENTILE = 50.0   # 50 = running median
+BASELINE_EVERY_S = 1.0       # seconds between samples going into the window
+BASELINE_RANGE = (-6.144, 6.144)  # volts covered (ADS1115 widest full scale); outside is clipped
+BASELINE_RESOLUTION = 0.0001 # volts per bin (~ one LSB at gain 2)
+
+
+# =========================
+# ORDER STATISTICS
+# =========================
+
+class OrderStatWindow:
+    """The last `window` values, with their k-th smallest in O(log bins).
+
+    Values are quantized to `resolution` over `value_range` and counted
+    per bin in a Fenwick (binary indexed) tree, so memory is fixed by the
+    range and resolution, not by how long the window is.
+    """
+
+    def __init__(self, window, value_range=BASELINE_RANGE, resolution=BASELINE_RESOLUTION):
+        self.window = int(window)
+        self.lo, hi = value_range
+        self.resolution = resolution
+        self.bins = int(round((hi - self.lo) / resolution)) + 1
+        self._tree = [0] * (self.bins + 1)
+        self._top = 1 << (self.bins.bit_length() - 1)
+        self._ring = [0] * self.window
+        self._i = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _bin(self, x):
+        b = int(round((x - self.lo) / self.resolution))
+        return 0 if b < 0 else (self.bins - 1 if b >= self.bins else b)
+
+    def _add(self, b, delta):
+        tree = self._tree
+        n = self.bins
+        i = b + 1
+        while i <= n:
+            tree[i] += delta
+            i += i & -i
+
+    def push(self, x):
+        b = self._bin(x)
+        if self.count == self.window:
+            self._add(self._ring[self._i], -1)
+        else:
+            self.count += 1
+        self._ring[self._i] = b
+        self._add(b, 1)
+        self._i += 1
+        if self._i == self.window:
+            self._i = 0
+
+    def kth(self, k):
+        """k-th smallest value held (0-based), at bin resolution."""
+        # Fenwick descent: largest prefix with at most k counts
+        tree = self._tree
+        n = self.bins
+        pos = 0
+        step = self._top
+        while step:
+            nxt = pos + step
+            if nxt <= n and tree[nxt] <= k:
+                pos = nxt
+                k -= tree[nxt]
+            step >>= 1
+        return self.lo + pos * self.resolution
+
+    def percentile(self, q):
+        if self.count == 0:
+            raise ValueError("empty window")
+        return self.kth(int(round(q / 100.0 * (self.count - 1))))
+
+
+class Baseline:
+    """Running percentile of a signal over a long window, one value per sample."""
+
+    def __init__(self, fs, window_s=BASELINE_WINDOW_S, percentile=BASELINE_PERCENTILE,
+                 every_s=BASELINE_EVERY_S, value_range=BASELINE_RANGE,
+                 resolution=BASELINE_RESOLUTION):
+        self.every = max(1, int(round(every_s * fs)))
+        self.percentile = percentile
+        self._window = OrderStatWindow(
+            max(1, int(round(window_s * fs / self.every))), value_range, resolution
+        )
+        self._next = 0               # samples until the next one goes in
+        self.value = None
+
+    def process(self, x):
+        """Baseline for each sample of the block (held between updates)."""
+        x = np.asarray(x, dtype=np.float64)
+        n = len(x)
+        out = np.empty(n)
+        prev = 0
+        pos = self._next
+        while pos < n:
+            if self.value is not None:
+                out[prev:pos] = self.value
+            self._window.push(float(x[pos]))
+            self.value = self._window.percentile(self.percentile)
+            prev = pos
+            pos += self.every
+        out[prev:] = self.value
+        self._next = pos - n
+        return out
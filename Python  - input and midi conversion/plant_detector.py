@@ -0,0 +1,473 @@
+#
+# plant_detector.py
+#
+# Block-vectorized change detector (the v3 EMA / derivative / noise-floor chain)
+#
+# plant_midi_raw_active_3.py ran this chain in Python floats, one sample
+# at a time:
+#
+#   ema_v  = (1 - SMOOTH_ALPHA) * ema_v + SMOOTH_ALPHA * v
+#   raw_d  = (ema_v - prev_ema_v) / dt
+#   ema_d  = (1 - DERIV_ALPHA) * ema_d + DERIV_ALPHA * raw_d
+#   noise  = max((1 - NOISE_ALPHA) * noise + NOISE_ALPHA * |ema_d|, MIN_NOISE)
+#   drift_accum += |ema_d| * dt, reset past DRIFT_ACCUM_THRESHOLD -> forced event
+#   sign change of raw_d, |ema_d| against THRESHOLD_K * noise * THRESH_MULTIPLIER
+#
+# ChangeDetector computes the same thing for a whole NumPy block:
+#
+#   - the two EMAs are one-pole filters run through plant_dsp.SOSFilter
+#     with the state carried from block to block (lfilter with zi)
+#   - the clamped noise floor is the unclamped one-pole response minus a
+#     decayed running minimum (max(p*y + u, L) has a closed form for p > 0)
+#   - the drift accumulator (a sum that resets) stays a tight float loop,
+#     adding in the scalar loop's order, so its events are identical
+#     given the same |ema_d|
+#
+# The filtered values agree with the scalar loop to ~1e-15 relative
+# (bench_detector.py checks it); feeding one block or many gives the same
+# output. Only the sparse part - CC timing, event spacing, probability
+# gating - is left to a Python loop over the candidate samples.
+
+
+import bisect
+import math
+from collections import namedtuple
+
+import numpy as np
+
+from plant_dsp import SOS_BLOCK, SOSFilter
+
+
+# =========================
+# USER-TUNABLE PARAMETERS
+# =========================
+
+# Defaults are the plant_midi_raw_active_3.py values
+SMOOTH_ALPHA = 0.18
+DERIV_ALPHA = 0.30
+NOISE_ALPHA = 0.02
+THRESHOLD_K = 0.5
+MIN_NOISE = 0.0005
+DRIFT_ACCUM_THRESHOLD = 0.002
+THRESH_MULTIPLIER = 1.8
+INITIAL_NOISE = 0.01
+
+# ZScoreDetector
+ZSCORE_MODE = "ew"           # "ew" (exponentially weighted) or "box" (exactly the last window)
+ZSCORE_WINDOW_S = 30.0       # how much recent signal counts as "normal"
+ZSCORE_K = 3.0               # |z| above this is a strong change
+ZSCORE_MIN_STD = 0.0002      # volts; a dead-flat signal doesn't make every wiggle infinite
+
+# EMABank
+EMA_BANK_S = (1.0, 60.0, 3600.0)   # time constants: twitches, minute swells, hour trends
+
+
+# Per-sample detector output for one block (all arrays, same length as the input)
+DetectorFrame = namedtuple(
+    "DetectorFrame",
+    "ema_v raw_d ema_d mag noise threshold force sign_change strong",
+)
+
+# EMABank output for one block: (timescales, samples) arrays
+BankFrame = namedtuple("BankFrame", "ema_v raw_d ema_d turning")
+
+
+def _onepole(alpha):
+    """SOS row for y[n] = (1 - alpha) * y[n-1] + alpha * x[n]."""
+    return SOSFilter(np.array([[alpha, 0.0, 0.0, 1.0, alpha - 1.0, 0.0]]))
+
+
+# =========================
+# DETECTOR
+# =========================
+
+class _SlopeFrontEnd:
+    """Voltage EMA -> derivative -> derivative EMA, shared by the detectors."""
+
+    def __init__(self, first_v, dt, smooth_alpha, deriv_alpha):
+        self.dt = dt
+        self.smooth_alpha = smooth_alpha
+        self.deriv_alpha = deriv_alpha
+        self._ema_v_f = _onepole(smooth_alpha)
+        self._ema_d_f = _onepole(deriv_alpha)
+
+        # carried state (same names as the scalar loop)
+        self.ema_v = float(first_v)
+        self.prev_ema_v = self.ema_v
+        self.prev_v = float(first_v)
+        self.ema_d = 0.0
+        self.prev_raw_d = 0.0
+
+    def _empty_frame(self):
+        empty = np.zeros(0)
+        nob = np.zeros(0, dtype=bool)
+        return DetectorFrame(empty, empty, empty, empty, empty, empty, nob, nob, nob)
+
+    def _front(self, v, steps):
+        """(ema_v, raw_d, ema_d, sign_change, delta) for one non-empty block."""
+        n = len(v)
+        a = self.smooth_alpha
+        p = 1.0 - a
+
+        # Voltage EMA. A step of `delta` at sample i shifts the state before
+        # the update: y[i] = p * (y[i-1] + delta) + a * v[i], i.e. an extra
+        # input of p * delta / a at i.
+        delta = np.zeros(n)
+        if steps is not None and len(steps):
+            steps = np.asarray(sorted(steps), dtype=np.intp)
+            prev = np.concatenate(([self.prev_v], v[:-1]))
+            delta[steps] = v[steps] - prev[steps]
+        x = v + delta * (p / a) if a > 0 else v
+        self._ema_v_f.set_state([[p * self.ema_v, 0.0]])
+        ema_v = self._ema_v_f.process(x)
+
+        prev_ema = np.concatenate(([self.prev_ema_v], ema_v[:-1])) + delta
+        raw_d = (ema_v - prev_ema) / self.dt
+
+        pd = 1.0 - self.deriv_alpha
+        self._ema_d_f.set_state([[pd * self.ema_d, 0.0]])
+        ema_d = self._ema_d_f.process(raw_d)
+
+        prev_raw = np.concatenate(([self.prev_raw_d], raw_d[:-1]))
+        sign_change = (raw_d * prev_raw) < 0
+
+        self.ema_v = float(ema_v[-1])
+        self.prev_ema_v = self.ema_v
+        self.prev_v = float(v[-1])
+        self.ema_d = float(ema_d[-1])
+        self.prev_raw_d = float(raw_d[-1])
+        return ema_v, raw_d, ema_d, sign_change, delta
+
+
+class ChangeDetector(_SlopeFrontEnd):
+    """Stateful block version of the v3 per-sample detector chain."""
+
+    def __init__(self, first_v, dt, smooth_alpha=SMOOTH_ALPHA, deriv_alpha=DERIV_ALPHA,
+                 noise_alpha=NOISE_ALPHA, threshold_k=THRESHOLD_K, min_noise=MIN_NOISE,
+                 drift_threshold=DRIFT_ACCUM_THRESHOLD, thresh_multiplier=THRESH_MULTIPLIER,
+                 initial_noise=INITIAL_NOISE):
+        super().__init__(first_v, dt, smooth_alpha, deriv_alpha)
+        self.noise_alpha = noise_alpha
+        self.threshold_k = threshold_k
+        self.min_noise = min_noise
+        self.drift_threshold = drift_threshold
+        self.thresh_multiplier = thresh_multiplier
+
+        self._noise_f = _onepole(noise_alpha)
+        # noise decays by p per sample; chunk so p**-k stays far from overflow
+        p = 1.0 - noise_alpha
+        self._min_chunk = max(1, int(60.0 / -np.log(p))) if 0 < p < 1 else 4096
+
+        self.noise = initial_noise
+        self.drift_accum = 0.0
+
+    def process(self, v, steps=None):
+        """Run one block of volts through the chain; returns a DetectorFrame.
+
+        `steps` are indices (into this block) where the input jumps for a
+        known non-signal reason, e.g. a PGA range switch: the EMA is moved
+        by the jump there so it doesn't read as a derivative.
+        """
+        v = np.asarray(v, dtype=np.float64)
+        if len(v) == 0:
+            return self._empty_frame()
+        ema_v, raw_d, ema_d, sign_change, _ = self._front(v, steps)
+        mag = np.abs(ema_d)
+
+        noise = self._noise_floor(mag)
+        threshold = self.threshold_k * noise
+        force = self._drift_events(mag * self.dt)
+        strong = mag > (threshold * self.thresh_multiplier)
+
+        self.noise = float(noise[-1])
+        return DetectorFrame(ema_v, raw_d, ema_d, mag, noise, threshold, force, sign_change, strong)
+
+    def _noise_floor(self, mag):
+        # y[n] = max(p*y[n-1] + c*mag[n], L). With Y the unclamped response
+        # from the same start, y[n] = Y[n] - min(0, r[n]) where
+        # r[n] = min over m <= n of p**(n-m) * (Y[m] - L)  (every possible
+        # "last clamped at m"; the map is monotone so the max candidate wins).
+        c = self.noise_alpha
+        p = 1.0 - c
+        L = self.min_noise
+        if p <= 0.0:
+            return np.maximum(c * mag, L)
+        self._noise_f.set_state([[p * self.noise, 0.0]])
+        Y = self._noise_f.process(mag)
+        n = len(Y)
+        r = np.empty(n)
+        carry = np.inf
+        step = self._min_chunk
+        for s in range(0, n, step):
+            e = min(n, s + step)
+            k = np.arange(e - s)
+            pk = p ** k
+            run = np.minimum.accumulate((Y[s:e] - L) / pk) * pk
+            r[s:e] = np.minimum(run, carry * p * pk) if carry != np.inf else run
+            carry = r[e - 1]
+        return Y - np.minimum(r, 0.0)
+
+    def _drift_events(self, md):
+        # A running sum that resets whenever it crosses the threshold is a
+        # data-dependent scan, and resets come every few tens of samples:
+        # a plain float loop beats restarting a cumsum after each one, and
+        # adds in exactly the scalar loop's order.
+        thr = self.drift_threshold
+        acc = self.drift_accum
+        hits = []
+        for i, x in enumerate(md.tolist()):
+            acc += x
+            if acc > thr:
+                acc = 0.0
+                hits.append(i)
+        self.drift_accum = acc
+        force = np.zeros(len(md), dtype=bool)
+        force[hits] = True
+        return force
+
+
+class ZScoreDetector(_SlopeFrontEnd):
+    """Change = the smoothed voltage leaving its own recent distribution.
+
+    z = (ema_v - mean) / std, with mean and std taken over the previous
+    `window_s` seconds (the current sample is judged, not counted).
+
+    mode "ew":  exponentially weighted (alpha = 2 / (N + 1)), updated
+                incrementally as d = x - m; m += a*d; S = (1 - a)(S + a*d^2)
+                (West's weighted Welford). Both are one-pole recursions, so
+                blocks go through SOSFilter like the EMAs, and since old
+                samples are forgotten nothing grows over a week-long run.
+    mode "box": plain mean/std of exactly the last N samples, from running
+                sums of (x - shift) and (x - shift)^2 with shift the
+                previous window's mean, so the sums stay small and
+                sum(x^2) - sum(x)^2 / N can't cancel away the variance.
+
+    Returns the same DetectorFrame as ChangeDetector, with mag = |z|,
+    threshold = k, noise = std in volts and force never set.
+    """
+
+    def __init__(self, first_v, dt, window_s=ZSCORE_WINDOW_S, k=ZSCORE_K, mode=ZSCORE_MODE,
+                 min_std=ZSCORE_MIN_STD, smooth_alpha=SMOOTH_ALPHA, deriv_alpha=DERIV_ALPHA):
+        super().__init__(first_v, dt, smooth_alpha, deriv_alpha)
+        self.window = max(2, int(round(window_s / dt)))
+        self.k = k
+        self.mode = mode
+        self.min_var = min_std * min_std
+        self.offset = 0.0            # PGA-switch steps so far, kept out of the statistics
+        self.seen = 0
+        if mode == "ew":
+            self.alpha = 2.0 / (self.window + 1)
+            self._mean_f = _onepole(self.alpha)
+            self._var_f = SOSFilter(np.array([[1.0, 0.0, 0.0, 1.0, self.alpha - 1.0, 0.0]]))
+            self.mean = float(first_v)
+            self.var = self.min_var
+        elif mode == "box":
+            self._hist = np.full(self.window, float(first_v))
+        else:
+            raise ValueError(f"unknown z-score mode {mode!r}")
+
+    def process(self, v, steps=None):
+        v = np.asarray(v, dtype=np.float64)
+        n = len(v)
+        if n == 0:
+            return self._empty_frame()
+        ema_v, raw_d, ema_d, sign_change, delta = self._front(v, steps)
+
+        # a PGA switch moves ema_v by a known step; take it out of the
+        # series the statistics see, or it would read as a huge z
+        steps_so_far = np.cumsum(delta)
+        x = ema_v - (self.offset + steps_so_far)
+        self.offset += float(steps_so_far[-1])
+
+        if self.mode == "ew":
+            mean, var = self._ew_stats(x)
+        else:
+            mean, var = self._box_stats(x)
+        std = np.sqrt(np.maximum(var, self.min_var))
+        z = (x - mean) / std
+
+        mag = np.abs(z)
+        threshold = np.full(n, float(self.k))
+        force = np.zeros(n, dtype=bool)
+        strong = mag > self.k
+        # nothing is "unusual" until a full window of history exists
+        if self.seen < self.window:
+            strong[:self.window - self.seen] = False
+        self.seen += n
+        return DetectorFrame(ema_v, raw_d, ema_d, mag, std, threshold, force, sign_change, strong)
+
+    def _ew_stats(self, x):
+        a = self.alpha
+        p = 1.0 - a
+        self._mean_f.set_state([[p * self.mean, 0.0]])
+        m = self._mean_f.process(x)
+        m_prev = np.concatenate(([self.mean], m[:-1]))
+        d = x - m_prev
+        self._var_f.set_state([[p * self.var, 0.0]])
+        S = self._var_f.process(p * a * d * d)
+        S_prev = np.concatenate(([self.var], S[:-1]))
+        self.mean = float(m[-1])
+        self.var = float(S[-1])
+        return m_prev, S_prev
+
+    def _box_stats(self, x):
+        # One window-length piece at a time, each shifted by the mean of
+        # the window before it: the signal can wander far over a long
+        # block, the sums must only ever see it near-centred
+        W = self.window
+        n = len(x)
+        mean = np.empty(n)
+        var = np.empty(n)
+        hist = self._hist
+        for s in range(0, n, W):
+            piece = x[s:s + W]
+            m = len(piece)
+            shift = float(hist.mean())
+            y = np.concatenate((hist, piece)) - shift
+            c1 = np.concatenate(([0.0], np.cumsum(y)))
+            c2 = np.concatenate(([0.0], np.cumsum(y * y)))
+            # output j is judged against y[j:j + W], the W samples before it
+            s1 = c1[W:W + m] - c1[:m]
+            s2 = c2[W:W + m] - c2[:m]
+            mean[s:s + m] = shift + s1 / W
+            var[s:s + m] = np.maximum(s2 - s1 * s1 / W, 0.0) / (W - 1)
+            hist = np.concatenate((hist[m:], piece))
+        self._hist = hist
+        return mean, var
+
+
+class _OnePoleBank:
+    """y_j[n] = (1 - a_j) * y_j[n-1] + a_j * x_j[n] for a whole array of alphas.
+
+    The SOSFilter state-space trick with every matrix stacked along a
+    leading timescale axis: each chunk of `block` samples is one batched
+    matmul for all alphas together, and only the (scalar per alpha)
+    carried state steps from chunk to chunk.
+    """
+
+    def __init__(self, alphas, block=SOS_BLOCK):
+        a = np.asarray(alphas, dtype=np.float64)[:, None]
+        p = 1.0 - a
+        L = self.block = int(block)
+        k = np.arange(L)
+        lag = k[:, None] - k[None, :]
+        self._H = np.where(lag >= 0, a[:, :, None] * p[:, :, None] ** np.maximum(lag, 0), 0.0)
+        self._pw = p ** (k + 1)                  # weight of the carried state at output k
+        self._F = a * p ** (L - 1 - k)           # input k's share of the state after a chunk
+
+    def process(self, x, y0):
+        """x (m, n) from states y0 (m,) -> outputs (m, n)."""
+        m, n = x.shape
+        L = self.block
+        full = n // L
+        out = np.empty((m, n))
+        s = np.array(y0, dtype=np.float64)
+        if full:
+            X = x[:, :full * L].reshape(m, full, L)
+            forced = np.einsum("mcl,ml->mc", X, self._F)
+            pL = self._pw[:, -1]
+            states = np.empty((m, full))
+            for c in range(full):
+                states[:, c] = s
+                s = pL * s + forced[:, c]
+            Y = np.einsum("mkl,mcl->mck", self._H, X) + states[:, :, None] * self._pw[:, None, :]
+            out[:, :full * L] = Y.reshape(m, full * L)
+        rem = n - full * L
+        if rem:
+            xr = x[:, full * L:]
+            out[:, full * L:] = (
+                np.einsum("mkl,ml->mk", self._H[:, :rem, :rem], xr) + s[:, None] * self._pw[:, :rem]
+            )
+        return out
+
+
+def timescale_alpha(seconds, dt):
+    """EMA alpha whose time constant is `seconds` at sample spacing `dt`."""
+    return 1.0 - math.exp(-dt / seconds)
+
+
+class EMABank:
+    """The voltage EMA / derivative / derivative EMA at several timescales at once.
+
+    `alphas` are the voltage EMA alphas (timescale_alpha() turns seconds
+    into one); the derivative EMAs use `deriv_alphas`, by default the same,
+    so each timescale's slope is smoothed over its own time constant.
+    process() returns a BankFrame of (len(alphas), n) arrays; `turning`
+    marks samples where that timescale's smoothed slope changes sign, i.e.
+    its EMA turns round.
+    """
+
+    def __init__(self, first_v, dt, alphas, deriv_alphas=None):
+        self.dt = dt
+        self.alphas = np.asarray(alphas, dtype=np.float64)
+        self.deriv_alphas = self.alphas if deriv_alphas is None else np.asarray(deriv_alphas, dtype=np.float64)
+        self._v_bank = _OnePoleBank(self.alphas)
+        self._d_bank = _OnePoleBank(self.deriv_alphas)
+        m = len(self.alphas)
+        self.ema_v = np.full(m, float(first_v))
+        self.ema_d = np.zeros(m)
+        self.prev_v = float(first_v)
+
+    def __len__(self):
+        return len(self.alphas)
+
+    def process(self, v, steps=None):
+        """One block of volts -> BankFrame. `steps` as for ChangeDetector.process."""
+        v = np.asarray(v, dtype=np.float64)
+        m = len(self.alphas)
+        n = len(v)
+        if n == 0:
+            empty = np.zeros((m, 0))
+            return BankFrame(empty, empty, empty, np.zeros((m, 0), dtype=bool))
+
+        # A known step moves every EMA with it: filter the step-free
+        # signal and add the steps back on
+        shift = np.zeros(n)
+        if steps is not None and len(steps):
+            steps = np.asarray(sorted(steps), dtype=np.intp)
+            prev = np.concatenate(([self.prev_v], v[:-1]))
+            shift[steps] = v[steps] - prev[steps]
+            shift = np.cumsum(shift)
+        x = np.broadcast_to(v - shift, (m, n))
+        ema_v = self._v_bank.process(x, self.ema_v) + shift
+
+        prev_ema = np.concatenate((self.ema_v[:, None], ema_v[:, :-1]), axis=1)
+        step_d = np.diff(shift, prepend=0.0)
+        raw_d = (ema_v - prev_ema - step_d) / self.dt
+        ema_d = self._d_bank.process(raw_d, self.ema_d)
+
+        prev_d = np.concatenate((self.ema_d[:, None], ema_d[:, :-1]), axis=1)
+        turning = (ema_d * prev_d) < 0
+
+        self.ema_v = ema_v[:, -1].copy()
+        self.ema_d = ema_d[:, -1].copy()
+        self.prev_v = float(v[-1])
+        return BankFrame(ema_v, raw_d, ema_d, turning)
+
+
+# =========================
+# SPARSE GATING HELPERS
+# =========================
+
+def paced_hits(times, last, interval):
+    """Indices where `(t - last) > interval` fires, `last` moving to each hit.
+
+    The CC rate limiter of the scalar loop, evaluated for a whole block:
+    returns (indices, new last). `times` is a list of seconds.
+    """
+    hits = []
+    n = len(times)
+    i = 0
+    while i < n:
+        i = bisect.bisect_right(times, last + interval, i)
+        # last + interval rounds differently from t - last; settle on the
+        # scalar loop's own test
+        while i > 0 and (times[i - 1] - last) > interval and (not hits or i - 1 > hits[-1]):
+            i -= 1
+        while i < n and not (times[i] - last) > interval:
+            i += 1
+        if i < n:
+            hits.append(i)
+            last = times[i]
+            i += 1
+    return hits, last
@@ -0,0 +1,267 @@
+#
+# plant_dsp.py
+#
+# Streaming, block-vectorized DSP stages for the plant signal
+#
+# Every stage keeps its own state between blocks, so feeding a signal in
+# one go or in arbitrary chunks gives the same output. Blocks are NumPy
+# arrays; timestamps are int64 ns and travel alongside the values.
+
+
+import numpy as np
+
+
+# =========================
+# USER-TUNABLE PARAMETERS
+# =========================
+
+DECIM_TAPS_PER_PHASE = 24    # FIR length = 24 * factor + 1 (~0.3 s delay at 860 -> 40 Hz)
+DECIM_CUTOFF = 0.4           # -6 dB point as a fraction of the OUTPUT rate
+DECIM_KAISER_BETA = 8.0      # ~80 dB stopband
+
+MAINS_HZ = None              # 50, 60, or None to auto-detect from the signal
+NOTCH_BANDWIDTH_HZ = 2.0     # -3 dB width of every notch (mains drifts ~±0.2 Hz)
+NOTCH_MAX_HARMONIC = 8       # notch f0, 2*f0, ... up to this (and below Nyquist)
+MAINS_DETECT_SECONDS = 2.0   # signal used for auto-detection (passed through unfiltered)
+SOS_BLOCK = 128              # internal chunk for the block IIR (L x L matrices)
+
+
+# =========================
+# FILTER DESIGN
+# =========================
+
+def lowpass_taps(ntaps, cutoff_hz, fs, beta=DECIM_KAISER_BETA):
+    """Kaiser-windowed sinc lowpass, unity gain at DC."""
+    n = np.arange(ntaps) - (ntaps - 1) / 2.0
+    h = np.sinc(2.0 * cutoff_hz / fs * n) * np.kaiser(ntaps, beta)
+    return h / h.sum()
+
+
+def notch_sos(f0, fs, bandwidth_hz=NOTCH_BANDWIDTH_HZ):
+    """One biquad notch at f0 (RBJ cookbook) as an sos row [b0 b1 b2 1 a1 a2]."""
+    w0 = 2.0 * np.pi * f0 / fs
+    q = f0 / bandwidth_hz
+    alpha = np.sin(w0) / (2.0 * q)
+    c = -2.0 * np.cos(w0)
+    a0 = 1.0 + alpha
+    return np.array([1.0 / a0, c / a0, 1.0 / a0, 1.0, c / a0, (1.0 - alpha) / a0])
+
+
+def mains_sos(mains_hz, fs, bandwidth_hz=NOTCH_BANDWIDTH_HZ, max_harmonic=NOTCH_MAX_HARMONIC):
+    """Comb of notches on mains_hz and its harmonics below 0.95 * Nyquist."""
+    rows = []
+    for k in range(1, max_harmonic + 1):
+        f = k * mains_hz
+        if f >= 0.95 * fs / 2.0:
+            break
+        rows.append(notch_sos(f, fs, bandwidth_hz))
+    return np.array(rows).reshape(-1, 6)
+
+
+def detect_mains(x, fs):
+    """Return 50 or 60: whichever harmonic family carries more power in x."""
+    x = np.asarray(x, dtype=np.float64)
+    x = x - x.mean()
+    spec = np.abs(np.fft.rfft(x * np.hanning(len(x)))) ** 2
+    freqs = np.fft.rfftfreq(len(x), 1.0 / fs)
+
+    def family_power(f0):
+        total = 0.0
+        for k in (1, 2, 3):
+            band = np.abs(freqs - k * f0) <= 1.0
+            total += spec[band].sum()
+        return total
+
+    return 50 if family_power(50.0) >= family_power(60.0) else 60
+
+
+# =========================
+# BLOCK IIR (SOS)
+# =========================
+
+class SOSFilter:
+    """Cascade of biquads with state carried across blocks.
+
+    Each section is run as a small state-space system over chunks of
+    `block` samples: y = H x + C s and s' = A^L s + F x, with H (the
+    impulse-response Toeplitz matrix), C, F and A^k precomputed. A whole
+    chunk is then a couple of matrix products instead of a Python loop
+    per sample, and chunk outputs for a long block come out of one
+    matmul. Same numbers as a direct-form II transposed loop.
+    """
+
+    def __init__(self, sos, block=SOS_BLOCK):
+        self.sos = np.atleast_2d(np.asarray(sos, dtype=np.float64))
+        self.block = int(block)
+        self._mats = [self._section_mats(row) for row in self.sos]
+        self._state = None
+
+    def _section_mats(self, row):
+        b0, b1, b2, a0, a1, a2 = row / row[3]
+        L = self.block
+        A = np.array([[-a1, 1.0], [-a2, 0.0]])
+        B = np.array([b1 - a1 * b0, b2 - a2 * b0])
+        Apow = np.empty((L + 1, 2, 2))
+        Apow[0] = np.eye(2)
+        for k in range(1, L + 1):
+            Apow[k] = A @ Apow[k - 1]
+        h = np.empty(L)
+        h[0] = b0
+        h[1:] = (Apow[:L - 1] @ B)[:, 0]             # C A^(j-1) B, C = [1, 0]
+        idx = np.arange(L)
+        lag = idx[:, None] - idx[None, :]
+        H = np.where(lag >= 0, h[np.clip(lag, 0, L - 1)], 0.0)
+        C = Apow[:L, 0, :]                           # row n = C A^n
+        F = (Apow[L - 1::-1] @ B).T                  # column k = A^(L-1-k) B
+        return H, C, F, Apow, (b0, b2, a2, np.sum(row[:3]) / np.sum(row[3:]))
+
+    def reset(self):
+        self._state = None
+
+    def set_state(self, zi):
+        """Set each section's DF2T state [[z1, z2], ...], as scipy's sosfilt zi."""
+        self._state = [np.array(z, dtype=np.float64) for z in np.atleast_2d(zi)]
+
+    def _prime(self, x0):
+        # steady state for a constant input, so a DC level passes without a transient
+        self._state = []
+        u = x0
+        for *_, (b0, b2, a2, dc) in self._mats:
+            y = dc * u
+            self._state.append(np.array([y - b0 * u, b2 * u - a2 * y]))
+            u = y
+
+    def process(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        if len(x) == 0:
+            return x.copy()
+        if self._state is None:
+            self._prime(x[0])
+        y = x
+        for i, (H, C, F, Apow, _) in enumerate(self._mats):
+            y = self._run_section(y, H, C, F, Apow, i)
+        return y
+
+    def _run_section(self, x, H, C, F, Apow, i):
+        L = self.block
+        n = len(x)
+        full = n // L
+        out = np.empty(n)
+        s = self._state[i]
+        if full:
+            X = x[:full * L].reshape(full, L)
+            forced = X @ F.T                          # (full, 2)
+            AL = Apow[L]
+            states = np.empty((full, 2))
+            for c in range(full):
+                states[c] = s
+                s = AL @ s + forced[c]
+            out[:full * L] = (X @ H.T + states @ C.T).ravel()
+        rem = n - full * L
+        if rem:
+            xr = x[full * L:]
+            out[full * L:] = H[:rem, :rem] @ xr + C[:rem] @ s
+            s = Apow[rem] @ s + F[:, L - rem:] @ xr
+        self._state[i] = s
+        return out
+
+
+class MainsNotch:
+    """Streaming 50/60 Hz (+ harmonics) notch for the high-rate stream.
+
+    With mains_hz=None the first MAINS_DETECT_SECONDS pass through
+    untouched while the dominant mains family is measured; filtering
+    starts from the next block on.
+    """
+
+    def __init__(self, fs, mains_hz=MAINS_HZ, bandwidth_hz=NOTCH_BANDWIDTH_HZ,
+                 max_harmonic=NOTCH_MAX_HARMONIC, detect_seconds=MAINS_DETECT_SECONDS):
+        self.fs = float(fs)
+        self.bandwidth_hz = bandwidth_hz
+        self.max_harmonic = max_harmonic
+        self._detect_n = int(detect_seconds * fs)
+        self._detect_buf = []
+        self._detect_len = 0
+        self.mains_hz = None
+        self.filter = None
+        if mains_hz:
+            self._set_mains(mains_hz)
+
+    def _set_mains(self, mains_hz):
+        self.mains_hz = mains_hz
+        self.filter = SOSFilter(mains_sos(mains_hz, self.fs, self.bandwidth_hz, self.max_harmonic))
+        self._detect_buf = []
+
+    def process(self, t_ns, x):
+        if self.filter is None:
+            self._detect_buf.append(np.asarray(x, dtype=np.float64))
+            self._detect_len += len(x)
+            if self._detect_len >= self._detect_n:
+                self._set_mains(detect_mains(np.concatenate(self._detect_buf), self.fs))
+            return t_ns, x
+        return t_ns, self.filter.process(x)
+
+
+# =========================
+# DECIMATOR
+# =========================
+
+class FIRDecimator:
+    """Anti-alias lowpass + keep-every-Nth, computed only at kept samples.
+
+    process() views the history+block as overlapping windows spaced
+    `factor` apart and does one matrix-vector product per block, so the
+    cost is ntaps multiply-adds per *output* sample and no per-input
+    Python work at all. 50/60 Hz pickup and ADC noise above the output
+    Nyquist are filtered out instead of aliasing into the detector band.
+    """
+
+    def __init__(self, factor, fs, taps_per_phase=DECIM_TAPS_PER_PHASE,
+                 cutoff=DECIM_CUTOFF):
+        self.factor = int(factor)
+        self.fs = float(fs)
+        self.fs_out = self.fs / self.factor
+        ntaps = taps_per_phase * self.factor + 1
+        self.taps = lowpass_taps(ntaps, cutoff * self.fs_out, self.fs)
+        self.ntaps = ntaps
+        self.delay = (ntaps - 1) // 2          # group delay in input samples
+        self._hist_x = None
+        self._hist_t = None
+        self._start = 0                        # first window to emit in next block
+
+    def reset(self):
+        self._hist_x = None
+        self._hist_t = None
+        self._start = 0
+
+    def process(self, t_ns, x):
+        """Filter + decimate one block; returns (t_ns, y) at the output rate.
+
+        Output timestamps are those of the input sample at the centre of
+        each filter window, i.e. the instant the output value describes.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        t_ns = np.asarray(t_ns, dtype=np.int64)
+        n = len(x)
+        if n == 0:
+            return t_ns[:0], x[:0]
+        if self._hist_x is None:
+            # Prime with the first sample so a DC level doesn't ramp up from 0
+            self._hist_x = np.full(self.ntaps - 1, x[0])
+            self._hist_t = np.full(self.ntaps - 1, t_ns[0], dtype=np.int64)
+
+        buf = np.concatenate((self._hist_x, x))
+        tbuf = np.concatenate((self._hist_t, t_ns))
+        self._hist_x = buf[-(self.ntaps - 1):]
+        self._hist_t = tbuf[-(self.ntaps - 1):]
+
+        start = self._start
+        if start >= n:
+            self._start = start - n
+            return t_ns[:0], x[:0]
+        windows = np.lib.stride_tricks.sliding_window_view(buf, self.ntaps)[start::self.factor]
+        y = windows @ self.taps
+        idx = np.arange(start, n, self.factor)
+        t_out = tbuf[idx + self.delay]
+        self._start = idx[-1] + self.factor - n
+        return t_out, y
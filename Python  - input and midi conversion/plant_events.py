@@ -0,0 +1,171 @@
+#
+# plant_events.py
+#
+# The v3 note decision: event spacing, refractory, probability, pitch, velocity
+#
+# Once the detector (plant_detector.py) has picked out candidate samples,
+# plant_midi_raw_active_3.py decides which of them become notes:
+#
+#   - nothing within the global suppression window after the last event
+#     (MIN_EVENT_INTERVAL, then a strength-dependent EVENT_SUPPRESSION_*)
+#     or within REFRACTORY_S of the last trigger
+#   - strength = how far |slope| is past the threshold, 0..1; a note goes
+#     out with probability PROB_BASE + PROB_SCALE * strength (always, if
+#     the drift accumulator forced it)
+#   - velocity from strength, pitch from the level with an occasional
+#     small random offset, a slightly random length
+#
+# EventGate holds that logic and its state, so the live loop and the
+# offline tuner (plant_tuner.py) make exactly the same decisions.
+#
+# The dice are the gate's own: a generator made from a seed (make_rng),
+# not the global `random` module, so the same input and seed always give
+# the same notes - replay a recording with the seed a live run printed
+# and the MIDI stream comes out identical. Every accepted event draws the
+# same values in the same order whether or not it is played in real time.
+# BlockRandom serves the draws from pre-drawn NumPy blocks instead of
+# calling into `random` each time.
+
+
+import random
+from collections import namedtuple
+
+import numpy as np
+
+
+# =========================
+# USER-TUNABLE PARAMETERS
+# =========================
+
+# Defaults are the plant_midi_raw_active_3.py values
+REFRACTORY_S = 0.08
+MIN_EVENT_INTERVAL = 3.0
+EVENT_SUPPRESSION_MIN = 0.4
+EVENT_SUPPRESSION_SCALE = 2.5
+PROB_BASE = 0.20
+PROB_SCALE = 0.6
+BASE_NOTE = 60
+NOTE_SPAN = 36
+NOTE_LENGTH = 0.30
+FULL_SCALE_V = 3.3           # level that maps to the top of the pitch range
+
+PITCH_JITTER_PROB = 0.45
+PITCH_JITTER = [-5, -3, -2, -1, 0, 1, 2, 3, 5]
+
+RNG_BLOCK = 4096             # BlockRandom: uniforms drawn per refill
+
+
+# One note decided on: `delay` is the small timing jitter to send it after
+NoteEvent = namedtuple("NoteEvent", "note velocity length delay strength chance suppression")
+
+
+def _clamp(x, lo, hi):
+    return max(lo, min(hi, x))
+
+
+# =========================
+# RANDOMNESS
+# =========================
+
+class BlockRandom:
+    """random() / choice() / uniform() from pre-drawn NumPy uniform blocks."""
+
+    def __init__(self, seed=None, block=RNG_BLOCK):
+        self.block = int(block)
+        self._gen = np.random.default_rng(seed)
+        self._buf = self._gen.random(self.block).tolist()
+        self._i = 0
+
+    def random(self):
+        i = self._i
+        if i == self.block:
+            self._buf = self._gen.random(self.block).tolist()
+            i = 0
+        self._i = i + 1
+        return self._buf[i]
+
+    def choice(self, seq):
+        return seq[int(self.random() * len(seq))]
+
+    def uniform(self, a, b):
+        return a + (b - a) * self.random()
+
+
+def make_rng(seed=None, blocks=False):
+    """The gate's generator: random.Random(seed), or BlockRandom(seed) with blocks."""
+    return BlockRandom(seed) if blocks else random.Random(seed)
+
+
+def fresh_seed():
+    """A seed from OS entropy, for runs that didn't ask for one (print it!)."""
+    return random.SystemRandom().randrange(2 ** 32)
+
+
+# =========================
+# GATE
+# =========================
+
+class EventGate:
+    """Turns candidate samples into notes (or not), carrying the spacing state.
+
+    `rng` is anything with random()/choice()/uniform(); without one the
+    gate makes its own from `seed`.
+    """
+
+    def __init__(self, refractory_s=REFRACTORY_S, min_event_interval=MIN_EVENT_INTERVAL,
+                 suppression_min=EVENT_SUPPRESSION_MIN, suppression_scale=EVENT_SUPPRESSION_SCALE,
+                 prob_base=PROB_BASE, prob_scale=PROB_SCALE, base_note=BASE_NOTE,
+                 note_span=NOTE_SPAN, note_length=NOTE_LENGTH, max_delay=0.0, rng=None, seed=None):
+        self.refractory_s = refractory_s
+        self.min_event_interval = min_event_interval
+        self.suppression_min = suppression_min
+        self.suppression_scale = suppression_scale
+        self.prob_base = prob_base
+        self.prob_scale = prob_scale
+        self.base_note = base_note
+        self.note_span = note_span
+        self.note_length = note_length
+        self.max_delay = max_delay   # timing jitter drawn per note (the caller adds it to the due time)
+        self.rng = rng if rng is not None else make_rng(seed)
+
+        self.last_trigger = 0.0
+        self.last_event_time = 0.0   # end of the suppression window
+
+    def offer(self, now, force, mag, threshold, level):
+        """A candidate at `now` (s); returns a NoteEvent or None."""
+        # Enforce a global minimum time between interesting events to avoid floods
+        if (now - self.last_event_time) < self.min_event_interval:
+            return None
+        # Only trigger when past micro refractory
+        if not (now - self.last_trigger) > self.refractory_s:
+            return None
+
+        # strength relative to threshold
+        strength = 0.0
+        if threshold > 0:
+            strength = _clamp((mag - threshold) / (threshold * 2.0), 0.0, 1.0)
+
+        # Probabilistic gating so output isn't grid-like
+        rng = self.rng
+        chance = self.prob_base + self.prob_scale * strength
+        if not (rng.random() < chance or force):
+            return None
+        self.last_trigger = now
+
+        # Stronger events slightly reduce suppression so they *can* be more
+        # spontaneous, weaker events produce longer quiet periods
+        suppression = self.suppression_min + (
+            self.min_event_interval * (1.0 - (strength * 0.9))
+        ) / self.suppression_scale
+        self.last_event_time = now + suppression
+
+        # velocity from intensity, pitch from absolute state with small random jitter
+        velocity = int(_clamp(25 + strength * 102, 1, 127))
+        pos = _clamp(level / FULL_SCALE_V, 0.0, 1.0)
+        note_base = int(self.base_note + (pos - 0.5) * 2 * self.note_span)
+        jitter = rng.choice(PITCH_JITTER) if rng.random() < PITCH_JITTER_PROB else 0
+        note = int(_clamp(note_base + jitter, 0, 127))
+
+        delay = rng.uniform(0.0, self.max_delay)
+        length = self.note_length * rng.uniform(0.8, 1.2)
+        return NoteEvent(note, velocity, length, delay, strength, chance, suppression)
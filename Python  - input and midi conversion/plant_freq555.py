@@ -0,0 +1,246 @@
+#
+# plant_freq555.py
+#
+# 555 astable frequency input with kernel-timestamped edges
+# Plant as the timing resistor -> frequency tracks conductance
+#
+# The "555 python Timer code" notes count edges with a GPIO.add_event_detect
+# callback bumping a global pulse_count and read it every 0.1 s. That
+# loses edges whenever the interpreter is busy and the frequency comes out
+# in steps of 10 Hz (one pulse per gate).
+#
+# Here lgpio claims the pin as an alert: the kernel timestamps every edge
+# when it happens and queues it, so a busy interpreter only delays edges,
+# it doesn't lose them. Frequency is measured reciprocally - whole periods
+# divided by the time they took, edge to edge - so resolution comes from
+# the ns timestamps, not from the gate length, and it stays fine even
+# when only one or two periods fit in a gate.
+#
+# read() hands out (t_ns, hz) blocks at a fixed output rate, the same
+# shape as ContinuousADS1115.read_volts, so it drops straight into
+# AcquisitionThread(read_block=...) and the v3 detector.
+#
+# Wiring: 555 output (pin 3) -> GPIO27 (pin 13) through a 3.3 V divider or
+# level shifter if the 555 runs from 5 V. GPIO17 is left for ADS1115
+# ALERT/RDY. Keep the 555 below a few kHz (or put a CD4040 divider in
+# front and set FREQ_PRESCALE): every edge is one Python callback.
+
+
+import threading
+import time
+
+import numpy as np
+
+
+# =========================
+# USER-TUNABLE PARAMETERS
+# =========================
+
+FREQ_GPIO = 27               # BCM number of the 555 output
+FREQ_GPIOCHIP = 0            # Pi 5 with current kernels (older kernels: 4)
+FREQ_OUTPUT_HZ = 40.0        # estimates per second handed to the detector
+FREQ_PRESCALE = 1            # hardware divider in front of the pin (CD4040: 2..4096)
+FREQ_DEBOUNCE_US = 0         # kernel debounce; 0 = off
+FREQ_TIMEOUT_S = 2.0         # no edge for this long -> report 0 Hz
+FREQ_EDGE_BUFFER = 65536     # edges held between read() calls
+
+MISSED_GAP = 1.5             # an edge gap > this many periods means edges were lost
+
+
+# =========================
+# FREQUENCY READER
+# =========================
+
+class Frequency555:
+    """Reciprocal frequency meter on one GPIO, fed by lgpio alerts.
+
+    Every rising edge is stored as a kernel timestamp. Each read() takes
+    the edges since the previous one and returns
+
+        hz = periods / (last edge - last edge of the previous read)
+
+    so no period is ever counted twice or dropped between gates. With no
+    new edge in a gate the previous estimate is held, but never above
+    1 / (time since the last edge), so a slowing signal decays smoothly
+    instead of freezing; after FREQ_TIMEOUT_S it reads 0.
+
+    Edge timestamps are only ever subtracted from each other (their
+    origin is lgpio's business); output timestamps are time.monotonic_ns()
+    at the end of each gate.
+    """
+
+    def __init__(self, gpio=FREQ_GPIO, gpiochip=FREQ_GPIOCHIP, output_hz=FREQ_OUTPUT_HZ,
+                 prescale=FREQ_PRESCALE, debounce_us=FREQ_DEBOUNCE_US,
+                 timeout_s=FREQ_TIMEOUT_S, capacity=FREQ_EDGE_BUFFER):
+        self.gpio = gpio
+        self.gpiochip = gpiochip
+        self.output_hz = output_hz
+        self.gate_ns = int(1e9 / output_hz)
+        self.prescale = prescale
+        self.debounce_us = debounce_us
+        self.timeout_ns = int(timeout_s * 1e9)
+
+        self._t = np.zeros(capacity, dtype=np.int64)
+        self._capacity = capacity
+        self._head = 0               # total edges written
+        self._tail = 0               # total edges handed out
+        self._last_arrival = 0       # monotonic ns when the newest edge reached us
+        self._lock = threading.Lock()
+
+        self._anchor = None          # kernel ns of the last edge already measured
+        self._anchor_arrival = 0
+        self._period_ns = 0.0        # last measured period, for lost-edge checks
+        self._hz = 0.0
+        self._next_gate = None
+
+        self.edges = 0
+        self.missed = 0              # edges the kernel FIFO dropped (inferred from gaps)
+        self.overruns = 0            # edges overwritten before read()
+
+        self._chip = None
+        self._cb = None
+
+    # ---- lifecycle ----
+
+    def start(self):
+        import lgpio
+
+        self._chip = lgpio.gpiochip_open(self.gpiochip)
+        lgpio.gpio_claim_alert(self._chip, self.gpio, lgpio.RISING_EDGE)
+        if self.debounce_us:
+            lgpio.gpio_set_debounce_micros(self._chip, self.gpio, self.debounce_us)
+        self._cb = lgpio.callback(self._chip, self.gpio, lgpio.RISING_EDGE, self._on_edge)
+        self._next_gate = time.monotonic_ns() + self.gate_ns
+
+    def stop(self):
+        import lgpio
+
+        if self._cb is not None:
+            self._cb.cancel()
+            self._cb = None
+        if self._chip is not None:
+            lgpio.gpio_free(self._chip, self.gpio)
+            lgpio.gpiochip_close(self._chip)
+            self._chip = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---- edge callback (lgpio thread) ----
+
+    def _on_edge(self, chip, gpio, level, timestamp):
+        if level != 1:
+            return
+        with self._lock:
+            self._t[self._head % self._capacity] = timestamp
+            self._head += 1
+            if self._head - self._tail > self._capacity:
+                self.overruns += self._head - self._tail - self._capacity
+                self._tail = self._head - self._capacity
+            self._last_arrival = time.monotonic_ns()
+            self.edges += 1
+
+    # ---- consumer side ----
+
+    def _take_edges(self):
+        with self._lock:
+            idx = np.arange(self._tail, self._head) % self._capacity
+            self._tail = self._head
+            return self._t[idx], self._last_arrival
+
+    def estimate(self, now_ns):
+        """Update and return the frequency (Hz at the 555) from pending edges."""
+        ticks, arrival = self._take_edges()
+        if len(ticks) and self._anchor is None:
+            self._anchor = int(ticks[0])
+            self._anchor_arrival = arrival
+            ticks = ticks[1:]
+
+        if len(ticks):
+            gaps = np.diff(ticks, prepend=self._anchor)
+            ref = float(np.median(gaps)) if len(gaps) >= 3 else self._period_ns
+            periods = len(gaps)
+            if ref > 0:
+                long_gaps = gaps[gaps > MISSED_GAP * ref]
+                if len(long_gaps):
+                    lost = int(np.rint(long_gaps / ref).sum()) - len(long_gaps)
+                    self.missed += lost
+                    periods += lost
+            span = int(ticks[-1]) - self._anchor
+            if span > 0:
+                self._period_ns = span / periods
+                self._hz = 1e9 / self._period_ns
+            self._anchor = int(ticks[-1])
+            self._anchor_arrival = arrival
+        elif self._anchor is not None:
+            quiet = now_ns - self._anchor_arrival
+            if quiet > self.timeout_ns:
+                self._hz = 0.0
+            elif quiet > 0:
+                self._hz = min(self._hz, 1e9 / quiet)
+
+        return self._hz * self.prescale
+
+    def read(self, timeout=None):
+        """Wait for the end of the next gate and return (t_ns, hz).
+
+        Normally one estimate per call. If the caller fell behind by
+        several gates the missed gates are skipped, not replayed - the
+        edges in them still count in the next estimate. Returns empty
+        arrays if `timeout` runs out first.
+        """
+        if self._next_gate is None:
+            raise RuntimeError("Frequency555.start() first")
+        wait = (self._next_gate - time.monotonic_ns()) / 1e9
+        if wait > 0:
+            if timeout is not None and wait > timeout:
+                time.sleep(timeout)
+                return np.zeros(0, dtype=np.int64), np.zeros(0)
+            time.sleep(wait)
+
+        now = time.monotonic_ns()
+        self._next_gate += self.gate_ns
+        if now - self._next_gate > self.gate_ns:
+            self._next_gate = now + self.gate_ns
+        hz = self.estimate(now)
+        return np.array([now], dtype=np.int64), np.array([hz])
+
+
+# =========================
+# MAIN (bench check)
+# =========================
+
+def main():
+    meter = Frequency555()
+
+    print(f"🌱 555 frequency on GPIO{FREQ_GPIO}, {FREQ_OUTPUT_HZ:g} estimates/s")
+    print("Press Ctrl+C to stop")
+
+    with meter:
+        hz = []
+        last_print = time.monotonic()
+        while True:
+            _, f = meter.read(timeout=0.5)
+            hz.extend(f.tolist())
+            if time.monotonic() - last_print < 1.0:
+                continue
+            last_print = time.monotonic()
+            if not meter.edges:
+                print("⚠ No edges from the 555 - check wiring")
+            elif hz:
+                print(
+                    f"f={np.mean(hz):.3f}Hz spread={np.ptp(hz):.3f}Hz "
+                    f"edges={meter.edges} missed={meter.missed} overruns={meter.overruns}"
+                )
+            hz = []
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nStopped 🌿")
@@ -14,13 +14,16 @@
 # Velocity - intensity of electrical change
 
 
-import time
+import atexit
 import board
 import busio
 import adafruit_ads1x15.ads1115 as ADS
 from adafruit_ads1x15.analog_in import AnalogIn
 import mido
 
+from plant_scheduler import MidiScheduler, NotePlayer
+from plant_ticker import Ticker
+
 
 # =========================
 # USER-TUNABLE PARAMETERS
@@ -67,36 +70,25 @@ def clamp(x, lo, hi):
 
 def main():
     # I2C + ADC
-    i2c = busio.I2C(board.SCL, bo
-
-def clamp(x, lo, hi):
-    return max(lo, min(hi, x))
-
-def clamp(x, lo, hi):
-    return max(lo, min(hi, x))ard
-
-def clamp(x, lo, hi):
-    return max(lo, min(hi, x)).SDA)
+    i2c = busio.I2C(board.SCL, board.SDA)
     ads = ADS.ADS1115(i2c)
     ads.gain = ADS_GAIN
     chan = AnalogIn(ads, ADS.P0)
 
-    # MIDI
+    # MIDI: notes are scheduled, not held - the note-off goes out from the
+    # scheduler thread NOTE_LENGTH later while sampling carries on (and
+    # any still pending go out on Ctrl+C)
     midi_out = mido.open_output()
+    scheduler = MidiScheduler(midi_out)
+    scheduler.start()
+    atexit.register(scheduler.close)
+    notes = NotePlayer(scheduler, MIDI_CHANNEL)
 
-
-def clamp(x, lo, hi):
-    return max(lo, min(hi, x))
     dt = 1.0 / SAMPLE_HZ
-    last_time = time.time()
+    ticker = Ticker(SAMPLE_HZ)
 
     # Signal state
     ema_v = chan.voltage
-
-def clamp(x, lo, hi):
-    return max(lo, min(hi, x))
-    dt = 1.0 / SAMPLE_HZ
-    last_time = time.time()
     prev_ema_v = ema_v
     ema_d = 0.0
     noise = 0.01
@@ -112,12 +104,9 @@ def clamp(x, lo, hi):
     print("Press Ctrl+C to stop")
 
     while True:
-        now = time.time()
-        elapsed = now - last_time
-        if elapsed < dt:
-            time.sleep(dt - elapsed)
-            now = time.time()
-        last_time = now
+        # Absolute deadlines: a slow iteration costs skipped ticks
+        # (counted in ticker.missed), not a permanently slower rate
+        now = ticker.wait() * 1e-9
 
         # Read voltage
         v = chan.voltage
@@ -147,7 +136,7 @@ def clamp(x, lo, hi):
         if SEND_CC and (now - last_cc) > cc_dt:
             last_cc = now
             cc_val = int(clamp((ema_v / 3.3) * 127, 0, 127))
-            midi_out.send(
+            scheduler.send(
                 mido.Message(
                     "control_change",
                     channel=MIDI_CHANNEL,
@@ -169,25 +158,7 @@ def clamp(x, lo, hi):
             note = int(BASE_NOTE + (pos - 0.5) * 2 * NOTE_SPAN)
             note = clamp(note, 0, 127)
 
-            midi_out.send(
-                mido.Message(
-                    "note_on",
-                    channel=MIDI_CHANNEL,
-                    note=note,
-                    velocity=velocity
-                )
-            )
-
-            time.sleep(NOTE_LENGTH)
-
-            midi_out.send(
-                mido.Message(
-                    "note_off",
-                    channel=MIDI_CHANNEL,
-                    note=note,
-                    velocity=0
-                )
-            )
+            notes.play(note, velocity, NOTE_LENGTH)
 
             print(
                 f"event v={ema_v:.3f}V "
@@ -13,6 +13,7 @@
 # Velocity - intensity of electrical change
 
 
+import atexit
 import time
 import board
 import busio
@@ -22,6 +23,9 @@ import mido
 import subprocess
 import re
 
+from plant_scheduler import MidiScheduler, NotePlayer
+from plant_ticker import Ticker
+
 
 # =========================
 # USER-TUNABLE PARAMETERS (Simpler, pre-random/threading version)
@@ -86,8 +90,16 @@ def main():
     time.sleep(0.5)
     connect_to_puredata()
 
+    # Notes are scheduled, not held: the note-off goes out from the
+    # scheduler thread NOTE_LENGTH later while sampling carries on (and
+    # any still pending go out on Ctrl+C)
+    scheduler = MidiScheduler(midi_out)
+    scheduler.start()
+    atexit.register(scheduler.close)
+    notes = NotePlayer(scheduler, MIDI_CHANNEL)
+
     dt = 1.0 / SAMPLE_HZ
-    last_time = time.time()
+    ticker = Ticker(SAMPLE_HZ)
 
     ema_v = chan.voltage
     prev_ema_v = ema_v
@@ -103,12 +115,9 @@ def main():
     print("🌱 Plant MIDI (simple pre-random/threading) running — Ctrl+C to stop")
 
     while True:
-        now = time.time()
-        elapsed = now - last_time
-        if elapsed < dt:
-            time.sleep(dt - elapsed)
-            now = time.time()
-        last_time = now
+        # Absolute deadlines: a slow iteration costs skipped ticks
+        # (counted in ticker.missed), not a permanently slower rate
+        now = ticker.wait() * 1e-9
 
         v = chan.voltage
 
@@ -138,7 +147,7 @@ def main():
             last_cc = now
             cc_val = int(clamp((ema_v / 3.3) * 127, 0, 127))
             try:
-                midi_out.send(mido.Message("control_change", channel=MIDI_CHANNEL, control=CC_NUM, value=cc_val))
+                scheduler.send(mido.Message("control_change", channel=MIDI_CHANNEL, control=CC_NUM, value=cc_val))
             except Exception:
                 pass
 
@@ -156,18 +165,7 @@ def main():
             note_base = int(BASE_NOTE + (pos - 0.5) * 2 * NOTE_SPAN)
             note = int(clamp(note_base, 0, 127))
 
-            try:
-                midi_out.send(mido.Message("note_on", channel=MIDI_CHANNEL, note=note, velocity=velocity))
-            except Exception:
-                pass
-
-            # Blocking hold; simple pre-threading behavior
-            time.sleep(NOTE_LENGTH)
-
-            try:
-                midi_out.send(mido.Message("note_off", channel=MIDI_CHANNEL, note=note, velocity=0))
-            except Exception:
-                pass
+            notes.play(note, velocity, NOTE_LENGTH)
 
             print(f"event v={ema_v:.3f} d={ema_d:+.5f} thr={threshold:.5f} note={note} vel={velocity} mag={mag:.6f}")
 
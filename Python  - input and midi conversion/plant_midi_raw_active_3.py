@@ -15,15 +15,28 @@
 
 
 import time
-import board
-import busio
-import adafruit_ads1x15.ads1115 as ADS
-from adafruit_ads1x15 import ADS1015, AnalogIn, ads1x15
 import mido
 import subprocess
 import re
-import random
-import threading
+import atexit
+
+import numpy as np
+
+from plant_ads1115 import PGA_RANGE, ContinuousADS1115, RawADS1115, codes_to_volts, codes_to_volts_indexed
+from plant_artifacts import ARTIFACT_RAIL_MARGIN, ArtifactDetector
+from plant_autogain import AutoGain
+from plant_baseline import Baseline
+from plant_backends import DirectReader, ReplaySource, SessionRecorder, SimulatedPlant
+from plant_detector import ChangeDetector, EMABank, ZScoreDetector, paced_hits, timescale_alpha
+from plant_dsp import FIRDecimator, MainsNotch
+from plant_events import EventGate, fresh_seed, make_rng
+from plant_freq555 import Frequency555
+from plant_midiout import RtMidiOutput, messages_for
+from plant_spectral import SpectralFeatures
+from plant_ringbuffer import RingBuffer, AcquisitionThread
+from plant_rollups import RollupStore
+from plant_scheduler import MidiScheduler
+from plant_voices import VoiceManager
 
 
 # =========================
@@ -31,8 +44,27 @@ import threading
 # =========================
 
 SAMPLE_HZ = 40.0
-
-ADS_GAIN = 2                 # Increase to 4 if signal is very small
+RING_SECONDS = 30.0          # How far the detector may fall behind before samples are dropped
+
+ADC_BACKEND = "adafruit"     # "adafruit" (AnalogIn.voltage), "raw" (int16 codes, converted per block)
+                             # or "oversample" (860 SPS via ALERT/RDY, FIR-decimated to ~SAMPLE_HZ)
+                             # or "freq555" (555 astable on GPIO27, see plant_freq555.py)
+                             # or "sim" / "replay": no hardware at all (see plant_backends.py)
+REPLAY_PATH = "plant_session.bin"  # "replay": file written via RECORD_PATH (or a t_s,volts .csv)
+REPLAY_SPEED = 1.0           # "sim"/"replay": 1.0 = real time, 0 = as fast as the CPU allows
+RECORD_PATH = None           # e.g. "plant_session.bin": append the detector input for replay later
+ROLLUP_PATH = None           # e.g. "plant_rollups": per-second/minute/hour level, |slope|, noise floor
+                             # and event statistics, kept across restarts (see plant_rollups.py)
+OVERSAMPLE_RATE = 860        # ADS1115 data rate for "oversample"
+MAINS_NOTCH = True           # "oversample" only: notch 50/60 Hz + harmonics before decimation
+MAINS_HZ = None              # 50, 60, or None to auto-detect
+ADS_GAIN = 2                 # Increase to 4 if signal is very small (starting gain with AUTO_GAIN)
+AUTO_GAIN = False            # "raw" backend only: auto-range the PGA (see plant_autogain.py)
+FREQ_FULL_SCALE_HZ = 2000.0  # "freq555": this frequency maps to 3.3 "volts" for the detector
+ARTIFACT_CHECK = True        # Flag rail saturation, flatline, steps and slew (see plant_artifacts.py)
+ARTIFACT_ACTION = None       # None: only report them; "mute": no notes while flagged;
+                             # "rebaseline": flagged samples never reach the detector, and
+                             # its EMAs re-anchor to the level the signal comes back at
 SMOOTH_ALPHA = 0.18          # Voltage smoothing
 DERIV_ALPHA = 0.30           # Change-rate smoothing
 
@@ -40,20 +72,54 @@ NOISE_ALPHA = 0.02           # Noise floor learning rate
 THRESHOLD_K = 0.5            # LOWER = more notes
 MIN_NOISE = 0.0005
 
+DETECTOR = "adaptive"        # "adaptive": |derivative| vs learned noise floor (below)
+                             # "zscore": smoothed voltage vs its own recent mean/std
+ZSCORE_MODE = "ew"           # "zscore": "ew" (exponentially weighted) or "box" (exact window)
+ZSCORE_WINDOW_S = 30.0       # "zscore": how much recent signal counts as normal
+ZSCORE_K = 3.0               # "zscore": |z| above this is a strong change
+
 REFRACTORY_S = 0.08          # Minimum time between notes (internal micro-refractory)
 
 # Slow drift accumulation (forces notes over time)
 DRIFT_ACCUM_THRESHOLD = 0.002
 
+# Baseline-wander removal: pitch follows the level relative to a slow
+# running percentile, so electrode drift doesn't pin it to one end
+# (see plant_baseline.py); CC_NUM still sends the raw level
+DETREND = False
+BASELINE_WINDOW_S = 1800.0   # Baseline = BASELINE_PERCENTILE of the last this many seconds
+BASELINE_PERCENTILE = 50.0   # 50 = running median
+DETREND_CENTER = 1.65        # Where the re-centred level sits (middle of the 0..3.3 V pitch range)
+DETREND_CC = None            # Optional CC for the re-centred level
+
 BASE_NOTE = 60               # Center pitch (C4-ish)
 NOTE_SPAN = 36               # ± semitones (3 octaves)
 
 NOTE_LENGTH = 0.30
 MIDI_CHANNEL = 0
+MIDI_BACKEND = "mido"        # "mido", or "rtmidi": python-rtmidi directly with preencoded bytes (plant_midiout.py)
+MAX_VOICES = 8               # Notes sounding at once (all channels); more steal a voice (see plant_voices.py)
+VOICE_STEAL = "oldest"       # Which voice goes: "oldest" or "quietest"
 
 SEND_CC = True
 CC_NUM = 74                  # Brightness / timbre
 CC_RATE_HZ = 10.0
+OUTPUT_LOOKAHEAD_S = 0.05    # Notes go out this long after the sample that triggered them (plus jitter),
+                             # from the scheduler thread - keep it above a block's processing time
+OUTPUT_STATS_EVERY_S = 300.0 # Print MIDI output lateness stats this often (None = never)
+
+SEND_SPECTRAL = False        # Extra CCs from the signal's spectrum (see plant_spectral.py)
+SPECTRAL_HOP_S = 1.0         # Seconds between spectral CC updates
+SPECTRAL_BAND_CCS = (20, 21, 22, 23)  # One per SPECTRAL_BANDS entry (share of total power)
+SPECTRAL_CENTROID_CC = 24    # Spectral centroid ("brightness" of the fluctuations)
+SPECTRAL_FLATNESS_CC = 25    # Spectral flatness (smooth drift ~0, noisy ~127)
+
+# Extra timescales, each its own EMA + derivative (see plant_detector.EMABank),
+# e.g. (1.0, 60.0, 3600.0) for twitches, minute swells and hour trends
+EMA_BANK_S = ()              # Time constants in seconds; () = off
+EMA_BANK_CCS = (75, 76, 77)  # CC per timescale for its smoothed level (None = no CC)
+EMA_BANK_NOTE_CHANNELS = (None, None, None)  # MIDI channel per timescale for turning-point notes (None = off)
+EMA_BANK_MIN_SWING = 0.01    # Volts a timescale must move since its last note to play again
 
 # New tuning: require stronger/more "interesting" events
 SIGN_CHANGE_REQUIRED = True      # require derivative sign change for peaks
@@ -67,6 +133,10 @@ EVENT_SUPPRESSION_MIN = 0.4    # minimum extra suppression after an event
 EVENT_SUPPRESSION_SCALE = 2.5  # scales suppression inverse to strength
 MAX_NOTES_PER_EVENT = 5        # usually send one note per event
 
+RNG_SEED = None              # Seed for send probability / pitch / timing / length draws; None = a fresh
+                             # one each run (printed at startup, so a recording can be replayed exactly)
+RNG_BLOCKS = False           # Serve the draws from pre-drawn NumPy blocks (plant_events.BlockRandom)
+
 
 # =========================
 # HELPERS
@@ -75,6 +145,12 @@ MAX_NOTES_PER_EVENT = 5        # usually send one note per event
 def clamp(x, lo, hi):
     return max(lo, min(hi, x))
 
+class NullOutput:
+    """Stands in for the MIDI port: no ALSA (dev box/CI) or a fast replay."""
+
+    def send(self, msg):
+        pass
+
 def connect_to_puredata():
     """Auto-connect Plant_MIDI to Pure Data"""
     try:
@@ -106,192 +182,502 @@ def connect_to_puredata():
 
 def main():
     # I2C + ADC
-    i2c = busio.I2C(board.SCL, board.SDA)
-    ads = ADS.ADS1115(i2c)
-    ads.gain = ADS_GAIN
-    chan = AnalogIn(ads, ads1x15.Pin.A0)
-
-    # MIDI
-    midi_out = mido.open_output('Plant_MIDI', virtual=True)
-    print("🌱 Plant MIDI port created")
+    decim = None
+    notch = None
+    autogain = None
+    tag_dtype = None
+    det_hz = SAMPLE_HZ
+    realtime = True
+    # Artifact rails: the PGA full scale for the ADS1115 backends ("raw"
+    # checks its codes instead); none for simulated or frequency input
+    rails = None
+    if ADC_BACKEND in ("adafruit", "oversample"):
+        rail = PGA_RANGE[ADS_GAIN] * ARTIFACT_RAIL_MARGIN
+        rails = (-rail, rail)
+    if ADC_BACKEND in ("sim", "replay"):
+        if ADC_BACKEND == "sim":
+            adc = SimulatedPlant(SAMPLE_HZ, speed=REPLAY_SPEED)
+        else:
+            adc = ReplaySource(REPLAY_PATH, speed=REPLAY_SPEED)
+            det_hz = adc.sample_hz
+            print(f"🌱 Replaying {REPLAY_PATH}: {adc.duration_s / 3600:.2f} h at {det_hz:.1f} Hz")
+        realtime = adc.realtime
+        acq_source = dict(read_block=adc.read_volts)
+        acq_hz = det_hz
+        ring_dtype = "float64"
+        to_volts = lambda v: v
+        first_v = adc.first_volts
+        adc.start()
+    elif ADC_BACKEND == "oversample":
+        # Sample at the chip's top rate and lowpass/decimate down to the
+        # detector rate; dt follows the real output rate (860/22 = 39.1 Hz)
+        import board
+        import busio
+
+        i2c = busio.I2C(board.SCL, board.SDA)
+        adc = ContinuousADS1115(i2c, gain=ADS_GAIN, data_rate=OVERSAMPLE_RATE)
+        decim = FIRDecimator(round(OVERSAMPLE_RATE / SAMPLE_HZ), OVERSAMPLE_RATE)
+        det_hz = decim.fs_out
+        if MAINS_NOTCH:
+            notch = MainsNotch(OVERSAMPLE_RATE, mains_hz=MAINS_HZ)
+        acq_source = dict(read_block=adc.read_volts)
+        acq_hz = OVERSAMPLE_RATE
+        ring_dtype = "float64"
+        to_volts = lambda v: v
+        adc.start()
+        _, first_block = adc.read_volts(timeout=1.0)
+        if len(first_block) == 0:
+            print("⚠ No ALERT/RDY edges from the ADS1115 - check the ALERT wiring")
+        first_v = float(first_block.mean()) if len(first_block) else 0.0
+    elif ADC_BACKEND == "raw":
+        adc = RawADS1115(gain=ADS_GAIN)
+        acq_source = dict(read_sample=adc.read_code, sample_hz=SAMPLE_HZ)
+        if AUTO_GAIN:
+            # every sample carries the gain index it was taken at
+            autogain = AutoGain(ADS_GAIN, SAMPLE_HZ)
+            acq_source = dict(read_sample=adc.read_tagged, sample_hz=SAMPLE_HZ)
+            tag_dtype = "int8"
+        acq_hz = SAMPLE_HZ
+        ring_dtype = "int16"
+        to_volts = lambda codes: codes_to_volts(codes, ADS_GAIN)
+        first_v = float(to_volts(adc.read_code()))
+    elif ADC_BACKEND == "freq555":
+        # Frequency rises with conductance; scale it onto the 0..3.3 V
+        # range the detector (CC, pitch) was tuned for
+        adc = Frequency555(output_hz=SAMPLE_HZ)
+        acq_source = dict(read_block=adc.read)
+        acq_hz = SAMPLE_HZ
+        ring_dtype = "float64"
+        to_volts = lambda hz: hz * (3.3 / FREQ_FULL_SCALE_HZ)
+        adc.start()
+        time.sleep(0.5)
+        first_v = to_volts(adc.estimate(time.monotonic_ns()))
+        if not adc.edges:
+            print("⚠ No edges from the 555 - check the GPIO wiring")
+    else:
+        import board
+        import busio
+        import adafruit_ads1x15.ads1115 as ADS
+        from adafruit_ads1x15 import AnalogIn, ads1x15
+
+        i2c = busio.I2C(board.SCL, board.SDA)
+        ads = ADS.ADS1115(i2c)
+        ads.gain = ADS_GAIN
+        chan = AnalogIn(ads, ads1x15.Pin.A0)
+        acq_source = dict(read_sample=lambda: chan.voltage, sample_hz=SAMPLE_HZ)
+        acq_hz = SAMPLE_HZ
+        ring_dtype = "float64"
+        to_volts = lambda v: v
+        first_v = chan.voltage
+
+    # MIDI (nothing to play to when running faster than real time)
+    if realtime:
+        try:
+            if MIDI_BACKEND == "rtmidi":
+                midi_out = RtMidiOutput('Plant_MIDI', virtual=True)
+            else:
+                midi_out = mido.open_output('Plant_MIDI', virtual=True)
+            print("🌱 Plant MIDI port created")
+        except Exception as e:
+            print(f"⚠ No MIDI port ({e}) - events are printed only")
+            midi_out = NullOutput()
+    else:
+        midi_out = NullOutput()
+    # `msg` makes the messages in whatever form the port takes:
+    # mido.Messages, or preencoded bytes for the direct rtmidi port
+    msg = messages_for(midi_out)
 
     # Immediately clear any lingering sound: send All Sound Off (120) and All Notes Off (123) on all channels
     try:
         for ch in range(16):
-            midi_out.send(mido.Message('control_change', channel=ch, control=120, value=0))  # All Sound Off
-            midi_out.send(mido.Message('control_change', channel=ch, control=123, value=0))  # All Notes Off
+            midi_out.send(msg.control_change(ch, 120, 0))  # All Sound Off
+            midi_out.send(msg.control_change(ch, 123, 0))  # All Notes Off
     except Exception:
         pass
 
-    time.sleep(0.5)  # Give port time to register
-    connect_to_puredata()
-
-    dt = 1.0 / SAMPLE_HZ
-    last_time = time.time()
-
-    # Signal state
-    ema_v = chan.voltage
-    prev_ema_v = ema_v
-    ema_d = 0.0
-    noise = 0.01
-
-    drift_accum = 0.0
-    last_trigger = 0.0
+    if not isinstance(midi_out, NullOutput):
+        time.sleep(0.5)  # Give port time to register
+        connect_to_puredata()
+
+    dt = 1.0 / det_hz
+
+    # Signal state (EMA, derivative, noise floor, drift: see plant_detector.py)
+    if DETECTOR == "zscore":
+        detector = ZScoreDetector(
+            first_v, dt,
+            window_s=ZSCORE_WINDOW_S,
+            k=ZSCORE_K,
+            mode=ZSCORE_MODE,
+            smooth_alpha=SMOOTH_ALPHA,
+            deriv_alpha=DERIV_ALPHA,
+        )
+    else:
+        detector = ChangeDetector(
+            first_v, dt,
+            smooth_alpha=SMOOTH_ALPHA,
+            deriv_alpha=DERIV_ALPHA,
+            noise_alpha=NOISE_ALPHA,
+            threshold_k=THRESHOLD_K,
+            min_noise=MIN_NOISE,
+            drift_threshold=DRIFT_ACCUM_THRESHOLD,
+            thresh_multiplier=THRESH_MULTIPLIER,
+        )
+    last_gain_tag = None
 
     last_cc = 0.0
     cc_dt = 1.0 / CC_RATE_HZ
 
-    prev_raw_d = 0.0  # for sign-change detection
-
-    last_event_time = 0.0  # strong global suppression between interesting events
+    # Which candidates become notes. The gate owns its generator: with the
+    # same seed a replay of a recording repeats the same MIDI stream
+    seed = RNG_SEED if RNG_SEED is not None else fresh_seed()
+    print(f"🎲 RNG seed {seed}")
+    gate = EventGate(
+        refractory_s=REFRACTORY_S,
+        min_event_interval=MIN_EVENT_INTERVAL,
+        suppression_min=EVENT_SUPPRESSION_MIN,
+        suppression_scale=EVENT_SUPPRESSION_SCALE,
+        prob_base=PROB_BASE,
+        prob_scale=PROB_SCALE,
+        base_note=BASE_NOTE,
+        note_span=NOTE_SPAN,
+        note_length=NOTE_LENGTH,
+        max_delay=min(0.04, dt),
+        rng=make_rng(seed, RNG_BLOCKS),
+    )
+
+    # Runs on the acquisition stream, before the notch/decimator
+    artifacts = ArtifactDetector(acq_hz, rails=rails) if ARTIFACT_CHECK else None
+    was_bad = False
+
+    baseline = None
+    if DETREND:
+        baseline = Baseline(det_hz, window_s=BASELINE_WINDOW_S, percentile=BASELINE_PERCENTILE)
+
+    bank = None
+    if EMA_BANK_S:
+        bank = EMABank(first_v, dt, [timescale_alpha(s, dt) for s in EMA_BANK_S])
+        bank_ccs = [
+            (j, cc) for j, cc in enumerate(EMA_BANK_CCS[:len(bank)]) if cc is not None
+        ]
+        bank_notes = [
+            (j, ch) for j, ch in enumerate(EMA_BANK_NOTE_CHANNELS[:len(bank)]) if ch is not None
+        ]
+        bank_last_level = [first_v] * len(bank)
+
+    spectral = None
+    if SEND_SPECTRAL:
+        # Live, a block after a stall computes at most a few frames
+        spectral = SpectralFeatures(
+            det_hz,
+            hop=max(1, round(SPECTRAL_HOP_S * det_hz)),
+            max_frames=4 if realtime else None,
+        )
+        spectral_ccs = (
+            SPECTRAL_BAND_CCS[:len(spectral.bands)]
+            + (SPECTRAL_CENTROID_CC, SPECTRAL_FLATNESS_CC)
+        )
+
+    # Acquisition runs on its own thread; the loop below only consumes.
+    # Faster than real time there is nothing to decouple from: read the
+    # source directly, so a slow detector slows the replay instead of
+    # overrunning the ring.
+    if realtime:
+        ring = RingBuffer(int(acq_hz * RING_SECONDS), dtype=ring_dtype, tag_dtype=tag_dtype)
+        det_in = ring.reader()
+        acq = AcquisitionThread(ring, **acq_source)
+    else:
+        det_in = DirectReader(acq_source["read_block"])
+        acq = None
+    tagged = tag_dtype is not None
+    recorder = SessionRecorder(RECORD_PATH) if RECORD_PATH else None
+    # Rollups are filed by wall-clock time, and the store is kept across
+    # runs: a replay's or simulation's timestamps have no wall time behind
+    # them, so they'd land among (and overwrite) the live history
+    rollups = None
+    if ROLLUP_PATH and ADC_BACKEND in ("sim", "replay"):
+        print(f"⚠ ROLLUP_PATH ignored: {ADC_BACKEND} samples have no wall-clock time")
+    elif ROLLUP_PATH:
+        rollups = RollupStore(ROLLUP_PATH, ("v", "mag", "noise", "events"))
+    last_overruns = 0
+    last_errors = 0
+    last_missed = 0
+    events = 0
+    samples = 0
+    run_start = time.monotonic()
+    last_stats = run_start
 
     print("🌱 Plant MIDI ACTIVE mode running")
     print("INA333 → ADS1115 → RAW MIDI (interesting-change gating enabled)")
     print("Press Ctrl+C to stop")
 
-    def schedule_note_off(note, delay):
-        def off():
-            try:
-                midi_out.send(
-                    mido.Message(
-                        "note_off",
-                        channel=MIDI_CHANNEL,
-                        note=note,
-                        velocity=0
-                    )
-                )
-            except Exception:
-                pass
-        t = threading.Timer(delay, off)
-        t.daemon = True
-        t.start()
+    # Every MIDI message from here on goes through one scheduler (see
+    # plant_scheduler.py): live, its thread sends them, note-offs at their
+    # due time; in a replay there is no thread and note-offs fall due on
+    # signal time. Whatever is still pending when we stop - Ctrl+C
+    # included - is sent on the way out, so no note is left hanging.
+    scheduler = MidiScheduler(midi_out)
+    if realtime:
+        scheduler.start()
+    atexit.register(scheduler.close)
+
+    # which notes are sounding: voice cap, stealing, retriggers
+    notes = VoiceManager(scheduler, MAX_VOICES, VOICE_STEAL, MIDI_CHANNEL, msg)
+
+    # Sample timestamps aren't necessarily on the scheduler's clock (a
+    # recording's, lgpio's kernel ticks) and may trail it by a filter's
+    # group delay: each block's last sample is taken as "now" on the
+    # scheduler clock, and the block's notes keep their spacing from it.
+    # Without a thread the scheduler runs on sample time itself.
+    clock_offset = 0
+
+    def play_note(note, velocity, length, t_ns, channel=MIDI_CHANNEL, delay=0.0):
+        # Due a fixed look-ahead after the triggering sample, plus any
+        # humanizing jitter: the scheduler holds it until then, so the
+        # notes keep the plant's timing and this loop never sleeps
+        if not realtime:
+            scheduler.advance(t_ns)
+        notes.play(
+            note, velocity, length, channel,
+            t_ns + clock_offset + int((OUTPUT_LOOKAHEAD_S + delay) * 1e9),
+        )
+
+    def send_ccs(ccs, t_ns):
+        # On the same clock and look-ahead as the notes, so CCs and notes
+        # keep their sample order (a replay's stream doesn't depend on the
+        # block size)
+        scheduler.schedule_batch(t_ns + clock_offset + int(OUTPUT_LOOKAHEAD_S * 1e9), ccs)
+
+    if acq is not None:
+        acq.start()
 
     while True:
-        now = time.time()
-        elapsed = now - last_time
-        if elapsed < dt:
-            time.sleep(dt - elapsed)
-            now = time.time()
-        last_time = now
-
-        # Read voltage
-        v = chan.voltage
-
-        # Smooth voltage
-        ema_v = (1 - SMOOTH_ALPHA) * ema_v + SMOOTH_ALPHA * v
-
-        # Derivative (change rate)
-        raw_d = (ema_v - prev_ema_v) / dt
-        prev_ema_v = ema_v
-        ema_d = (1 - DERIV_ALPHA) * ema_d + DERIV_ALPHA * raw_d
-
-        # Adaptive noise floor
-        mag = abs(ema_d)
-        noise = (1 - NOISE_ALPHA) * noise + NOISE_ALPHA * mag
-        noise = max(noise, MIN_NOISE)
-        threshold = THRESHOLD_K * noise
-
-        # Drift accumulation (slow biology still sings)
-        drift_accum += mag * dt
-        force_event = False
-        if drift_accum > DRIFT_ACCUM_THRESHOLD:
-            drift_accum = 0.0
-            force_event = True
-
-        # Continuous CC (plant "mood")
-        if SEND_CC and (now - last_cc) > cc_dt:
-            last_cc = now
-            cc_val = int(clamp((ema_v / 3.3) * 127, 0, 127))
-            try:
-                midi_out.send(
-                    mido.Message(
-                        "control_change",
-                        channel=MIDI_CHANNEL,
-                        control=CC_NUM,
-                        value=cc_val
-                    )
-                )
-            except Exception:
-                pass
-
-        # Determine if this is an "interesting" change:
-        sign_change = (raw_d * prev_raw_d) < 0
-        prev_raw_d = raw_d
-
-        is_strong = mag > (threshold * THRESH_MULTIPLIER)
-
-        # If SIGN_CHANGE_REQUIRED, require a derivative sign change for a peak (helps avoid ramps)
-        interesting = False
-        if force_event:
-            # force events should still respect the global event spacing to avoid floods
-            interesting = True
+        # Pull every sample taken since last time; the acquisition thread
+        # keeps sampling even while we sleep, print or send MIDI below.
+        gain_switches = ()
+        if tagged:
+            ts, vs, gain_tags = det_in.read(timeout=1.0)
         else:
-            if SIGN_CHANGE_REQUIRED:
-                interesting = is_strong and sign_change
-            else:
-                interesting = is_strong
-
-        # Enforce a global minimum time between interesting events to avoid floods
-        if interesting and (now - last_event_time) < MIN_EVENT_INTERVAL:
-            interesting = False
-
-        # Only trigger when interesting and past micro refractory
-        if interesting and (now - last_trigger) > REFRACTORY_S:
-            # strength relative to threshold
-            strength = 0.0
-            if threshold > 0:
-                strength = clamp((mag - threshold) / (threshold * 2.0), 0.0, 1.0)
-
-            # Probabilistic gating so output isn't grid-like
-            send_chance = PROB_BASE + PROB_SCALE * strength
-            if random.random() < send_chance or force_event:
-                last_trigger = now
-
-                # Calculate suppression time after this event:
-                # stronger events slightly reduce suppression so they *can* be more spontaneous,
-                # weaker events produce longer quiet periods
-                suppression = EVENT_SUPPRESSION_MIN + (MIN_EVENT_INTERVAL * (1.0 - (strength * 0.9))) / EVENT_SUPPRESSION_SCALE
-                last_event_time = now + suppression
-
-                # usually send a single spontaneous note
-                notes_to_send = 1
-                for _ in range(notes_to_send):
-                    # velocity from intensity
-                    velocity = int(clamp(25 + strength * 102, 1, 127))
-
-                    # pitch from absolute state with small random jitter
-                    pos = clamp(ema_v / 3.3, 0.0, 1.0)
-                    note_base = int(BASE_NOTE + (pos - 0.5) * 2 * NOTE_SPAN)
-                    jitter = random.choice([-5, -3, -2, -1, 0, 1, 2, 3, 5]) if random.random() < 0.45 else 0
-                    note = int(clamp(note_base + jitter, 0, 127))
-
-                    # slight timing jitter before sending (small)
-                    time.sleep(random.uniform(0.0, min(0.04, dt)))
-
-                    try:
-                        midi_out.send(
-                            mido.Message(
-                                "note_on",
-                                channel=MIDI_CHANNEL,
-                                note=note,
-                                velocity=velocity
-                            )
-                        )
-                    except Exception:
-                        pass
-
-                    # schedule note off non-blocking
-                    length = NOTE_LENGTH * random.uniform(0.8, 1.2)
-                    schedule_note_off(note, length)
-
+            ts, vs = det_in.read(timeout=1.0)
+        if len(ts) == 0 and getattr(adc, "finished", False) and det_in.pending == 0:
+            break
+        errors = acq.errors if acq is not None else 0
+        missed = acq.missed_ticks if acq is not None else 0
+        if det_in.overruns != last_overruns or errors != last_errors or missed != last_missed:
+            last_overruns = det_in.overruns
+            last_errors = errors
+            last_missed = missed
+            print(
+                f"⚠ acquisition: overruns={last_overruns} read_errors={last_errors} "
+                f"missed_ticks={last_missed}"
+            )
+
+        if autogain is not None and len(vs):
+            new_gain = autogain.update(vs, gain_tags)
+            if new_gain is not None:
+                adc.set_gain(new_gain)
+                print(f"🎚 ADS gain → {new_gain:g}")
+            # samples where the gain differs from the one before
+            if last_gain_tag is None:
+                last_gain_tag = gain_tags[0]
+            gain_switches = np.flatnonzero(np.diff(gain_tags, prepend=last_gain_tag))
+            last_gain_tag = gain_tags[-1]
+            saturated = (vs >= 32767) | (vs <= -32768)
+            vs = codes_to_volts_indexed(vs, gain_tags)
+        else:
+            saturated = ((vs >= 32767) | (vs <= -32768)) if ADC_BACKEND == "raw" else None
+            vs = to_volts(vs)
+        bad = None
+        if artifacts is not None:
+            art = artifacts.process(ts, vs, saturated, gain_switches)
+            for t_ev, what in art.events:
+                print(f"⚠ artifact {what} at {t_ev * 1e-9:.2f}s")
+            bad = art.bad
+            t_acq = ts
+        if notch is not None:
+            ts, vs = notch.process(ts, vs)
+        if decim is not None:
+            ts, vs = decim.process(ts, vs)
+            if bad is not None:
+                # each output sample takes the flag of the input it lines up with
+                bad = bad[np.clip(np.searchsorted(t_acq, ts, side="right") - 1, 0, None)]
+        if recorder is not None:
+            recorder.write(ts, vs)
+        samples += len(ts)
+        if bad is None or ARTIFACT_ACTION is None:
+            bad = np.zeros(len(ts), dtype=bool)
+        elif ARTIFACT_ACTION == "rebaseline" and len(ts):
+            # Leave flagged samples out entirely, so they never reach the
+            # noise floor or drift accumulator; the first clean sample
+            # after an episode is a step the EMAs are moved by
+            good = ~bad
+            resumed = good & np.concatenate(([was_bad], bad[:-1]))
+            was_bad = bool(bad[-1])
+            keep = np.flatnonzero(good)
+            switches = np.asarray(gain_switches, dtype=np.intp)
+            gain_switches = np.searchsorted(keep, np.union1d(
+                np.flatnonzero(resumed), switches[good[switches]]
+            ))
+            ts, vs = ts[keep], vs[keep]
+            bad = bad[keep]
+        if realtime and len(ts):
+            clock_offset = scheduler.now() - int(ts[-1])
+
+        # The whole EMA / derivative / noise floor / drift chain for the
+        # block at once (plant_detector.py); a PGA range switch moves the
+        # EMA with the step so it never reads as a derivative
+        frame = detector.process(vs, gain_switches)
+        times = (ts * 1e-9).tolist()
+        if bank is not None:
+            bframe = bank.process(vs, gain_switches)
+        # what pitch is mapped from: the level itself, or re-centred on the baseline
+        if baseline is not None:
+            recenter = DETREND_CENTER - baseline.process(frame.ema_v)
+            pitch_v = frame.ema_v + recenter
+        else:
+            recenter = np.zeros(len(vs))
+            pitch_v = frame.ema_v
+
+        # Spectral CCs, once per hop, sent at the sample that completed the frame
+        spec_due = {}
+        if spectral is not None:
+            spec = spectral.process(ts, vs)
+            spec_due = dict(zip(
+                np.searchsorted(ts, spec.t_ns).tolist(), spectral.cc_values(spec).tolist()
+            ))
+
+        # Only samples that can do something still need Python: CC ticks
+        # and event candidates (drift-forced, or strong [+ sign change])
+        if SIGN_CHANGE_REQUIRED:
+            candidates = frame.force | (frame.strong & frame.sign_change)
+        else:
+            candidates = frame.force | frame.strong
+        cc_due = ()
+        if SEND_CC:
+            cc_due, last_cc = paced_hits(times, last_cc, cc_dt)
+        cc_due = set(cc_due)
+        event_mask = np.zeros(len(ts))
+        # Timescale notes: one where that timescale's EMA turns round, if
+        # it has moved far enough since its last note - played in sample
+        # order along with the main notes, so the voices get them in order
+        bank_due = {}
+        if bank is not None:
+            for j, channel in bank_notes:
+                for i in np.flatnonzero(bframe.turning[j] & ~bad).tolist():
+                    bank_due.setdefault(i, []).append((j, channel))
+
+        for i in sorted(cc_due.union(np.flatnonzero(candidates).tolist(), bank_due, spec_due)):
+            now = times[i]
+            ema_v = float(frame.ema_v[i])
+
+            if i in spec_due:
+                send_ccs([
+                    msg.control_change(MIDI_CHANNEL, control, value)
+                    for control, value in zip(spectral_ccs, spec_due[i])
+                ], int(ts[i]))
+
+            # (at the same sample these start before the jittered main note)
+            for j, channel in bank_due.get(i, ()):
+                level = float(bframe.ema_v[j, i])
+                swing = abs(level - bank_last_level[j])
+                if swing < EMA_BANK_MIN_SWING:
+                    continue
+                bank_last_level[j] = level
+                pos = clamp((level + float(recenter[i])) / 3.3, 0.0, 1.0)
+                note = int(clamp(BASE_NOTE + (pos - 0.5) * 2 * NOTE_SPAN, 0, 127))
+                velocity = int(clamp(25 + 102 * swing / (4 * EMA_BANK_MIN_SWING), 1, 127))
+                play_note(note, velocity, NOTE_LENGTH, int(ts[i]), channel)
+                events += 1
                 print(
-                    f"event v={ema_v:.3f}V "
-                    f"d={ema_d:+.5f} "
-                    f"thr={threshold:.5f} "
-                    f"note={note} vel={velocity} "
-                    f"mag={mag:.6f} interesting={interesting} chance={send_chance:.2f} suppress={suppression:.2f}"
+                    f"timescale {EMA_BANK_S[j]:g}s v={level:.3f}V swing={swing:.4f} "
+                    f"note={note} vel={velocity} ch={channel}"
                 )
 
+            # Continuous CC (plant "mood")
+            if i in cc_due:
+                cc_val = int(clamp((ema_v / 3.3) * 127, 0, 127))
+                ccs = [msg.control_change(MIDI_CHANNEL, CC_NUM, cc_val)]
+                if DETREND_CC is not None:
+                    ccs.append(msg.control_change(
+                        MIDI_CHANNEL, DETREND_CC, int(clamp((float(pitch_v[i]) / 3.3) * 127, 0, 127))
+                    ))
+                if bank is not None:
+                    for j, control in bank_ccs:
+                        level = float(bframe.ema_v[j, i])
+                        ccs.append(msg.control_change(
+                            MIDI_CHANNEL, control, int(clamp((level / 3.3) * 127, 0, 127))
+                        ))
+                # this tick's CCs in one go
+                send_ccs(ccs, int(ts[i]))
+
+            # An "interesting" change: forced by drift accumulation (still
+            # subject to the global event spacing), or strong enough, with
+            # a derivative sign change if SIGN_CHANGE_REQUIRED (a peak, not
+            # a ramp) - and never from an electrode artifact
+            interesting = bool(candidates[i])
+            if not interesting or bad[i]:
+                continue
+            force_event = bool(frame.force[i])
+            mag = float(frame.mag[i])
+            threshold = float(frame.threshold[i])
+            ema_d = float(frame.ema_d[i])
+
+            # Event spacing, refractory, probability, velocity and pitch
+            # (plant_events.py)
+            note_event = gate.offer(now, force_event, mag, threshold, float(pitch_v[i]))
+            if note_event is None:
+                continue
+            note = note_event.note
+            velocity = note_event.velocity
+
+            # note on and off both scheduled, with slight timing jitter (non-blocking)
+            play_note(note, velocity, note_event.length, int(ts[i]), delay=note_event.delay)
+
+            events += 1
+            event_mask[i] = 1.0
+            print(
+                f"event v={ema_v:.3f}V "
+                f"d={ema_d:+.5f} "
+                f"thr={threshold:.5f} "
+                f"note={note} vel={velocity} "
+                f"mag={mag:.6f} interesting={interesting} chance={note_event.chance:.2f} "
+                f"suppress={note_event.suppression:.2f}"
+            )
+
+        if rollups is not None:
+            # onto the monotonic clock (lgpio's are kernel ticks) the same
+            # way as the notes; the store takes it on to wall time
+            rollups.update(ts + clock_offset, frame.ema_v, frame.mag, frame.noise, event_mask)
+        if not realtime and len(ts):
+            scheduler.advance(int(ts[-1]))
+        elif OUTPUT_STATS_EVERY_S is not None and time.monotonic() - last_stats >= OUTPUT_STATS_EVERY_S:
+            last_stats = time.monotonic()
+            print(f"🎹 MIDI out: {scheduler.report()}")
+
+    # Only a replay ever gets here. Without a thread, whatever the
+    # look-ahead still holds is the end of the recording: play it out
+    if not realtime:
+        scheduler.advance(float("inf"))
+    scheduler.close()
+    if recorder is not None:
+        recorder.close()
+    if rollups is not None:
+        rollups.close()
+    elapsed = time.monotonic() - run_start
+    print(
+        f"🌿 Replay done: {samples} samples ({samples * dt / 3600:.2f} h) in {elapsed:.1f} s, "
+        f"{events} events"
+    )
+    if artifacts is not None:
+        print(f"   {artifacts.summary()}")
+    print(f"   voices: {notes.summary()}")
+    if scheduler.timed:
+        print(f"   MIDI out: {scheduler.report()}")
+    if spectral is not None:
+        print(
+            f"   spectral: {spectral.frames} frames, {spectral.cpu_s:.2f} s CPU "
+            f"({spectral.cpu_load() * 100:.4f}% of real time)"
+        )
+
 
 if __name__ == "__main__":
     try:
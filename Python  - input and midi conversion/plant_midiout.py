@@ -0,0 +1,124 @@
+#
+# plant_midiout.py
+#
+# MIDI output without mido.Message: python-rtmidi direct, preencoded bytes
+#
+# Every CC and note used to be a mido.Message - built, range-checked,
+# copied again by port.send() and only then turned into bytes for rtmidi.
+# At 10 Hz of CCs times 16 plants plus notes, that shows in a Pi profile.
+#
+#   RawMessages    note_on / note_off / control_change as ready-made byte
+#                  tuples from a small pool: built once per distinct
+#                  message, then looked up (tuples, so a message can sit
+#                  in the scheduler's queue while the same one is reused)
+#   RtMidiOutput   a python-rtmidi port: send() hands the bytes straight to
+#                  rtmidi, send_batch() sends several in one call
+#   MidoMessages   the same three calls making mido.Messages, for mido ports
+#
+# The code that plays notes (plant_scheduler.NotePlayer,
+# plant_voices.VoiceManager) takes either message factory, and
+# messages_for(port) picks the one the port wants (its messages_class,
+# mido.Messages otherwise), so the port decides what a message is.
+# bench_midiout.py compares the two paths.
+
+
+import mido
+
+
+# =========================
+# USER-TUNABLE PARAMETERS
+# =========================
+
+POOL_MAX = 65536             # distinct messages kept ready; the pool starts over when it's full
+
+
+# =========================
+# MESSAGES
+# =========================
+
+class MidoMessages:
+    """Messages as mido.Message, for mido ports."""
+
+    def note_on(self, channel, note, velocity):
+        return mido.Message("note_on", channel=channel, note=note, velocity=velocity)
+
+    def note_off(self, channel, note):
+        return mido.Message("note_off", channel=channel, note=note, velocity=0)
+
+    def control_change(self, channel, control, value):
+        return mido.Message("control_change", channel=channel, control=control, value=value)
+
+
+class RawMessages:
+    """Messages as preencoded byte tuples, from a pool.
+
+    No range checks beyond masking: the callers already clamp to 0..127.
+    """
+
+    def __init__(self, pool_max=POOL_MAX):
+        self.pool_max = pool_max
+        self._pool = {}
+        # every note-off there is, up front (the most frequent message)
+        self._off = [[(0x80 | ch, n, 0) for n in range(128)] for ch in range(16)]
+
+    def _get(self, status, d1, d2):
+        key = status << 16 | d1 << 8 | d2
+        msg = self._pool.get(key)
+        if msg is None:
+            if len(self._pool) >= self.pool_max:
+                self._pool.clear()
+            msg = self._pool[key] = (status, d1, d2)
+        return msg
+
+    def note_on(self, channel, note, velocity):
+        return self._get(0x90 | (channel & 15), note & 127, velocity & 127)
+
+    def note_off(self, channel, note):
+        return self._off[channel & 15][note & 127]
+
+    def control_change(self, channel, control, value):
+        return self._get(0xB0 | (channel & 15), control & 127, value & 127)
+
+
+def messages_for(port):
+    """The message factory `port` takes: its messages_class, else MidoMessages."""
+    return getattr(port, "messages_class", MidoMessages)()
+
+
+# =========================
+# PORT
+# =========================
+
+class RtMidiOutput:
+    """python-rtmidi output port taking RawMessages byte tuples (or mido.Messages)."""
+
+    messages_class = RawMessages
+
+    def __init__(self, name="Plant_MIDI", virtual=True):
+        import rtmidi
+        self._port = rtmidi.MidiOut()
+        if virtual:
+            self._port.open_virtual_port(name)
+        else:
+            names = self._port.get_ports()
+            matches = [i for i, n in enumerate(names) if name in n]
+            if not matches:
+                raise IOError(f"no MIDI output port matching {name!r} (have {names})")
+            self._port.open_port(matches[0])
+        self.name = name
+        self._send = self._port.send_message
+
+    def send(self, msg):
+        if isinstance(msg, mido.Message):
+            msg = msg.bytes()
+        self._send(msg)
+
+    def send_batch(self, msgs):
+        send = self._send
+        for msg in msgs:
+            if isinstance(msg, mido.Message):
+                msg = msg.bytes()
+            send(msg)
+
+    def close(self):
+        self._port.close_port()
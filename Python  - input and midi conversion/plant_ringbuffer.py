@@ -0,0 +1,196 @@
+#
+# plant_ringbuffer.py
+#
+# Background acquisition thread + preallocated NumPy ring buffer
+#
+# The sampler only ever writes (timestamp, value) into the ring. Each
+# consumer (detector, CC sender, logger, plot) owns a RingReader with its
+# own cursor and pulls whole blocks whenever it gets around to it. If a
+# consumer falls more than one ring behind, the oldest samples it missed
+# are skipped and counted in reader.overruns — the sampler never waits.
+
+
+import threading
+import time
+
+import numpy as np
+
+from plant_ticker import Ticker
+
+
+# =========================
+# RING BUFFER
+# =========================
+
+class RingBuffer:
+    """Single-writer, multi-reader ring of timestamped samples.
+
+    With `tag_dtype` every sample also carries a small tag (e.g. the PGA
+    gain index it was taken at) and reads return (t_ns, values, tags).
+    """
+
+    def __init__(self, capacity, dtype=np.float64, tag_dtype=None):
+        self.capacity = int(capacity)
+        self.t = np.zeros(self.capacity, dtype=np.int64)   # ns
+        self.v = np.zeros(self.capacity, dtype=dtype)
+        self.tag = None if tag_dtype is None else np.zeros(self.capacity, dtype=tag_dtype)
+        self._cols = (self.t, self.v) if self.tag is None else (self.t, self.v, self.tag)
+        self.head = 0                # total samples ever written
+        self._cond = threading.Condition()
+
+    @property
+    def tagged(self):
+        return self.tag is not None
+
+    def write(self, t_ns, value, tag=0):
+        with self._cond:
+            i = self.head % self.capacity
+            self.t[i] = t_ns
+            self.v[i] = value
+            if self.tag is not None:
+                self.tag[i] = tag
+            self.head += 1
+            self._cond.notify_all()
+
+    def write_block(self, t_ns, values, tags=0):
+        n = len(t_ns)
+        if n == 0:
+            return
+        data = [t_ns, values]
+        if self.tag is not None:
+            data.append(np.broadcast_to(tags, (n,)))
+        skipped = 0
+        if n > self.capacity:
+            data = [d[-self.capacity:] for d in data]
+            skipped = n - self.capacity
+            n = self.capacity
+        with self._cond:
+            self.head += skipped
+            i = self.head % self.capacity
+            first = min(n, self.capacity - i)
+            for col, d in zip(self._cols, data):
+                col[i:i + first] = d[:first]
+                if first < n:
+                    col[:n - first] = d[first:]
+            self.head += n
+            self._cond.notify_all()
+
+    def _copy(self, start, n):
+        # caller holds the lock
+        i = start % self.capacity
+        if i + n <= self.capacity:
+            return tuple(col[i:i + n].copy() for col in self._cols)
+        idx = np.arange(start, start + n) % self.capacity
+        return tuple(col[idx] for col in self._cols)
+
+    def latest(self, n):
+        """Most recent `n` samples (fewer if not yet written), oldest first."""
+        with self._cond:
+            n = min(n, self.head, self.capacity)
+            return self._copy(self.head - n, n)
+
+    def reader(self, from_start=False):
+        return RingReader(self, 0 if from_start else self.head)
+
+
+class RingReader:
+    """Independent consumer cursor into a RingBuffer."""
+
+    def __init__(self, ring, cursor):
+        self.ring = ring
+        self.cursor = cursor
+        self.overruns = 0            # samples lost because we fell behind
+
+    @property
+    def pending(self):
+        return self.ring.head - self.cursor
+
+    def read(self, max_n=None, timeout=None):
+        """Return (t_ns, values[, tags]) for the samples since the last read.
+
+        Waits up to `timeout` seconds for at least one sample (None waits
+        forever, 0 never waits). Returns empty arrays on timeout.
+        """
+        ring = self.ring
+        with ring._cond:
+            if ring.head == self.cursor and timeout != 0:
+                ring._cond.wait_for(lambda: ring.head != self.cursor, timeout)
+            oldest = ring.head - ring.capacity
+            if self.cursor < oldest:
+                self.overruns += oldest - self.cursor
+                self.cursor = oldest
+            n = ring.head - self.cursor
+            if max_n is not None:
+                n = min(n, max_n)
+            out = ring._copy(self.cursor, n)
+            self.cursor += n
+        return out
+
+
+# =========================
+# ACQUISITION THREAD
+# =========================
+
+class AcquisitionThread(threading.Thread):
+    """Fill a RingBuffer from a sensor, independent of any consumer.
+
+    Give either `read_sample` (a zero-argument callable such as
+    `lambda: chan.voltage`, polled at `sample_hz` on absolute deadlines,
+    see plant_ticker.py, and stamped with time.monotonic_ns()) or
+    `read_block` (a callable taking a timeout and returning
+    (t_ns, values), e.g. ContinuousADS1115.read_volts). For a tagged
+    ring, read_sample returns (value, tag), e.g. RawADS1115.read_tagged.
+    """
+
+    def __init__(self, ring, read_sample=None, read_block=None, sample_hz=None):
+        super().__init__(name="plant-acq", daemon=True)
+        if (read_sample is None) == (read_block is None):
+            raise ValueError("give exactly one of read_sample or read_block")
+        if read_sample is not None and not sample_hz:
+            raise ValueError("read_sample needs sample_hz")
+        self.ring = ring
+        self.read_sample = read_sample
+        self.read_block = read_block
+        self.sample_hz = sample_hz
+        self.errors = 0              # failed sensor reads (I2C hiccups)
+        self._stop_event = threading.Event()
+        self.ticker = Ticker(sample_hz, self._stop_event) if read_sample is not None else None
+
+    @property
+    def missed_ticks(self):
+        """Sample deadlines skipped because a read ran long (polled mode)."""
+        return self.ticker.missed if self.ticker is not None else 0
+
+    def stop(self, timeout=1.0):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def run(self):
+        if self.read_block is not None:
+            self._run_block()
+        else:
+            self._run_polled()
+
+    def _run_block(self):
+        while not self._stop_event.is_set():
+            try:
+                block = self.read_block(0.1)
+            except Exception:
+                self.errors += 1
+                continue
+            self.ring.write_block(*block)
+
+    def _run_polled(self):
+        tagged = self.ring.tagged
+        while self.ticker.wait() is not None:
+            t_ns = time.monotonic_ns()
+            try:
+                v = self.read_sample()
+            except Exception:
+                self.errors += 1
+                continue
+            if tagged:
+                self.ring.write(t_ns, *v)
+            else:
+                self.ring.write(t_ns, v)
@@ -0,0 +1,257 @@
+#
+# plant_rollups.py
+#
+# Per-second / per-minute / per-hour statistics that survive restarts
+#
+# Tuning THRESHOLD_K or DRIFT_ACCUM_THRESHOLD for a particular plant needs
+# to see how it behaves over days and weeks, and weeks of raw samples
+# don't fit in memory. RollupStore keeps, for each of a few named channels
+# (level, |slope|, noise floor, events, ...), count / min / max / mean /
+# std per second, per minute and per hour:
+#
+#   - each level is a fixed ring of slots (a day of seconds, a week of
+#     minutes, a year of hours by default) in a NumPy structured array,
+#     memory-mapped onto its own .npy file in the store directory, so a
+#     systemd restart carries on where the last run stopped
+#   - a slot is addressed by period number (wall seconds // level length)
+#     modulo the ring size, and remembers which period it holds: a stale
+#     slot is reset when its period comes round again, nothing is ever
+#     shifted or appended
+#   - update() folds samples in with one reduceat per statistic per
+#     level, so a sample costs O(1) however long the store runs; live
+#     blocks of a sample or two are held until their second is over and
+#     folded in together, so that's once a second rather than 40 times
+#   - sums are kept about a per-slot reference value (the slot's first
+#     sample), so the variance of a 1.65 V level wobbling by microvolts
+#     doesn't cancel away in sum(x^2) - sum(x)^2 / n
+#
+# query() returns the slots of a time range, summary() combines them
+# (parallel-variance merge) into one set of numbers per channel. Run this
+# file on a store directory to print the last day hour by hour.
+
+
+import math
+import os
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+
+# =========================
+# USER-TUNABLE PARAMETERS
+# =========================
+
+ROLLUP_LEVELS = (            # (name, seconds per slot, slots kept)
+    ("second", 1, 86400),    # a day
+    ("minute", 60, 10080),   # a week
+    ("hour", 3600, 8760),    # a year
+)
+ROLLUP_FLUSH_S = 60.0        # msync the files at most this often (and on close)
+
+
+# Statistics for the slots of one channel (arrays, one entry per slot)
+RollupStats = namedtuple("RollupStats", "t_s count min max mean std")
+
+_STAT_DTYPE = np.dtype([("ref", "<f8"), ("min", "<f8"), ("max", "<f8"), ("s1", "<f8"), ("s2", "<f8")])
+
+
+def _slot_dtype(channels):
+    return np.dtype(
+        [("period", "<i8"), ("count", "<i8")] + [(name, _STAT_DTYPE) for name in channels]
+    )
+
+
+# =========================
+# STORE
+# =========================
+
+class RollupStore:
+    """Fixed-size, disk-backed rollups of named channels.
+
+    `clock_offset_ns` turns the sample timestamps into wall-clock ns (the
+    loop's t_ns are monotonic); by default it is measured at startup.
+    """
+
+    def __init__(self, path, channels, levels=ROLLUP_LEVELS, clock_offset_ns=None):
+        self.path = path
+        self.channels = tuple(channels)
+        self.levels = {name: (int(seconds), int(slots)) for name, seconds, slots in levels}
+        if clock_offset_ns is None:
+            clock_offset_ns = time.time_ns() - time.monotonic_ns()
+        self.clock_offset_ns = clock_offset_ns
+        os.makedirs(path, exist_ok=True)
+
+        dtype = _slot_dtype(self.channels)
+        self._arrays = {}
+        for name, (seconds, slots) in self.levels.items():
+            fn = os.path.join(path, f"{name}.npy")
+            if os.path.exists(fn):
+                arr = np.lib.format.open_memmap(fn, mode="r+")
+                if arr.dtype != dtype or arr.shape != (slots,):
+                    raise ValueError(
+                        f"{fn} holds different channels or slot count; move it away to start afresh"
+                    )
+            else:
+                arr = np.lib.format.open_memmap(fn, mode="w+", dtype=dtype, shape=(slots,))
+                arr["period"] = -1
+            self._arrays[name] = arr
+        self._last_flush = time.monotonic()
+        self._pending = []
+        self._pending_s = None       # wall second the held samples are in
+
+    def update(self, t_ns, *columns):
+        """Add one block: sample times plus one array per channel."""
+        t_ns = np.asarray(t_ns, dtype=np.int64)
+        if len(t_ns) == 0:
+            return
+        if len(columns) != len(self.channels):
+            raise ValueError(f"expected {len(self.channels)} channels, got {len(columns)}")
+        last_s = (int(t_ns[-1]) + self.clock_offset_ns) // 1000000000
+        if last_s == self._pending_s:
+            self._pending.append((t_ns, columns))
+            return
+        if self._pending:
+            self._pending.append((t_ns, columns))
+            t_ns = np.concatenate([p[0] for p in self._pending])
+            columns = [np.concatenate([p[1][i] for p in self._pending]) for i in range(len(self.channels))]
+            self._pending = []
+        if (int(t_ns[0]) + self.clock_offset_ns) // 1000000000 == last_s:
+            # all in one second still running: hold it
+            self._pending = [(t_ns, columns)]
+            self._pending_s = last_s
+            return
+        self._pending_s = None
+        self._fold(t_ns, columns)
+
+    def _fold(self, t_ns, columns):
+        wall_s = (t_ns + self.clock_offset_ns) // 1000000000
+        order = None
+        if np.any(np.diff(wall_s) < 0):
+            order = np.argsort(wall_s, kind="stable")
+            wall_s = wall_s[order]
+        cols = [np.asarray(c, dtype=np.float64) for c in columns]
+        if order is not None:
+            cols = [c[order] for c in cols]
+
+        for name, (seconds, slots) in self.levels.items():
+            period = wall_s // seconds
+            starts = np.flatnonzero(np.diff(period, prepend=period[0] - 1))
+            counts = np.diff(np.append(starts, len(period)))
+            periods = period[starts]
+            arr = self._arrays[name]
+            idx = periods % slots
+            rec = arr[idx]
+            fresh = rec["period"] != periods
+            rec["period"] = periods
+            rec["count"] = np.where(fresh, 0, rec["count"]) + counts
+            for ch, x in zip(self.channels, cols):
+                st = rec[ch]
+                ref = np.where(fresh, x[starts], st["ref"])
+                d = x - np.repeat(ref, counts)
+                st["ref"] = ref
+                st["min"] = np.minimum(np.where(fresh, np.inf, st["min"]), np.minimum.reduceat(x, starts))
+                st["max"] = np.maximum(np.where(fresh, -np.inf, st["max"]), np.maximum.reduceat(x, starts))
+                st["s1"] = np.where(fresh, 0.0, st["s1"]) + np.add.reduceat(d, starts)
+                st["s2"] = np.where(fresh, 0.0, st["s2"]) + np.add.reduceat(d * d, starts)
+                rec[ch] = st
+            arr[idx] = rec
+
+        now = time.monotonic()
+        if now - self._last_flush >= ROLLUP_FLUSH_S:
+            self.flush()
+            self._last_flush = now
+
+    def flush(self):
+        if self._pending:
+            t_ns = np.concatenate([p[0] for p in self._pending])
+            columns = [np.concatenate([p[1][i] for p in self._pending]) for i in range(len(self.channels))]
+            self._pending = []
+            self._pending_s = None
+            self._fold(t_ns, columns)
+        for arr in self._arrays.values():
+            arr.flush()
+
+    def close(self):
+        self.flush()
+        self._arrays = {}
+
+    def _slots(self, level, start_s, end_s):
+        seconds, slots = self.levels[level]
+        p0 = math.floor(start_s / seconds)
+        p1 = math.ceil(end_s / seconds)
+        periods = np.arange(max(p0, p1 - slots), p1, dtype=np.int64)
+        rec = self._arrays[level][periods % slots]
+        return rec[rec["period"] == periods], seconds
+
+    def query(self, level, start_s, end_s):
+        """{channel: RollupStats} for the held slots in [start_s, end_s) (wall seconds)."""
+        rec, seconds = self._slots(level, start_s, end_s)
+        n = rec["count"].astype(np.float64)
+        out = {}
+        for ch in self.channels:
+            st = rec[ch]
+            mean = st["ref"] + st["s1"] / n
+            m2 = np.maximum(st["s2"] - st["s1"] * st["s1"] / n, 0.0)
+            std = np.sqrt(m2 / np.maximum(n - 1, 1))
+            out[ch] = RollupStats(rec["period"] * seconds, rec["count"], st["min"], st["max"], mean, std)
+        return out
+
+    def summary(self, level, start_s, end_s):
+        """{channel: RollupStats} with everything in the range combined into one value each."""
+        rec, seconds = self._slots(level, start_s, end_s)
+        n = rec["count"].astype(np.float64)
+        total = float(n.sum())
+        out = {}
+        for ch in self.channels:
+            if total == 0:
+                out[ch] = RollupStats(float(start_s), 0, math.nan, math.nan, math.nan, math.nan)
+                continue
+            st = rec[ch]
+            means = st["ref"] + st["s1"] / n
+            m2 = np.maximum(st["s2"] - st["s1"] * st["s1"] / n, 0.0)
+            mean = float(np.dot(n, means) / total)
+            m2_all = float(m2.sum() + np.dot(n, (means - mean) ** 2))
+            out[ch] = RollupStats(
+                float(start_s), int(total), float(st["min"].min()), float(st["max"].max()),
+                mean, math.sqrt(m2_all / max(total - 1, 1)),
+            )
+        return out
+
+
+def open_existing(path, levels=ROLLUP_LEVELS):
+    """Open a store for reading without knowing its channels up front."""
+    fn = os.path.join(path, f"{levels[0][0]}.npy")
+    arr = np.lib.format.open_memmap(fn, mode="r")
+    channels = [name for name in arr.dtype.names if name not in ("period", "count")]
+    del arr
+    return RollupStore(path, channels, levels)
+
+
+# =========================
+# MAIN (print the last day)
+# =========================
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else "plant_rollups"
+    store = open_existing(path)
+    end = time.time()
+    start = end - 86400
+    hours = store.query("hour", start, end)
+    print(f"🌱 {path}: last 24 h, hour by hour")
+    for ch, st in hours.items():
+        print(f"  {ch}")
+        for i in range(len(st.t_s)):
+            stamp = time.strftime("%Y-%m-%d %H:00", time.localtime(st.t_s[i]))
+            print(
+                f"    {stamp}  n={st.count[i]:7d}  min={st.min[i]:+.5f}  max={st.max[i]:+.5f}  "
+                f"mean={st.mean[i]:+.5f}  std={st.std[i]:.5f}"
+            )
+    for ch, st in store.summary("minute", start, end).items():
+        print(f"  {ch:<8} 24 h: n={st.count} mean={st.mean:+.5f} std={st.std:.5f} "
+              f"min={st.min:+.5f} max={st.max:+.5f}")
+
+
+if __name__ == "__main__":
+    main()
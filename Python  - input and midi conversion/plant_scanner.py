@@ -0,0 +1,452 @@
+#
+# plant_scanner.py
+#
+# Plant wall scanner: up to 4 ADS1115 boards (0x48–0x4B) x 4 inputs (A0–A3)
+# on one I2C bus = 16 plants.
+#
+# Every board has its own converter, so each scan slot starts one
+# single-shot conversion on *every* board at once (each on the next
+# input of its own schedule), waits one conversion time and then reads
+# all boards back. Four boards therefore cost roughly the same wall time
+# as one. Each (address, input) gets its own RingBuffer, so every plant
+# can feed an independent detector.
+#
+# Per-channel schedule: a weight per input. A weight-2 input is visited
+# twice as often as a weight-1 input on the same board; 0 disables it.
+#
+# WallPlayer turns the wall into music: every channel gets its own
+# ChangeDetector and EventGate (its own seeded generator) and plays on
+# its own MIDI channel, in sorted (address, input) order, through one
+# shared scheduler and voice manager. A detector is timed by the spacing
+# its channel's samples actually arrive at, measured over a short
+# warm-up. main() runs it with PLAY, or just reports the per-channel
+# rates without.
+
+
+import math
+import threading
+import time
+
+import numpy as np
+
+from plant_ads1115 import (
+    ADS_GAIN,
+    REG_CONFIG,
+    REG_CONVERSION,
+    single_shot_config,
+    volts_per_code,
+)
+from plant_detector import (
+    DERIV_ALPHA,
+    NOISE_ALPHA,
+    SMOOTH_ALPHA,
+    ChangeDetector,
+    paced_hits,
+    timescale_alpha,
+)
+from plant_events import FULL_SCALE_V, EventGate, fresh_seed, make_rng
+from plant_ringbuffer import RingBuffer
+
+
+# =========================
+# USER-TUNABLE PARAMETERS
+# =========================
+
+BOARD_ADDRESSES = (0x48, 0x49, 0x4A, 0x4B)
+
+# (address, input) -> weight. Inputs not listed default to DEFAULT_WEIGHT.
+SCHEDULE = {
+    # (0x48, 0): 2,          # e.g. sample the first plant twice as often
+    # (0x4B, 3): 0,          # e.g. unused input
+}
+DEFAULT_WEIGHT = 1
+
+SCAN_DATA_RATE = 860         # per-conversion rate; higher = shorter slots
+SETTLE_MARGIN = 1.15         # ADS1115 oscillator is ±10%: wait a bit longer
+RING_SECONDS = 30.0
+REPORT_EVERY_S = 5.0
+
+PLAY = True                  # False: a sizing run, rates only
+POLL_S = 0.05                # how often the player drains the rings
+MAX_CHANNELS = 16            # one MIDI channel per plant, so at most 16 play
+SIGN_CHANGE_REQUIRED = True  # strong candidates must also be a derivative turn (a peak, not a ramp)
+OUTPUT_LOOKAHEAD_S = 0.05    # notes go out this long after their sample (plus jitter); above POLL_S
+CC_NUM = 74                  # per-channel level CC
+CC_RATE_HZ = 10.0
+RNG_SEED = None              # channel k's gate is seeded RNG_SEED + k; None = fresh (printed)
+WARMUP_S = 2.0               # samples a channel collects before its rate (and detector) is fixed
+TUNED_HZ = 40.0              # the rate plant_detector's alphas were tuned at (v3's detector rate)
+
+
+# =========================
+# HELPERS
+# =========================
+
+def interleave(weights):
+    """Smooth weighted round-robin order for {input: weight}.
+
+    {0: 2, 1: 1, 2: 1} -> [0, 1, 2, 0]: heavy inputs are spread out
+    rather than bunched, so their sample spacing stays even.
+    """
+    weights = {k: w for k, w in weights.items() if w > 0}
+    total = sum(weights.values())
+    current = {k: 0 for k in weights}
+    order = []
+    for _ in range(total):
+        for k in current:
+            current[k] += weights[k]
+        best = max(current, key=current.get)
+        current[best] -= total
+        order.append(best)
+    return order
+
+
+def build_schedule(addresses=BOARD_ADDRESSES, schedule=None, default_weight=DEFAULT_WEIGHT):
+    """{address: [input, input, ...]} visiting order for every board."""
+    schedule = SCHEDULE if schedule is None else schedule
+    plan = {}
+    for addr in addresses:
+        weights = {pin: schedule.get((addr, pin), default_weight) for pin in range(4)}
+        order = interleave(weights)
+        if order:
+            plan[addr] = order
+    return plan
+
+
+# =========================
+# SCANNER
+# =========================
+
+class _Board:
+    def __init__(self, device, address, order, gain, data_rate):
+        self.device = device
+        self.address = address
+        self.order = order
+        self.pos = 0
+        self.pending = None
+        # Prebuilt config writes, one per slot in the visiting order
+        self.writes = []
+        for pin in order:
+            cfg = single_shot_config(pin, gain, data_rate)
+            self.writes.append(bytes([REG_CONFIG, (cfg >> 8) & 0xFF, cfg & 0xFF]))
+
+
+class WallScanner(threading.Thread):
+    """Round-robin sampler for a wall of ADS1115 boards."""
+
+    def __init__(self, i2c, addresses=BOARD_ADDRESSES, schedule=None,
+                 gain=ADS_GAIN, data_rate=SCAN_DATA_RATE, ring_seconds=RING_SECONDS):
+        super().__init__(name="plant-scan", daemon=True)
+        from adafruit_bus_device.i2c_device import I2CDevice
+
+        self.gain = gain
+        self.data_rate = data_rate
+        self.conv_s = SETTLE_MARGIN / data_rate + 50e-6
+
+        plan = build_schedule(addresses, schedule)
+        self.boards = []
+        self.missing = []
+        for addr, order in plan.items():
+            try:
+                dev = I2CDevice(i2c, addr)
+            except ValueError:
+                self.missing.append(addr)
+                continue
+            self.boards.append(_Board(dev, addr, order, gain, data_rate))
+
+        # Ring capacity from the planned per-channel rate (upper bound)
+        slot_hz = 1.0 / self.conv_s
+        self.rings = {}
+        self.counts = {}
+        for b in self.boards:
+            for pin in set(b.order):
+                share = b.order.count(pin) / len(b.order)
+                cap = max(64, int(slot_hz * share * ring_seconds))
+                self.rings[(b.address, pin)] = RingBuffer(cap)
+                self.counts[(b.address, pin)] = 0
+
+        self.errors = 0
+        self.slots = 0
+        self._t0 = None
+        self._buf = bytearray(2)
+        self._ptr = bytes([REG_CONVERSION])
+        self._stop_event = threading.Event()
+
+    @property
+    def channels(self):
+        return sorted(self.rings)
+
+    def reader(self, address, pin):
+        return self.rings[(address, pin)].reader()
+
+    def stop(self, timeout=1.0):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    # ---- scan loop ----
+
+    def run(self):
+        self._t0 = time.monotonic_ns()
+        buf = self._buf
+        ptr = self._ptr
+        lsb = volts_per_code(self.gain)
+        half_conv_ns = int(self.conv_s * 0.5e9)
+        while not self._stop_event.is_set():
+            # Kick off one conversion on every board
+            t_start = time.monotonic_ns()
+            for b in self.boards:
+                b.pending = None
+                try:
+                    with b.device as i2c:
+                        i2c.write(b.writes[b.pos])
+                    b.pending = b.order[b.pos]
+                except OSError:
+                    self.errors += 1
+                b.pos = (b.pos + 1) % len(b.order)
+
+            time.sleep(self.conv_s)
+
+            # Collect results; stamp them mid-conversion
+            t_mid = t_start + half_conv_ns
+            for b in self.boards:
+                if b.pending is None:
+                    continue
+                try:
+                    with b.device as i2c:
+                        i2c.write_then_readinto(ptr, buf)
+                except OSError:
+                    self.errors += 1
+                    continue
+                code = (buf[0] << 8 | buf[1])
+                if code & 0x8000:
+                    code -= 0x10000
+                key = (b.address, b.pending)
+                self.rings[key].write(t_mid, code * lsb)
+                self.counts[key] += 1
+            self.slots += 1
+
+    # ---- sizing ----
+
+    def rates(self):
+        """Measured samples per second for every (address, input)."""
+        if self._t0 is None:
+            return {k: 0.0 for k in self.counts}
+        elapsed = (time.monotonic_ns() - self._t0) * 1e-9
+        if elapsed <= 0:
+            return {k: 0.0 for k in self.counts}
+        return {k: n / elapsed for k, n in self.counts.items()}
+
+    def planned_rates(self):
+        """Per-channel rate if every slot took exactly one conversion time."""
+        slot_hz = 1.0 / self.conv_s
+        out = {}
+        for b in self.boards:
+            for pin in set(b.order):
+                out[(b.address, pin)] = slot_hz * b.order.count(pin) / len(b.order)
+        return out
+
+    def report(self):
+        measured = self.rates()
+        planned = self.planned_rates()
+        lines = []
+        for key in self.channels:
+            addr, pin = key
+            lines.append(
+                f"  0x{addr:02X}:A{pin}  {measured[key]:7.1f} Hz  (planned {planned[key]:.1f} Hz)"
+            )
+        return "\n".join(lines)
+
+
+# =========================
+# PLAYER
+# =========================
+
+def retime_alpha(alpha, dt, tuned_hz=TUNED_HZ):
+    """The alpha with the same time constant at spacing `dt` as `alpha` at `tuned_hz`."""
+    return timescale_alpha(-1.0 / (tuned_hz * math.log(1.0 - alpha)), dt)
+
+
+class _Plant:
+    def __init__(self, key, midi_channel, reader):
+        self.key = key
+        self.midi_channel = midi_channel
+        self.reader = reader
+        self.dt = None
+        self.gate = None
+        self.detector = None         # made once the warm-up lap fixes dt
+        self.warmup = []             # (ts, vs) blocks until then
+        self.last_cc = 0.0
+        self.events = 0
+
+
+class WallPlayer:
+    """A detector and gate per scanner channel, each plant on its own MIDI channel.
+
+    Notes go to `notes` (plant_voices.VoiceManager or
+    plant_scheduler.NotePlayer), CCs to `scheduler`; `messages` is the
+    port's plant_midiout factory. poll() does one pass over every ring.
+
+    A channel's sample spacing is what its timestamps show over the first
+    `warmup_s` (I2C transactions make it several times the planned
+    conversion-only rate); its detector alphas are the 40 Hz-tuned ones
+    moved to that spacing, so the time constants stay the same.
+    """
+
+    def __init__(self, scanner, scheduler, notes, messages, seed=None,
+                 lookahead_s=OUTPUT_LOOKAHEAD_S, cc_num=CC_NUM, cc_rate_hz=CC_RATE_HZ,
+                 sign_change_required=SIGN_CHANGE_REQUIRED, warmup_s=WARMUP_S):
+        self.scheduler = scheduler
+        self.notes = notes
+        self.messages = messages
+        self.seed = seed if seed is not None else fresh_seed()
+        self.lookahead_ns = int(lookahead_s * 1e9)
+        self.cc_num = cc_num
+        self.cc_dt = 1.0 / cc_rate_hz if cc_rate_hz else None
+        self.sign_change_required = sign_change_required
+        self.warmup_ns = int(warmup_s * 1e9)
+
+        self.plants = [
+            _Plant(key, k, scanner.reader(*key))
+            for k, key in enumerate(scanner.channels[:MAX_CHANNELS])
+        ]
+
+    def _warm_up(self, p, ts, vs):
+        # hold the samples until they span warmup_s, then fix dt from them
+        p.warmup.append((ts, vs))
+        t0 = int(p.warmup[0][0][0])
+        n = sum(len(t) for t, _ in p.warmup)
+        if n < 2 or ts[-1] - t0 < self.warmup_ns:
+            return None
+        p.dt = float(ts[-1] - t0) * 1e-9 / (n - 1)
+        p.detector = ChangeDetector(
+            float(p.warmup[0][1][0]), p.dt,
+            smooth_alpha=retime_alpha(SMOOTH_ALPHA, p.dt),
+            deriv_alpha=retime_alpha(DERIV_ALPHA, p.dt),
+            noise_alpha=retime_alpha(NOISE_ALPHA, p.dt),
+        )
+        p.gate = EventGate(max_delay=min(0.04, p.dt), rng=make_rng(self.seed + p.midi_channel))
+        ts = np.concatenate([t for t, _ in p.warmup])
+        vs = np.concatenate([v for _, v in p.warmup])
+        p.warmup = None
+        return ts, vs
+
+    def poll(self):
+        """Run each channel's new samples through its chain; returns the notes played."""
+        played = []
+        msg = self.messages
+        for p in self.plants:
+            ts, vs = p.reader.read(timeout=0)
+            if len(ts) == 0:
+                continue
+            if p.detector is None:
+                block = self._warm_up(p, ts, vs)
+                if block is None:
+                    continue
+                ts, vs = block
+            frame = p.detector.process(vs)
+            times = (ts * 1e-9).tolist()
+            # this block's last sample is "now" on the scheduler clock
+            offset = self.scheduler.now() - int(ts[-1])
+
+            if self.cc_dt is not None:
+                cc_due, p.last_cc = paced_hits(times, p.last_cc, self.cc_dt)
+                if cc_due:
+                    self.scheduler.send_batch([
+                        msg.control_change(
+                            p.midi_channel, self.cc_num,
+                            int(min(max(float(frame.ema_v[i]) / FULL_SCALE_V * 127, 0), 127)),
+                        )
+                        for i in cc_due
+                    ])
+
+            if self.sign_change_required:
+                candidates = frame.force | (frame.strong & frame.sign_change)
+            else:
+                candidates = frame.force | frame.strong
+            for i in np.flatnonzero(candidates).tolist():
+                ev = p.gate.offer(
+                    times[i], bool(frame.force[i]), float(frame.mag[i]),
+                    float(frame.threshold[i]), float(frame.ema_v[i]),
+                )
+                if ev is None:
+                    continue
+                due = int(ts[i]) + offset + self.lookahead_ns + int(ev.delay * 1e9)
+                self.notes.play(ev.note, ev.velocity, ev.length, p.midi_channel, due)
+                p.events += 1
+                played.append((p.key, ev))
+        return played
+
+    def report(self):
+        return "  ".join(
+            f"0x{p.key[0]:02X}:A{p.key[1]}={p.events}"
+            + (f" ({1.0 / p.dt:.1f} Hz)" if p.dt else " (warming up)")
+            for p in self.plants
+        )
+
+
+# =========================
+# MAIN
+# =========================
+
+def main():
+    import board
+    import busio
+
+    i2c = busio.I2C(board.SCL, board.SDA)
+    scanner = WallScanner(i2c)
+
+    for addr in scanner.missing:
+        print(f"⚠ No ADS1115 at 0x{addr:02X} - skipped")
+    if not scanner.boards:
+        print("⚠ No boards found")
+        return
+    print(f"🌱 Scanning {len(scanner.channels)} channels on {len(scanner.boards)} board(s)")
+
+    player = None
+    if PLAY:
+        import mido
+        from plant_midiout import messages_for
+        from plant_scheduler import MidiScheduler
+        from plant_voices import VoiceManager
+
+        midi_out = mido.open_output('Plant_MIDI', virtual=True)
+        print("🌱 Plant MIDI port created")
+        msg = messages_for(midi_out)
+        scheduler = MidiScheduler(midi_out)
+        scheduler.start()
+        notes = VoiceManager(scheduler, messages=msg)
+        player = WallPlayer(scanner, scheduler, notes, msg, seed=RNG_SEED)
+        print(f"🎲 RNG seed {player.seed} (channel k: seed + k)")
+        for p in player.plants:
+            addr, pin = p.key
+            print(f"  0x{addr:02X}:A{pin} → MIDI channel {p.midi_channel + 1}")
+    print("Press Ctrl+C to stop")
+
+    scanner.start()
+    last_report = time.monotonic()
+    try:
+        while True:
+            if player is None:
+                time.sleep(REPORT_EVERY_S)
+            else:
+                time.sleep(POLL_S)
+                for (addr, pin), ev in player.poll():
+                    print(f"0x{addr:02X}:A{pin} note={ev.note} vel={ev.velocity}")
+            if time.monotonic() - last_report >= REPORT_EVERY_S:
+                last_report = time.monotonic()
+                print(f"slots={scanner.slots} i2c_errors={scanner.errors}")
+                print(scanner.report())
+                if player is not None:
+                    print(f"events: {player.report()}")
+    finally:
+        scanner.stop()
+        if player is not None:
+            scheduler.close()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nStopped 🌿")
@@ -0,0 +1,365 @@
+#
+# plant_scheduler.py
+#
+# One thread owning every MIDI message that goes out, now or later
+#
+# schedule_note_off() used to start a threading.Timer - an OS thread -
+# per note, each calling midi_out.send on its own whenever it woke, racing
+# the main loop's sends; and a Ctrl+C dropped all pending note-offs,
+# leaving notes hanging in Pd. MidiScheduler instead keeps future messages
+# in a binary heap keyed by due time (monotonic ns) and sends everything
+# from a single thread:
+#
+#   schedule(due_ns, msg, key)   O(log n) insert, returns a handle
+#   schedule_batch(due_ns, msgs) several at once, in order, one lock
+#   cancel(handle)               O(1): the entry is marked dead and skipped
+#                                (the heap is compacted when over half dead)
+#   steal(key)                   send the pending message for `key` right
+#                                now (from the thread, when there is one) -
+#                                e.g. end (channel, note) early so it can
+#                                be struck again
+#   send(msg)                    as soon as possible, in order with the rest
+#   close()                      stop, and send the pending note-offs (the
+#                                keyed messages) so nothing is left
+#                                sounding; note-ons and CCs not yet due
+#                                are dropped
+#
+# Without start() there is no thread: advance(now_ns) sends what's due by
+# `now_ns`, so a faster-than-real-time replay can run note-offs on signal
+# time. bench_scheduler.py times it with 10k pending notes.
+#
+# Messages can be scheduled ahead, jitter and all, instead of the caller
+# sleeping until they're due: the thread measures how late each one
+# actually goes out against its due time, into the same kind of
+# histogram plant_ticker.Ticker keeps (report()).
+#
+# NotePlayer is the note lifecycle on top: note_on now (or queued for a
+# due time), its note_off `length` later as a scheduled message, so a
+# sampling loop never has to sleep through a note.
+
+
+import bisect
+import heapq
+import threading
+import time
+
+from plant_midiout import MidoMessages
+from plant_ticker import JITTER_BINS_US
+
+
+# =========================
+# USER-TUNABLE PARAMETERS
+# =========================
+
+COMPACT_MIN = 1024           # don't bother rebuilding a heap with fewer dead entries than this
+
+
+# =========================
+# SCHEDULER
+# =========================
+
+class MidiScheduler:
+    """Time-ordered MIDI output through `out.send`, from one thread."""
+
+    def __init__(self, out, clock=time.monotonic_ns, bins_us=JITTER_BINS_US):
+        self.out = out
+        self.clock = clock
+        self._now = 0                # last advance() time, without a thread
+        self._heap = []              # [due_ns, seq, msg, key]; msg None = cancelled
+        self._keys = {}              # key -> its pending entry
+        self._seq = 0
+        self._dead = 0
+        self._cv = threading.Condition()
+        self._thread = None
+        self._stop = False
+
+        self.sent = 0
+        self.cancelled = 0
+        self.stolen = 0
+        self.errors = 0
+        self.max_pending = 0
+        self.bins_us = tuple(bins_us)
+        self.hist = [0] * (len(self.bins_us) + 1)
+        self.timed = 0               # sends the thread timed against their due time
+        self.max_late_ns = 0
+        self._late_sum_ns = 0
+
+    def __len__(self):
+        return len(self._heap) - self._dead
+
+    # ---- queue ----
+
+    def schedule(self, due_ns, msg, key=None):
+        """Send `msg` at `due_ns`; a `key` (e.g. (channel, note)) makes it stealable."""
+        with self._cv:
+            entry = [due_ns, self._seq, msg, key]
+            self._seq += 1
+            heapq.heappush(self._heap, entry)
+            if key is not None:
+                # the newest entry for a key is the one steal() finds; an
+                # older one still goes out at its own time (and on close)
+                self._keys[key] = entry
+            n = len(self._heap) - self._dead
+            if n > self.max_pending:
+                self.max_pending = n
+            if self._heap[0] is entry:
+                self._cv.notify()
+        return entry
+
+    def send(self, msg):
+        """Out as soon as possible, after anything already due."""
+        if self._thread is None:
+            self._send(msg)
+        else:
+            self.schedule(self.clock(), msg)
+
+    def send_batch(self, msgs):
+        """Several messages as soon as possible, in order: one lock, one wake-up."""
+        if self._thread is None:
+            self._send_all(msgs)
+        else:
+            self.schedule_batch(self.clock(), msgs)
+
+    def schedule_batch(self, due_ns, msgs):
+        """Several messages at `due_ns`, in order: one lock, one wake-up."""
+        with self._cv:
+            for msg in msgs:
+                heapq.heappush(self._heap, [due_ns, self._seq, msg, None])
+                self._seq += 1
+            n = len(self._heap) - self._dead
+            if n > self.max_pending:
+                self.max_pending = n
+            self._cv.notify()
+
+    def now(self):
+        """The scheduler's present: the clock, or the last advance() without a thread."""
+        return self.clock() if self._thread is not None else self._now
+
+    def is_pending(self, handle):
+        """True until the message behind `handle` is sent or cancelled."""
+        return handle is not None and handle[2] is not None
+
+    def pending(self, key):
+        entry = self._keys.get(key)
+        return entry if entry is not None and entry[2] is not None else None
+
+    def cancel(self, handle):
+        """Drop a scheduled message; False if it already went out."""
+        with self._cv:
+            return self._kill(handle)
+
+    def _kill(self, entry):
+        if entry[2] is None:
+            return False
+        entry[2] = None
+        if entry[3] is not None and self._keys.get(entry[3]) is entry:
+            del self._keys[entry[3]]
+        self._dead += 1
+        self.cancelled += 1
+        if self._dead > COMPACT_MIN and self._dead * 2 > len(self._heap):
+            self._heap = [e for e in self._heap if e[2] is not None]
+            heapq.heapify(self._heap)
+            self._dead = 0
+        return True
+
+    def steal(self, key):
+        """Send the pending message for `key` now (True if there was one).
+
+        With the thread running it goes back in the queue as due now, so
+        the thread sends it - ahead of anything scheduled after this call,
+        e.g. the note-on that follows - and close() still flushes it.
+        Without a thread it goes out right here.
+        """
+        with self._cv:
+            entry = self._keys.get(key)
+            if entry is None or entry[2] is None:
+                return False
+            msg = entry[2]
+            self._kill(entry)
+            self.cancelled -= 1
+            self.stolen += 1
+            if self._thread is not None:
+                # keyed, so close() flushes it, but not steal()-able again
+                heapq.heappush(self._heap, [self.clock(), self._seq, msg, key])
+                self._seq += 1
+                self._cv.notify()
+                return True
+        self._send(msg)
+        return True
+
+    # ---- sending ----
+
+    def _send(self, msg):
+        try:
+            self.out.send(msg)
+            self.sent += 1
+        except Exception:
+            self.errors += 1
+
+    def _send_all(self, msgs):
+        # in one call where the port takes batches (plant_midiout.RtMidiOutput)
+        send_batch = getattr(self.out, "send_batch", None)
+        if send_batch is None:
+            for msg in msgs:
+                self._send(msg)
+            return
+        try:
+            send_batch(msgs)
+            self.sent += len(msgs)
+        except Exception:
+            self.errors += 1
+
+    def _pop_due(self, now_ns, keyed_only=False):
+        # under the lock: (due_ns, msg) for every live entry due by now_ns,
+        # in order; the entries are marked gone so a late cancel() is a no-op.
+        # keyed_only drops the unkeyed ones instead of returning them
+        due = []
+        heap = self._heap
+        while heap and heap[0][0] <= now_ns:
+            entry = heapq.heappop(heap)
+            if entry[2] is None:
+                self._dead -= 1
+                continue
+            if entry[3] is not None and self._keys.get(entry[3]) is entry:
+                del self._keys[entry[3]]
+            if keyed_only and entry[3] is None:
+                self.cancelled += 1
+            else:
+                due.append((entry[0], entry[2]))
+            entry[2] = None
+        return due
+
+    def advance(self, now_ns):
+        """No thread: send everything due by `now_ns` (signal time in a replay)."""
+        with self._cv:
+            if now_ns > self._now:
+                self._now = now_ns
+            due = self._pop_due(now_ns)
+        if due:
+            self._send_all([msg for _, msg in due])
+
+    def _run(self):
+        while True:
+            with self._cv:
+                while True:
+                    if self._stop:
+                        return
+                    if self._heap:
+                        wait = self._heap[0][0] - self.clock()
+                        if wait <= 0:
+                            break
+                        self._cv.wait(wait / 1e9)
+                    else:
+                        self._cv.wait()
+                due = self._pop_due(self.clock())
+            # send outside the lock so the loop can keep scheduling
+            sent_ns = self.clock()
+            self._send_all([msg for _, msg in due])
+            for due_ns, _ in due:
+                late = sent_ns - due_ns
+                if late < 0:
+                    late = 0
+                self.hist[bisect.bisect_right(self.bins_us, late / 1000.0)] += 1
+                self._late_sum_ns += late
+                if late > self.max_late_ns:
+                    self.max_late_ns = late
+                self.timed += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="midi-scheduler", daemon=True)
+        self._thread.start()
+
+    def close(self, flush=True):
+        """Stop the thread; with flush, send the pending note-offs right away.
+
+        Only keyed entries (the note-offs NotePlayer and VoiceManager
+        schedule) go out; pending note-ons and CCs are dropped, so
+        stopping never plays notes that weren't due yet.
+        """
+        with self._cv:
+            self._stop = True
+            self._cv.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if flush:
+            with self._cv:
+                rest = self._pop_due(float("inf"), keyed_only=True)
+            if rest:
+                self._send_all([msg for _, msg in rest])
+
+    # ---- stats ----
+
+    def mean_late_us(self):
+        return self._late_sum_ns / self.timed / 1000.0 if self.timed else 0.0
+
+    def late_percentile_us(self, q):
+        """Upper bin edge holding the q-th percentile of lateness (None: the open last bin)."""
+        if not self.timed:
+            return 0.0
+        target = q / 100.0 * self.timed
+        seen = 0
+        for i, n in enumerate(self.hist):
+            seen += n
+            if seen >= target:
+                return self.bins_us[i] if i < len(self.bins_us) else None
+        return None
+
+    def report(self):
+        p99 = self.late_percentile_us(99)
+        lines = [
+            f"{self.sent} sent, {self.timed} on the thread: mean late={self.mean_late_us():.0f}us "
+            f"p99 <{p99 if p99 is not None else '...'}us max late={self.max_late_ns / 1000:.0f}us; "
+            f"pending={len(self)} (max {self.max_pending}) stolen={self.stolen} "
+            f"cancelled={self.cancelled} errors={self.errors}"
+        ]
+        edges = (0,) + self.bins_us
+        for i, (lo, n) in enumerate(zip(edges, self.hist)):
+            hi = self.bins_us[i] if i < len(self.bins_us) else None
+            label = f"{lo:>6}-{hi:<6}us" if hi is not None else f"{lo:>6}+      us"
+            share = n / self.timed * 100 if self.timed else 0.0
+            lines.append(f"  {label} {n:9d} {share:6.2f}%")
+        return "\n".join(lines)
+
+
+# =========================
+# NOTES
+# =========================
+
+class NotePlayer:
+    """note_on at `t_ns`, note_off `length` seconds after, without blocking."""
+
+    def __init__(self, scheduler, channel=0, messages=None):
+        self.scheduler = scheduler
+        self.channel = channel
+        self.messages = messages if messages is not None else MidoMessages()
+
+    def play(self, note, velocity, length, channel=None, t_ns=None):
+        """`t_ns`: when the note starts on the scheduler's time (default: now).
+
+        A start in the future is queued - that's how timing jitter and
+        look-ahead get in without anyone sleeping.
+        """
+        if channel is None:
+            channel = self.channel
+        key = (channel, note)
+        sched = self.scheduler
+        now = sched.now()
+        if t_ns is None or t_ns < now:
+            t_ns = now
+        off = self.messages.note_off(channel, note)
+        # the same note still sounding: end it as this one starts, so it's
+        # a fresh strike and the old note-off can't cut the new one short
+        old = sched.pending(key)
+        if old is not None:
+            if t_ns <= now:
+                sched.steal(key)
+            elif old[0] > t_ns:
+                sched.cancel(old)
+                sched.schedule(t_ns, off, key)
+        on = self.messages.note_on(channel, note, velocity)
+        if t_ns <= now:
+            sched.send(on)
+        else:
+            sched.schedule(t_ns, on)
+        sched.schedule(t_ns + int(length * 1e9), off, key)
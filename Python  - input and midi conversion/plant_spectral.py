@@ -0,0 +1,218 @@
+#
+# plant_spectral.py
+#
+# Streaming Welch spectrum of the detector input -> timbre features for CCs
+#
+# The only continuous output so far is one CC from the smoothed voltage.
+# SpectralFeatures keeps the last `nfft` samples, and every `hop` new
+# samples takes a Hann-windowed, mean-removed FFT frame (overlap is
+# nfft - hop) and averages the last `welch_frames` periodograms, Welch
+# style. From the averaged spectrum it reports, per frame:
+#
+#   band_power   power (V^2) in each of `bands` (Hz edges)
+#   total_power  power above DC
+#   centroid_hz  power-weighted mean frequency ("brightness")
+#   flatness     geometric / arithmetic mean of the spectrum, 0..1
+#                (tonal/1-over-f ~ 0, white noise ~ 1)
+#
+# Nothing is allocated per frame: the sample window, the windowed copy,
+# the rfft output, the power spectrum and the Welch history are all
+# preallocated and written in place (np.fft.rfft(out=...)). One frame
+# costs a fixed O(nfft log nfft), so the CPU spent is frames per second
+# (fs / hop) times that; `cpu_s` / `frames` measure it as it runs and
+# bench_spectral.py prints it per configuration. `max_frames` caps how
+# many frames a single process() call computes (the rest are skipped and
+# counted) so a late block after a stall can't turn into a burst of FFTs.
+
+
+import math
+import time
+from collections import namedtuple
+
+import numpy as np
+
+
+# =========================
+# USER-TUNABLE PARAMETERS
+# =========================
+
+SPECTRAL_NFFT = 256          # Samples per FFT frame (6.4 s at 40 Hz, 0.16 Hz bins)
+SPECTRAL_HOP = 40            # New samples between frames (one frame a second at 40 Hz)
+WELCH_FRAMES = 4             # Periodograms averaged per output
+SPECTRAL_BANDS = (           # Hz; bands above Nyquist are dropped
+    (0.1, 0.5),
+    (0.5, 2.0),
+    (2.0, 6.0),
+    (6.0, 20.0),
+)
+BAND_DB_RANGE = 40.0         # CC 0..127 spans this many dB of band share (0 dB = all the power)
+FLATNESS_DB_RANGE = 40.0     # CC 0..127 spans -this..0 dB of flatness
+
+
+SpectralFrame = namedtuple(
+    "SpectralFrame", "t_ns band_power total_power centroid_hz flatness"
+)
+
+
+# =========================
+# STREAMING WELCH
+# =========================
+
+class SpectralFeatures:
+    """Overlapping Hann frames every `hop` samples, Welch-averaged features."""
+
+    def __init__(self, fs, nfft=SPECTRAL_NFFT, hop=SPECTRAL_HOP,
+                 welch_frames=WELCH_FRAMES, bands=SPECTRAL_BANDS, max_frames=None):
+        if not 0 < hop <= nfft:
+            raise ValueError("hop must be between 1 and nfft")
+        self.fs = float(fs)
+        self.nfft = int(nfft)
+        self.hop = int(hop)
+        self.welch_frames = int(welch_frames)
+        self.max_frames = max_frames
+
+        nbins = self.nfft // 2 + 1
+        self.freqs = np.fft.rfftfreq(self.nfft, 1.0 / self.fs)
+        self.df = self.freqs[1]
+        self.bands = tuple((lo, hi) for lo, hi in bands if lo < self.fs / 2)
+        # [lo, hi) bin ranges; every band gets at least one bin
+        self._band_bins = []
+        for lo, hi in self.bands:
+            a = max(1, int(math.ceil(lo / self.df)))
+            b = max(a + 1, min(nbins, int(math.ceil(hi / self.df))))
+            self._band_bins.append((a, b))
+
+        # One-sided PSD scaling (V^2/Hz): |X|^2 / (fs * sum(w^2)), interior
+        # bins doubled for the folded negative frequencies
+        window = np.hanning(self.nfft + 1)[:-1]   # periodic Hann
+        self._window = window
+        self._scale = np.full(nbins, 2.0 / (self.fs * np.dot(window, window)))
+        self._scale[0] *= 0.5
+        if self.nfft % 2 == 0:
+            self._scale[-1] *= 0.5
+
+        self._buf = np.zeros(self.nfft)           # newest nfft samples, oldest first
+        self._fill = 0
+        self._work = np.empty(self.nfft)
+        self._spec = np.empty(nbins, dtype=complex)
+        self._pow = np.empty(nbins)
+        self._hist = np.zeros((self.welch_frames, nbins))
+        self._hist_i = 0
+        self._hist_n = 0
+        self._psum = np.zeros(nbins)
+        self._avg = np.empty(nbins - 1)           # averaged PSD without DC
+        self._log = np.empty(nbins - 1)
+
+        self.frames = 0              # frames computed
+        self.skipped = 0             # frames dropped by max_frames
+        self.cpu_s = 0.0             # time spent inside process()
+        self.samples = 0
+
+    @property
+    def frames_per_s(self):
+        return self.fs / self.hop
+
+    def cpu_load(self):
+        """Fraction of one core per second of signal processed so far."""
+        signal_s = self.samples / self.fs
+        return self.cpu_s / signal_s if signal_s > 0 else 0.0
+
+    def _frame(self):
+        # Welch segment: constant detrend, window, power spectrum - all in place
+        np.subtract(self._buf, self._buf.mean(), out=self._work)
+        np.multiply(self._work, self._window, out=self._work)
+        np.fft.rfft(self._work, out=self._spec)
+        np.abs(self._spec, out=self._pow)
+        np.square(self._pow, out=self._pow)
+        np.multiply(self._pow, self._scale, out=self._pow)
+
+        # running sum over the last welch_frames periodograms, re-summed
+        # exactly once per lap so subtract/add rounding can't creep
+        self._psum -= self._hist[self._hist_i]
+        self._hist[self._hist_i] = self._pow
+        self._psum += self._pow
+        self._hist_i += 1
+        if self._hist_i == self.welch_frames:
+            self._hist_i = 0
+            self._hist.sum(axis=0, out=self._psum)
+        if self._hist_n < self.welch_frames:
+            self._hist_n += 1
+        # a flat input leaves ~1e-20 residue of either sign in between
+        np.maximum(self._psum, 0.0, out=self._psum)
+
+        avg = self._avg
+        np.multiply(self._psum[1:], 1.0 / self._hist_n, out=avg)
+        total = float(avg.sum())
+        bands = [float(self._psum[a:b].sum()) * self.df / self._hist_n for a, b in self._band_bins]
+        if total <= 0.0:
+            return bands, 0.0, 0.0, 0.0
+        centroid = float(np.dot(self.freqs[1:], avg)) / total
+        np.add(avg, total * 1e-12, out=self._log)
+        geo = math.exp(float(np.log(self._log, out=self._log).mean()))
+        flatness = geo / (total / len(avg))
+        return bands, total * self.df, centroid, min(flatness, 1.0)
+
+    def process(self, t_ns, x):
+        """Feed a block; returns a SpectralFrame of the frames it completed."""
+        start = time.perf_counter()
+        x = np.asarray(x, dtype=float)
+        n = len(x)
+        self.samples += n
+        due = 0 if self._fill + n < self.nfft else 1 + (self._fill + n - self.nfft) // self.hop
+        skip = 0
+        if self.max_frames is not None and due > self.max_frames:
+            skip = due - self.max_frames
+            self.skipped += skip
+
+        out_t = []
+        out_rows = []
+        i = 0
+        while i < n:
+            take = min(n - i, self.nfft - self._fill)
+            self._buf[self._fill:self._fill + take] = x[i:i + take]
+            self._fill += take
+            i += take
+            if self._fill == self.nfft:
+                if skip:
+                    skip -= 1
+                else:
+                    out_t.append(t_ns[i - 1])
+                    out_rows.append(self._frame())
+                    self.frames += 1
+                # slide by one hop
+                self._buf[:self.nfft - self.hop] = self._buf[self.hop:]
+                self._fill = self.nfft - self.hop
+
+        nb = len(self.bands)
+        if out_rows:
+            result = SpectralFrame(
+                np.array(out_t, dtype=np.int64),
+                np.array([r[0] for r in out_rows]).reshape(-1, nb),
+                np.array([r[1] for r in out_rows]),
+                np.array([r[2] for r in out_rows]),
+                np.array([r[3] for r in out_rows]),
+            )
+        else:
+            e = np.empty(0)
+            result = SpectralFrame(np.empty(0, dtype=np.int64), np.empty((0, nb)), e, e, e)
+        self.cpu_s += time.perf_counter() - start
+        return result
+
+    def cc_values(self, frame):
+        """(k, len(bands) + 2) ints 0..127: band shares, centroid, flatness.
+
+        Band shares and flatness are in dB (a 1/f-ish plant spectrum puts
+        almost everything in the lowest band), the centroid on a log
+        frequency axis from the first bin to Nyquist.
+        """
+        eps = 1e-30
+        total = frame.total_power[:, None] + eps
+        share_db = 10.0 * np.log10(frame.band_power / total + eps)
+        bands = 1.0 + share_db / BAND_DB_RANGE
+        nyq = self.fs / 2
+        centroid = np.log(np.maximum(frame.centroid_hz, self.df) / self.df) / math.log(nyq / self.df)
+        flat = 1.0 + 10.0 * np.log10(frame.flatness + eps) / FLATNESS_DB_RANGE
+        scaled = np.column_stack([bands, centroid, flat]) * 127.0
+        # never let a degenerate frame reach MIDI as an out-of-range value
+        np.nan_to_num(scaled, copy=False, nan=0.0, posinf=127.0, neginf=0.0)
+        return np.clip(np.rint(scaled), 0, 127).astype(int)
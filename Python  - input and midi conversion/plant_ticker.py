@@ -0,0 +1,159 @@
+#
+# plant_ticker.py
+#
+# Drift-free fixed-rate ticker on absolute time.monotonic_ns() deadlines
+#
+# The sampling loops paced themselves with
+#
+#   elapsed = time.time() - last_time
+#   if elapsed < dt: time.sleep(dt - elapsed)
+#
+# which measures from whenever the previous iteration happened to wake:
+# every oversleep, slow I2C read or in-loop sleep pushes all later samples
+# back, so 40 Hz comes out as 38.something over an hour, and an NTP step
+# in time.time() can stall or burst the loop.
+#
+# Ticker.wait() instead sleeps until tick k's deadline t0 + k / hz,
+# computed exactly in integer ns from the start, on the monotonic clock.
+# Lateness never accumulates. If the loop was held up past whole ticks
+# those ticks are counted as missed and skipped (not replayed in a burst),
+# and every wake-up's lateness goes into a histogram.
+
+
+import bisect
+import threading
+import time
+from fractions import Fraction
+
+
+# =========================
+# USER-TUNABLE PARAMETERS
+# =========================
+
+# Lateness histogram bin edges in microseconds (last bin is "more than")
+JITTER_BINS_US = (50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000)
+
+
+# =========================
+# TICKER
+# =========================
+
+class Ticker:
+    """Fixed-rate deadlines; wait() returns each tick's scheduled time in ns.
+
+    Give `stop_event` (a threading.Event) to make wait() return None as
+    soon as it is set instead of sleeping out the period.
+    """
+
+    def __init__(self, hz, stop_event=None, bins_us=JITTER_BINS_US):
+        # Exact rational period, so e.g. 860 Hz doesn't lose 0.7 ns a tick
+        rate = Fraction(hz).limit_denominator(1000000)
+        self.hz = float(rate)
+        self._ns_num = 1000000000 * rate.denominator
+        self._ns_den = rate.numerator
+        self.period_ns = self._ns_num // self._ns_den
+        self.stop_event = stop_event if stop_event is not None else threading.Event()
+
+        self.bins_us = tuple(bins_us)
+        self.hist = [0] * (len(self.bins_us) + 1)
+        self.ticks = 0               # deadlines served
+        self.missed = 0              # deadlines skipped because we woke too late
+        self.max_late_ns = 0
+        self._late_sum_ns = 0
+        self._t0 = None
+        self._k = 0
+
+    def _deadline(self, k):
+        return self._t0 + k * self._ns_num // self._ns_den
+
+    def start(self, t0_ns=None):
+        """Anchor tick 0 (default: now). Called by the first wait() if needed."""
+        self._t0 = time.monotonic_ns() if t0_ns is None else t0_ns
+        self._k = 0
+
+    def wait(self):
+        if self._t0 is None:
+            self.start()
+        deadline = self._deadline(self._k)
+        now = time.monotonic_ns()
+        if now < deadline:
+            if self.stop_event.wait((deadline - now) / 1e9):
+                return None
+            now = time.monotonic_ns()
+        elif self.stop_event.is_set():
+            return None
+
+        late = now - deadline
+        if late >= self.period_ns:
+            # Held up past whole ticks: skip them and serve the latest one
+            skip = late // self.period_ns
+            while self._deadline(self._k + skip) > now:
+                skip -= 1
+            self.missed += skip
+            self._k += skip
+            deadline = self._deadline(self._k)
+            late = now - deadline
+
+        self.hist[bisect.bisect_right(self.bins_us, late / 1000.0)] += 1
+        self._late_sum_ns += late
+        if late > self.max_late_ns:
+            self.max_late_ns = late
+        self.ticks += 1
+        self._k += 1
+        return deadline
+
+    # ---- stats ----
+
+    def rate_hz(self):
+        """Ticks actually served per second since start()."""
+        if self._t0 is None or self.ticks == 0:
+            return 0.0
+        elapsed = time.monotonic_ns() - self._t0
+        return self.ticks * 1e9 / elapsed if elapsed > 0 else 0.0
+
+    def mean_late_us(self):
+        return self._late_sum_ns / self.ticks / 1000.0 if self.ticks else 0.0
+
+    def histogram(self):
+        """[(lo_us, hi_us, count)], hi_us None for the open last bin."""
+        edges = (0,) + self.bins_us
+        return [
+            (lo, self.bins_us[i] if i < len(self.bins_us) else None, n)
+            for i, (lo, n) in enumerate(zip(edges, self.hist))
+        ]
+
+    def report(self):
+        lines = [
+            f"{self.ticks} ticks @ {self.rate_hz():.4f} Hz (target {self.hz:g}), "
+            f"missed={self.missed} mean late={self.mean_late_us():.0f}us "
+            f"max late={self.max_late_ns / 1000:.0f}us"
+        ]
+        for lo, hi, n in self.histogram():
+            label = f"{lo:>6}-{hi:<6}us" if hi is not None else f"{lo:>6}+      us"
+            share = n / self.ticks * 100 if self.ticks else 0.0
+            lines.append(f"  {label} {n:9d} {share:6.2f}%")
+        return "\n".join(lines)
+
+
+# =========================
+# MAIN (bench check)
+# =========================
+
+def main():
+    hz = 40.0
+    seconds = 30.0
+    ticker = Ticker(hz)
+    print(f"🌱 Ticker @ {hz:g} Hz for {seconds:g} s (one 0.3 s stall at 10 s)")
+    ticker.start()
+    while ticker.ticks < hz * seconds:
+        ticker.wait()
+        if ticker.ticks == int(hz * 10):
+            time.sleep(0.3)
+    print(ticker.report())
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nStopped 🌿")
@@ -0,0 +1,251 @@
+#
+# plant_tuner.py
+#
+# Offline parameter sweep over a recorded session, on every core
+#
+# Tuning plant_midi_raw_active_3.py by ear takes hours per plant. This
+# runs the same detector (plant_detector.py) and the same note decisions
+# (plant_events.EventGate) over a session recorded with RECORD_PATH, for
+# a grid or a random sample of parameter sets, one set per worker process,
+# and reports for each set:
+#
+#   notes/min      how busy it is
+#   interval s     5th / 50th / 95th percentile time between notes
+#   velocity       histogram over 8 bands of 16, as a bar sparkline
+#   pitch          distinct notes played and the lowest..highest
+#
+# Every set uses the same RNG seed, so the differences between rows come
+# from the parameters, not the dice. Anything not swept keeps its value
+# from plant_midi_raw_active_3.py. The sweep covers the detector and the
+# note gating; CCs, the EMA bank, detrending and artifact handling aren't
+# part of it.
+#
+#   python3 plant_tuner.py [session.bin]
+#
+# Workers memory-map the session, so N of them share one copy of it.
+
+
+import itertools
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import plant_midi_raw_active_3 as v3
+from plant_backends import load_session
+from plant_detector import ChangeDetector, ZScoreDetector
+from plant_events import EventGate, make_rng
+
+
+# =========================
+# USER-TUNABLE PARAMETERS
+# =========================
+
+SESSION_PATH = "plant_session.bin"
+SEARCH = "grid"              # "grid": every combination of GRID; "random": RANDOM_SETS draws from RANDOM_SPACE
+GRID = {
+    "THRESHOLD_K": (0.3, 0.5, 0.8),
+    "THRESH_MULTIPLIER": (1.4, 1.8, 2.4),
+    "DRIFT_ACCUM_THRESHOLD": (0.001, 0.002, 0.004),
+    "MIN_EVENT_INTERVAL": (2.0, 3.0, 5.0),
+}
+RANDOM_SPACE = {             # name: (low, high, "lin" | "log" | "int") or a tuple of choices
+    "THRESHOLD_K": (0.2, 1.5, "log"),
+    "THRESH_MULTIPLIER": (1.0, 3.0, "lin"),
+    "DRIFT_ACCUM_THRESHOLD": (0.0005, 0.01, "log"),
+    "NOISE_ALPHA": (0.005, 0.1, "log"),
+    "MIN_EVENT_INTERVAL": (1.0, 8.0, "lin"),
+    "PROB_BASE": (0.05, 0.5, "lin"),
+    "SIGN_CHANGE_REQUIRED": (True, False),
+}
+RANDOM_SETS = 64
+SEED = 0                     # note-gating RNG seed (same for every set) and random-search seed
+WORKERS = None               # None = every core
+TARGET_NOTES_PER_MIN = 1.0   # results are listed closest-first to this
+RESULTS_CSV = "tuner_results.csv"   # None to skip
+BLOCK = 65536                # detector block (bounds each worker's memory)
+
+# The v3 settings a sweep may change
+TUNABLE = (
+    "DETECTOR", "ZSCORE_MODE", "ZSCORE_WINDOW_S", "ZSCORE_K",
+    "SMOOTH_ALPHA", "DERIV_ALPHA", "NOISE_ALPHA", "THRESHOLD_K", "MIN_NOISE",
+    "DRIFT_ACCUM_THRESHOLD", "THRESH_MULTIPLIER", "SIGN_CHANGE_REQUIRED",
+    "REFRACTORY_S", "PROB_BASE", "PROB_SCALE", "MIN_EVENT_INTERVAL",
+    "EVENT_SUPPRESSION_MIN", "EVENT_SUPPRESSION_SCALE", "BASE_NOTE", "NOTE_SPAN",
+)
+
+SPARK = " ▁▂▃▄▅▆▇█"
+
+
+# =========================
+# ONE PARAMETER SET
+# =========================
+
+def defaults():
+    return {name: getattr(v3, name) for name in TUNABLE}
+
+
+def run_set(path, overrides, seed=SEED):
+    """Detector + note gating over the whole session; returns the metrics dict."""
+    p = defaults()
+    p.update(overrides)
+    t, v = load_session(path)
+    fs = 1e9 / float(np.median(np.diff(t[:10000])))
+    dt = 1.0 / fs
+    first_v = float(v[0])
+
+    if p["DETECTOR"] == "zscore":
+        detector = ZScoreDetector(
+            first_v, dt, window_s=p["ZSCORE_WINDOW_S"], k=p["ZSCORE_K"], mode=p["ZSCORE_MODE"],
+            smooth_alpha=p["SMOOTH_ALPHA"], deriv_alpha=p["DERIV_ALPHA"],
+        )
+    else:
+        detector = ChangeDetector(
+            first_v, dt, smooth_alpha=p["SMOOTH_ALPHA"], deriv_alpha=p["DERIV_ALPHA"],
+            noise_alpha=p["NOISE_ALPHA"], threshold_k=p["THRESHOLD_K"], min_noise=p["MIN_NOISE"],
+            drift_threshold=p["DRIFT_ACCUM_THRESHOLD"], thresh_multiplier=p["THRESH_MULTIPLIER"],
+        )
+    gate = EventGate(
+        refractory_s=p["REFRACTORY_S"], min_event_interval=p["MIN_EVENT_INTERVAL"],
+        suppression_min=p["EVENT_SUPPRESSION_MIN"], suppression_scale=p["EVENT_SUPPRESSION_SCALE"],
+        prob_base=p["PROB_BASE"], prob_scale=p["PROB_SCALE"], base_note=p["BASE_NOTE"],
+        note_span=p["NOTE_SPAN"], max_delay=min(0.04, dt), rng=make_rng(seed, v3.RNG_BLOCKS),
+    )
+
+    ev_t = []
+    notes = []
+    vels = []
+    for s in range(0, len(v), BLOCK):
+        frame = detector.process(np.asarray(v[s:s + BLOCK]))
+        if p["SIGN_CHANGE_REQUIRED"]:
+            candidates = frame.force | (frame.strong & frame.sign_change)
+        else:
+            candidates = frame.force | frame.strong
+        idx = np.flatnonzero(candidates)
+        if len(idx) == 0:
+            continue
+        times = (t[s:s + BLOCK][idx] * 1e-9).tolist()
+        force = frame.force[idx].tolist()
+        mag = frame.mag[idx].tolist()
+        thr = frame.threshold[idx].tolist()
+        level = frame.ema_v[idx].tolist()
+        for k in range(len(idx)):
+            ev = gate.offer(times[k], force[k], mag[k], thr[k], level[k])
+            if ev is not None:
+                ev_t.append(times[k])
+                notes.append(ev.note)
+                vels.append(ev.velocity)
+
+    minutes = (int(t[-1]) - int(t[0])) * 1e-9 / 60.0
+    intervals = np.diff(ev_t) if len(ev_t) > 1 else np.zeros(0)
+    q = np.percentile(intervals, (5, 50, 95)) if len(intervals) else (math.nan,) * 3
+    vel_hist = np.histogram(vels, bins=8, range=(0, 128))[0]
+    return dict(
+        params=overrides,
+        notes=len(notes),
+        notes_per_min=len(notes) / minutes if minutes > 0 else 0.0,
+        interval_p5=float(q[0]),
+        interval_p50=float(q[1]),
+        interval_p95=float(q[2]),
+        vel_hist=vel_hist.tolist(),
+        distinct_notes=len(set(notes)),
+        note_lo=min(notes) if notes else None,
+        note_hi=max(notes) if notes else None,
+    )
+
+
+# =========================
+# SEARCH
+# =========================
+
+def grid_sets(grid):
+    names = list(grid)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(grid[n] for n in names))]
+
+
+def random_sets(space, n, seed):
+    rng = random.Random(seed)
+    sets = []
+    for _ in range(n):
+        params = {}
+        for name, spec in space.items():
+            if len(spec) == 3 and spec[2] in ("lin", "log", "int"):
+                lo, hi, kind = spec
+                if kind == "log":
+                    params[name] = math.exp(rng.uniform(math.log(lo), math.log(hi)))
+                elif kind == "int":
+                    params[name] = rng.randint(lo, hi)
+                else:
+                    params[name] = rng.uniform(lo, hi)
+            else:
+                params[name] = rng.choice(spec)
+        sets.append(params)
+    return sets
+
+
+def sparkline(hist):
+    top = max(hist) or 1
+    return "".join(SPARK[round(h / top * (len(SPARK) - 1))] for h in hist)
+
+
+def fmt_params(params):
+    return " ".join(
+        f"{k}={v:.4g}" if isinstance(v, float) else f"{k}={v}" for k, v in params.items()
+    )
+
+
+def write_csv(path, results):
+    names = sorted({k for r in results for k in r["params"]})
+    cols = ["notes", "notes_per_min", "interval_p5", "interval_p50", "interval_p95",
+            "distinct_notes", "note_lo", "note_hi"]
+    with open(path, "w") as f:
+        f.write(",".join(names + cols + [f"vel_{16 * i}" for i in range(8)]) + "\n")
+        for r in results:
+            row = [r["params"].get(n, "") for n in names] + [r[c] for c in cols] + r["vel_hist"]
+            f.write(",".join("" if x is None else str(x) for x in row) + "\n")
+
+
+# =========================
+# MAIN
+# =========================
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else SESSION_PATH
+    sets = grid_sets(GRID) if SEARCH == "grid" else random_sets(RANDOM_SPACE, RANDOM_SETS, SEED)
+    workers = WORKERS or os.cpu_count()
+    t, _ = load_session(path)
+    hours = (int(t[-1]) - int(t[0])) * 1e-9 / 3600
+    print(f"🌱 {len(sets)} parameter sets over {path} ({hours:.1f} h) on {workers} processes")
+
+    start = time.monotonic()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_set, path, params) for params in sets]
+        for fut in as_completed(futures):
+            results.append(fut.result())
+            if len(results) % max(1, len(sets) // 10) == 0:
+                print(f"  {len(results)}/{len(sets)} done, {time.monotonic() - start:.0f} s")
+
+    target = math.log(TARGET_NOTES_PER_MIN)
+    results.sort(key=lambda r: abs(math.log(max(r["notes_per_min"], 1e-6)) - target))
+    print(f"🌿 {len(sets)} sets in {time.monotonic() - start:.1f} s, closest to "
+          f"{TARGET_NOTES_PER_MIN:g} notes/min first")
+    print(f"{'notes/min':>9} {'interval p5/p50/p95 s':>22} {'velocity':>9} {'pitch':>14}  params")
+    for r in results:
+        pitch = f"{r['distinct_notes']} ({r['note_lo']}..{r['note_hi']})" if r["notes"] else "-"
+        print(
+            f"{r['notes_per_min']:9.2f} "
+            f"{r['interval_p5']:6.1f}/{r['interval_p50']:6.1f}/{r['interval_p95']:7.1f}  "
+            f"{sparkline(r['vel_hist']):>9} {pitch:>14}  {fmt_params(r['params'])}"
+        )
+    if RESULTS_CSV:
+        write_csv(RESULTS_CSV, results)
+        print(f"results → {RESULTS_CSV}")
+
+
+if __name__ == "__main__":
+    main()
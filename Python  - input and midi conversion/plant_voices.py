@@ -0,0 +1,187 @@
+#
+# plant_voices.py
+#
+# Polyphonic voice manager: which notes are sounding, a voice cap, stealing
+#
+# NotePlayer (plant_scheduler.py) plays each note and forgets it. Nothing
+# caps how many voices pile up in Pd's bop.synth~, and with the look-ahead
+# queue a note's own on and off can both still be pending when the same
+# pitch comes round again. VoiceManager keeps the state of every
+# (channel, note) in 16 x 128 arrays - which voice slot it holds, when it
+# starts and stops, how often it was struck - plus a small table of
+# MAX_VOICES slots, and per note played:
+#
+#   - the same note already sounding (or queued): a retrigger - the old
+#     one ends exactly as the new one starts (cancelled outright if it
+#     hadn't started yet), and the new one takes over its slot, so an old
+#     note-off can never cut the new note short
+#   - a free slot (its note-off is due by then): take it
+#   - all MAX_VOICES slots busy: steal one - the longest-sounding
+#     ("oldest") or the softest, oldest first among equals ("quietest") -
+#     ending it as the new note starts
+#
+# Voices are allotted in start order, so a note is never queued to start
+# before the one played ahead of it (jitter can't reorder two notes;
+# the later one starts with the earlier at the soonest).
+#
+# Lookups go through the arrays; the only search is over the slot table,
+# which is bounded by MAX_VOICES, so every note costs the same however
+# long the run or however many notes have been played.
+
+
+import numpy as np
+
+from plant_midiout import MidoMessages
+
+
+# =========================
+# USER-TUNABLE PARAMETERS
+# =========================
+
+MAX_VOICES = 8               # notes sounding at once, all channels together
+VOICE_STEAL = "oldest"       # "oldest": the one sounding longest; "quietest": lowest velocity (then oldest)
+
+CHANNELS = 16
+NOTES = 128
+
+
+# =========================
+# VOICES
+# =========================
+
+class VoiceManager:
+    """NotePlayer with a voice cap, stealing and retrigger handling.
+
+    play() has NotePlayer's signature; messages (from `messages`, a
+    plant_midiout factory) go through `scheduler` (a
+    plant_scheduler.MidiScheduler), times are on its clock.
+    """
+
+    def __init__(self, scheduler, max_voices=MAX_VOICES, steal=VOICE_STEAL, channel=0, messages=None):
+        if steal not in ("oldest", "quietest"):
+            raise ValueError(f"steal must be 'oldest' or 'quietest', not {steal!r}")
+        self.scheduler = scheduler
+        self.max_voices = int(max_voices)
+        self.steal = steal
+        self.channel = channel
+        self.messages = messages if messages is not None else MidoMessages()
+
+        # per (channel, note)
+        self.slot_of = np.full((CHANNELS, NOTES), -1, dtype=np.int16)
+        self.start_ns = np.zeros((CHANNELS, NOTES), dtype=np.int64)
+        self.off_ns = np.zeros((CHANNELS, NOTES), dtype=np.int64)
+        self.strikes = np.zeros((CHANNELS, NOTES), dtype=np.int32)
+
+        # per voice slot
+        n = self.max_voices
+        self._key = [None] * n       # (channel, note) or None
+        self._start = [0] * n
+        self._off = [0] * n
+        self._vel = [0] * n
+        self._on_handle = [None] * n
+        self._off_handle = [None] * n
+
+        self._last_start = 0
+        self.played = 0
+        self.retriggered = 0
+        self.stolen = 0
+
+    def sounding(self, now_ns=None):
+        """How many voices are held at `now_ns` (default: the scheduler's now)."""
+        now = self.scheduler.now() if now_ns is None else now_ns
+        return sum(1 for k, s, o in zip(self._key, self._start, self._off) if k is not None and s <= now < o)
+
+    def _end(self, slot, at_ns, now):
+        # end the voice in `slot` at `at_ns`: drop it if it hadn't started
+        # by then, otherwise move its note-off up to `at_ns`
+        sched = self.scheduler
+        ch, note = self._key[slot]
+        if self.start_ns[ch, note] >= at_ns and sched.is_pending(self._on_handle[slot]):
+            sched.cancel(self._on_handle[slot])
+            sched.cancel(self._off_handle[slot])
+        elif sched.is_pending(self._off_handle[slot]) and self.off_ns[ch, note] > at_ns:
+            if at_ns <= now:
+                sched.steal((ch, note))
+            else:
+                sched.cancel(self._off_handle[slot])
+                sched.schedule(at_ns, self.messages.note_off(ch, note), (ch, note))
+        self.slot_of[ch, note] = -1
+        self._key[slot] = None
+
+    def _victim(self, t_ns):
+        # a slot free by t_ns, else the one the steal policy picks
+        best = -1
+        for i in range(self.max_voices):
+            if self._key[i] is None or self._off[i] <= t_ns:
+                return i, False
+            if best < 0:
+                best = i
+            elif self.steal == "quietest" and self._vel[i] != self._vel[best]:
+                if self._vel[i] < self._vel[best]:
+                    best = i
+            elif self._start[i] < self._start[best]:
+                best = i
+        return best, True
+
+    def play(self, note, velocity, length, channel=None, t_ns=None):
+        """note_on at `t_ns` (default: now), note_off `length` seconds later."""
+        if channel is None:
+            channel = self.channel
+        sched = self.scheduler
+        now = sched.now()
+        if t_ns is None or t_ns < now:
+            t_ns = now
+        if t_ns < self._last_start:
+            t_ns = self._last_start
+        self._last_start = t_ns
+        off_ns = t_ns + int(length * 1e9)
+
+        slot = int(self.slot_of[channel, note])
+        if slot >= 0 and self.off_ns[channel, note] > t_ns:
+            self.retriggered += 1
+            self._end(slot, t_ns, now)
+        else:
+            if slot >= 0:
+                # finished before this one starts: its slot is simply free
+                self.slot_of[channel, note] = -1
+                self._key[slot] = None
+            slot, steal = self._victim(t_ns)
+            if self._key[slot] is not None:
+                if steal:
+                    self.stolen += 1
+                    self._end(slot, t_ns, now)
+                else:
+                    old = self._key[slot]
+                    self.slot_of[old] = -1
+
+        on = self.messages.note_on(channel, note, velocity)
+        if t_ns <= now:
+            sched.send(on)
+            on_handle = None
+        else:
+            on_handle = sched.schedule(t_ns, on)
+        off_handle = sched.schedule(
+            off_ns, self.messages.note_off(channel, note), (channel, note)
+        )
+
+        self._key[slot] = (channel, note)
+        self._start[slot] = t_ns
+        self._off[slot] = off_ns
+        self._vel[slot] = velocity
+        self._on_handle[slot] = on_handle
+        self._off_handle[slot] = off_handle
+        self.slot_of[channel, note] = slot
+        self.start_ns[channel, note] = t_ns
+        self.off_ns[channel, note] = off_ns
+        self.strikes[channel, note] += 1
+        self.played += 1
+        return slot
+
+    def summary(self):
+        struck = int(np.count_nonzero(self.strikes))
+        ch, note = np.unravel_index(int(np.argmax(self.strikes)), self.strikes.shape)
+        return (
+            f"{self.played} notes, {self.retriggered} retriggered, {self.stolen} voices stolen "
+            f"(max {self.max_voices}, {self.steal}); {self.sounding()} sounding, "
+            f"{struck} distinct notes, most struck ch{ch} note {note} x{self.strikes[ch, note]}"
+        )
@@ -5,24 +5,20 @@ import busio
 import adafruit_ads1x15.ads1115 as ADS
 from adafruit_ads1x15.analog_in import AnalogIn
 import mido
-import numpy as np
+
+from plant_smoothing import RollingMean
 
 i2c = busio.I2C(board.SCL, board.SDA)
 ads = ADS.ADS1115(i2c)
 chan = AnalogIn(ads, ADS.P0)
 
 outport = mido.open_output()
-history = []
-
-def smooth(data, window_size=5):
-    if len(data) < window_size:
-        return data[-1]
-    return np.mean(data[-window_size:])
+# Last 5 samples only (RollingMedian(5) instead rides out single spikes)
+smoother = RollingMean(5)
 
 while True:
     voltage = chan.voltage
-    history.append(voltage)
-    smoothed = smooth(history)
+    smoothed = smoother.update(voltage)
     midi_value = int((smoothed / 3.3) * 127)
     midi_value = max(0, min(127, midi_value))
     msg = mido.Message('control_change', control=2, value=midi_value)
@@ -0,0 +1,118 @@
+#
+# plant_smoothing.py
+#
+# Fixed-size rolling-window smoothers for the simple plant -> MIDI scripts
+#
+# The smoothed scripts kept every sample ever read in `history = []` and
+# took np.mean(history[-window_size:]) each tick: memory grows for as long
+# as the service runs (weeks under systemd Restart=always) and every tick
+# pays a list slice plus a NumPy conversion for five numbers.
+#
+# These keep only the last `window` samples in a preallocated ring:
+#
+#   RollingMean          running sum, O(1) per sample
+#   RollingMedian        sorted window, rides out single-sample spikes
+#   RollingTrimmedMean   mean of the window minus the `trim` highest/lowest
+#
+# All three start out like the old smooth(): until the window has filled
+# they return the newest sample unchanged.
+
+
+import bisect
+import math
+
+
+# =========================
+# SMOOTHERS
+# =========================
+
+class RollingMean:
+    """Mean of the last `window` samples via a running sum."""
+
+    def __init__(self, window=5):
+        self.window = int(window)
+        self._buf = [0.0] * self.window
+        self._i = 0                  # next slot to overwrite
+        self._n = 0                  # samples held (<= window)
+        self._sum = 0.0
+        self.value = None
+
+    def __len__(self):
+        return self._n
+
+    def update(self, x):
+        x = float(x)
+        old = self._buf[self._i]
+        self._buf[self._i] = x
+        self._i += 1
+        if self._i == self.window:
+            self._i = 0
+        if self._n < self.window:
+            self._n += 1
+            self._sum += x
+        else:
+            self._sum += x - old
+        if self._i == 0:
+            # once per lap, re-add exactly so add/subtract rounding can't
+            # creep over months of samples
+            self._sum = math.fsum(self._buf)
+        self.value = self._sum / self.window if self._n == self.window else x
+        return self.value
+
+
+class RollingMedian:
+    """Median of the last `window` samples (odd window for a true middle)."""
+
+    def __init__(self, window=5):
+        self.window = int(window)
+        self._buf = [0.0] * self.window
+        self._sorted = []
+        self._i = 0
+        self._n = 0
+        self.value = None
+
+    def __len__(self):
+        return self._n
+
+    def _push(self, x):
+        # sorted window: bisect to find, list insert/remove shifts at most
+        # `window` pointers - nothing next to an I2C read for a few dozen
+        x = float(x)
+        if self._n == self.window:
+            old = self._buf[self._i]
+            del self._sorted[bisect.bisect_left(self._sorted, old)]
+        else:
+            self._n += 1
+        self._buf[self._i] = x
+        bisect.insort(self._sorted, x)
+        self._i = (self._i + 1) % self.window
+        return x
+
+    def update(self, x):
+        x = self._push(x)
+        if self._n < self.window:
+            self.value = x
+        else:
+            s = self._sorted
+            mid = self.window // 2
+            self.value = s[mid] if self.window % 2 else 0.5 * (s[mid - 1] + s[mid])
+        return self.value
+
+
+class RollingTrimmedMean(RollingMedian):
+    """Mean of the last `window` samples after dropping `trim` from each end."""
+
+    def __init__(self, window=5, trim=1):
+        if 2 * trim >= window:
+            raise ValueError("trim must leave at least one sample in the window")
+        super().__init__(window)
+        self.trim = int(trim)
+
+    def update(self, x):
+        x = self._push(x)
+        if self._n < self.window:
+            self.value = x
+        else:
+            kept = self._sorted[self.trim:self.window - self.trim]
+            self.value = math.fsum(kept) / len(kept)
+        return self.value